@@ -0,0 +1,478 @@
+from __future__ import annotations
+
+import logging
+import math
+import sys
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from .market_stream import StreamingMarketData
+from .models import ArrayMarketData, BotState, MarketData, Position
+from .trading_engine import HOUR_US, TradingEngine
+
+
+class ArrayTradingEngine(TradingEngine):
+    """Backend de backtest sobre arrays NumPy contíguos.
+
+    Produz o mesmo ``BotState`` do ``TradingEngine`` de referência: as regras de
+    compra/venda e a contabilidade são as mesmas (helpers compartilhados), mudando
+    apenas a forma de percorrer a série: em vez de um passo Python por tick, o motor
+    salta direto para o próximo tick em que algo acontece (cruzamento de dip ou
+    gatilho de saída), encontrado com operações vetorizadas. Sem ``MarketData``
+    (modo real) ou após o fim dos dados, delega para a implementação de referência.
+    """
+
+    _source: Optional["_ArraySource"] = None
+
+    def run_operations(
+        self,
+        market: Optional[MarketData],
+        state: BotState,
+        on_operation: Optional[Callable[[int, BotState], None]] = None,
+    ) -> BotState:
+        if market is None or not market.has_data():
+            return super().run_operations(market, state, on_operation)
+        time_mode = self._time_mode(market)
+        if isinstance(market, StreamingMarketData):
+            self._source = _StreamSource(market)
+        else:
+            prices = np.ascontiguousarray(market.prices, dtype=np.float64)
+            self._source = _ArraySource(prices, _timestamps_ns(market) if time_mode else None)
+        try:
+            return super().run_operations(market, state, on_operation)
+        finally:
+            self._source = None
+
+    def _scale_in(
+        self,
+        market: Optional[MarketData],
+        state: BotState,
+        stop_loss_atual: float,
+        meta_lucro_atual: float,
+        max_duration_atual: float,
+        op: int,
+    ) -> Tuple[list, float, float, float, float, float, datetime, bool]:
+        source = self._source
+        if (
+            source is None
+            or not source.has_index(state.current_index)
+            or not source.window(state.current_index, state.current_index + 1)[0] > 0
+        ):
+            return super()._scale_in(market, state, stop_loss_atual, meta_lucro_atual, max_duration_atual, op)
+
+        params = self.params
+        levels_buy = list(params.levels_buy)
+        qtd_tranches = len(params.tranches_buy)
+        max_steps_in = params.max_steps_in
+        time_mode = self._time_mode(market)
+        tempo_in = 0
+        limite_in = max_steps_in * HOUR_US
+        btc_tranches = Position()
+        compradas = [False] * qtd_tranches
+        qtd_compradas = 0
+        preco_base_compra: Optional[float] = None
+        total_taxa_compra = 0.0
+        steps_in = 0
+        simulated_start_time = state.current_operation_time
+        comprou_algo = False
+        initial_montante = state.montante
+
+        self._log(logging.INFO, "operacao_inicio", op, qtd_tranches)
+
+        if max_steps_in > 0 and qtd_tranches > 0:
+            start = state.current_index
+            preco_base_compra = float(source.window(start, start + 1)[0])
+            simulated_start_time = market.timestamps[start]
+            pos = start
+
+            # Salta direto para o próximo tick em que algum nível restante é cruzado;
+            # os ticks pulados contam como steps sem compra, como na referência.
+            while qtd_compradas < qtd_tranches and (tempo_in < limite_in if time_mode else steps_in < max_steps_in):
+                if time_mode:
+                    hi = pos + source.span(pos, limite_in - tempo_in)
+                else:
+                    hi = pos + (max_steps_in - steps_in)
+                limite = max(level for i, level in enumerate(levels_buy) if not compradas[i])
+                j = source.first_at_or_below(limite, preco_base_compra, pos, hi)
+                if j < 0:
+                    fim = source.clamp(hi)
+                    steps_in += fim - pos
+                    if time_mode:
+                        tempo_in += source.elapsed(pos, fim)
+                    pos = fim
+                    break
+
+                steps_in += j - pos
+                if time_mode:
+                    tempo_in += source.elapsed(pos, j)
+                pos = j + 1
+                state.current_index = pos
+                janela = source.window(j, pos)
+                preco_atual = float(janela[0])
+                variacao_acumulada = float(_variacoes(janela, preco_base_compra)[0])
+                i = next(i for i, level in enumerate(levels_buy) if not compradas[i] and variacao_acumulada <= level)
+                total_taxa_compra += self._buy_tranche(
+                    state, btc_tranches, i, preco_atual, variacao_acumulada, simulated_start_time, initial_montante
+                )
+                compradas[i] = True
+                qtd_compradas += 1
+                comprou_algo = True
+                if not source.has_index(pos):
+                    break
+
+            state.current_index = pos
+
+        btc_total, preco_btc_compra, variacao_compra = self._summarize_scale_in(
+            op, state, btc_tranches, qtd_compradas, preco_base_compra
+        )
+
+        return (
+            btc_tranches,
+            btc_total,
+            btc_tranches.custo,
+            total_taxa_compra,
+            preco_btc_compra,
+            variacao_compra,
+            simulated_start_time,
+            comprou_algo,
+        )
+
+    def _monitor_position(
+        self,
+        market: Optional[MarketData],
+        state: BotState,
+        btc_tranches: Position,
+        btc_total: float,
+        custo: float,
+        total_taxas: float,
+        preco_btc_compra: float,
+        stop_loss_atual: float,
+        meta_lucro_atual: float,
+        max_duration_atual: float,
+    ):
+        source = self._source
+        if source is None or not btc_tranches or not source.has_index(state.current_index):
+            return super()._monitor_position(
+                market,
+                state,
+                btc_tranches,
+                btc_total,
+                custo,
+                total_taxas,
+                preco_btc_compra,
+                stop_loss_atual,
+                meta_lucro_atual,
+                max_duration_atual,
+            )
+
+        params = self.params
+        min_level_sell = min(params.levels_sell, default=math.inf)
+        time_mode = self._time_mode(market)
+        unidade = HOUR_US if time_mode else 3600
+        stop_loss_elapsed = (max_duration_atual - params.min_stop_loss_time_hours) * unidade
+        sold = False
+        motivo_venda = "Em aberto"
+        preco_btc_venda = preco_btc_compra
+        variacao_venda = 0.0
+        lucro = 0.0
+        imposto = 0.0
+        operacao_realizada = False
+        current_time = state.current_operation_time
+        preco_atual = preco_btc_compra
+
+        start = state.current_index
+        if time_mode:
+            total = source.span(start, math.ceil(max_duration_atual * unidade))
+        else:
+            total = _monitor_ticks(max_duration_atual)
+        pos = 0
+        decorrido = 0  # tempo de monitoramento até ``pos``
+
+        while pos < total:
+            # Uma passada vetorizada pelo restante da janela acha o primeiro tick em que
+            # alguma saída dispara: stop-loss (após min_stop_loss_time_hours), meta total
+            # ou nível de venda de alguma tranche. Sem gatilho, salta para o último tick.
+            # A venda antecipada da referência fica atrás do ramo das tranches e nunca
+            # dispara com posição aberta, por isso não entra na busca. Em stream a janela
+            # é lida em segmentos; segmentos sem gatilho só avançam o índice.
+            restante = source.window(start + pos, start + min(total, pos + source.segment))
+            if not len(restante):
+                break
+            variacoes = _variacoes_posicao(restante, btc_total, custo)
+            if time_mode:
+                elapsed = decorrido + np.cumsum(source.durations(start + pos, start + pos + len(restante)))
+            else:
+                elapsed = np.arange(pos + 1, pos + len(restante) + 1) * 3600
+            gatilho = (variacoes <= stop_loss_atual) & (elapsed >= stop_loss_elapsed)
+            gatilho |= variacoes >= meta_lucro_atual
+            for tranche in btc_tranches:
+                gatilho |= (restante - tranche.preco_compra) / tranche.preco_compra >= min_level_sell
+            hits = np.flatnonzero(gatilho)
+            if not hits.size and pos + len(restante) < total and source.has_index(start + pos + len(restante)):
+                pos += len(restante)
+                decorrido = int(elapsed[-1])
+                state.current_index = start + pos
+                continue
+            k = int(hits[0]) if hits.size else len(restante) - 1
+
+            pos += k + 1
+            decorrido = int(elapsed[k])
+            state.current_index = start + pos
+            tempo_atual = market.timestamps[start + pos - 1]
+            preco_atual = float(restante[k])
+            variacao_atual = float(variacoes[k])
+
+            if variacao_atual <= stop_loss_atual and elapsed[k] >= stop_loss_elapsed:
+                preco_btc_venda = preco_atual
+                variacao_venda = variacao_atual
+                motivo_venda = "Stop-loss Total"
+                lucro, imposto, taxa_venda = self._sell_position(
+                    state, btc_total, custo, preco_atual, tempo_atual, motivo_venda, preco_btc_compra, variacao_venda
+                )
+                total_taxas += taxa_venda
+                state.cooldown_remaining = params.cooldown_steps
+                sold = True
+                operacao_realizada = True
+                btc_total = 0
+                btc_tranches.clear()
+
+            elif variacao_atual >= meta_lucro_atual:
+                preco_btc_venda = preco_atual
+                variacao_venda = variacao_atual
+                motivo_venda = "Meta de Lucro Total"
+                lucro, imposto, taxa_venda = self._sell_position(
+                    state, btc_total, custo, preco_atual, tempo_atual, motivo_venda, preco_btc_compra, variacao_venda
+                )
+                total_taxas += taxa_venda
+                sold = True
+                operacao_realizada = True
+                btc_total = 0
+                btc_tranches.clear()
+
+            else:
+                tranches_vendidas = []
+                for tranche in btc_tranches:
+                    variacao_tranche = (preco_atual - tranche.preco_compra) / tranche.preco_compra
+                    if variacao_tranche >= min_level_sell:
+                        lucro_parcial, taxa_venda_tranche = self._sell_tranche(
+                            state, tranche, preco_atual, variacao_tranche, tempo_atual
+                        )
+                        total_taxas += taxa_venda_tranche
+                        lucro += lucro_parcial
+                        tranches_vendidas.append(tranche)
+                        operacao_realizada = True
+
+                for tranche in tranches_vendidas:
+                    btc_tranches.remove(tranche.tranche_idx)
+                btc_total = btc_tranches.btc_total
+
+                if not btc_tranches:
+                    variacao_venda = (preco_atual - preco_btc_compra) / preco_btc_compra if preco_btc_compra else 0.0
+                    motivo_venda = "Meta de Lucro Total (Scaling Out)"
+                    sold = True
+                    self._log_scaling_out(tempo_atual, lucro, variacao_venda, preco_btc_compra, preco_atual)
+
+            current_time = tempo_atual
+            if not source.has_index(state.current_index):
+                motivo_venda = "Fim dos Dados (Posição Aberta)"
+                variacao_venda = variacao_atual
+                sold = True
+
+            if sold:
+                break
+
+        if not sold:
+            preco_btc_venda = preco_atual
+            variacao_venda = (preco_atual - preco_btc_compra) / preco_btc_compra if preco_btc_compra else 0.0
+            motivo_venda = "Monitoramento encerrado sem venda"
+
+        return (
+            btc_tranches,
+            btc_total,
+            total_taxas,
+            lucro,
+            imposto,
+            preco_btc_venda,
+            variacao_venda,
+            motivo_venda,
+            operacao_realizada,
+            current_time,
+        )
+
+
+class _ArraySource:
+    """Série inteira em memória (ou memmap): janelas são fatias diretas do array.
+
+    No modo por tempo guarda a duração de cada barra em µs e o acumulado, para achar
+    com ``searchsorted`` quantas barras cabem num orçamento de tempo.
+    """
+
+    segment = sys.maxsize
+
+    def __init__(self, prices: np.ndarray, timestamps_ns: Optional[np.ndarray] = None):
+        self.prices = prices
+        self.index = CrossingIndex(prices)
+        if timestamps_ns is not None:
+            self.duracoes = _duracoes(timestamps_ns, None)
+            self.acumulado = np.concatenate(([0], np.cumsum(self.duracoes)))
+
+    def has_index(self, index: int) -> bool:
+        return index < len(self.prices)
+
+    def clamp(self, stop: int) -> int:
+        return min(stop, len(self.prices))
+
+    def window(self, start: int, stop: int) -> np.ndarray:
+        return self.prices[start:stop]
+
+    def first_at_or_below(self, limite: float, preco_base: float, lo: int, hi: int) -> int:
+        return self.index.first_at_or_below(limite, preco_base, lo, self.clamp(hi))
+
+    def durations(self, start: int, stop: int) -> np.ndarray:
+        return self.duracoes[start:stop]
+
+    def elapsed(self, start: int, stop: int) -> int:
+        return int(self.acumulado[stop] - self.acumulado[start])
+
+    def span(self, start: int, orcamento: int) -> int:
+        """Barras lidas a partir de ``start`` enquanto o tempo acumulado antes delas < ``orcamento``."""
+        if orcamento <= 0 or start >= len(self.prices):
+            return 0
+        hi = int(np.searchsorted(self.acumulado, self.acumulado[start] + orcamento, side="left"))
+        return min(hi, len(self.prices)) - start
+
+
+class _StreamSource(_ArraySource):
+    """Série em blocos: janelas e buscas percorrem segmentos do tamanho de um bloco."""
+
+    def __init__(self, market: StreamingMarketData):
+        self.market = market
+        self.segment = market.chunk_rows
+
+    def has_index(self, index: int) -> bool:
+        return self.market.has_index(index)
+
+    def clamp(self, stop: int) -> int:
+        self.market.has_index(stop - 1)
+        return min(stop, self.market.length())
+
+    def window(self, start: int, stop: int, release: bool = True) -> np.ndarray:
+        return self.market.prices_window(start, stop, release)
+
+    def first_at_or_below(self, limite: float, preco_base: float, lo: int, hi: int) -> int:
+        pos = lo
+        while pos < hi:
+            janela = self.window(pos, min(hi, pos + self.segment), release=False)
+            if not len(janela):
+                return -1
+            hits = np.flatnonzero(_variacoes(janela, preco_base) <= limite)
+            if hits.size:
+                return pos + int(hits[0])
+            pos += len(janela)
+        return -1
+
+    def durations(self, start: int, stop: int, release: bool = True) -> np.ndarray:
+        timestamps = self.market.timestamps_window(max(start - 1, 0), stop, release)
+        if start > 0:
+            return _duracoes(timestamps[1:], int(timestamps[0]))
+        return _duracoes(timestamps, None)
+
+    def elapsed(self, start: int, stop: int) -> int:
+        return int(self.durations(start, stop).sum())
+
+    def span(self, start: int, orcamento: int) -> int:
+        pos, acumulado = start, 0
+        while acumulado < orcamento:
+            duracoes = self.durations(pos, pos + self.segment, release=False)
+            if not len(duracoes):
+                break
+            antes = acumulado + np.cumsum(duracoes) - duracoes  # tempo acumulado antes de cada barra
+            lidas = int(np.searchsorted(antes, orcamento, side="left"))
+            if lidas < len(duracoes):
+                return pos + lidas - start
+            acumulado = int(antes[-1] + duracoes[-1])
+            pos += len(duracoes)
+        return pos - start
+
+
+class CrossingIndex:
+    """Índice de mínimos por bloco para achar o primeiro cruzamento de um nível de dip.
+
+    Como ``(p - base) / base`` é monótona em ``p`` (base > 0) também no arredondamento
+    IEEE, um bloco contém um tick com variação <= nível se e somente se o seu mínimo
+    contém — a busca é exata e só examina tick a tick o bloco onde o cruzamento ocorre.
+    """
+
+    BLOCK = 64
+
+    def __init__(self, prices: np.ndarray):
+        self.prices = prices
+        full = len(prices) // self.BLOCK * self.BLOCK
+        self.block_min = prices[:full].reshape(-1, self.BLOCK).min(axis=1)
+
+    def first_at_or_below(self, limite: float, preco_base: float, lo: int, hi: int) -> int:
+        """Primeiro índice em ``[lo, hi)`` com variação <= ``limite``; -1 se não houver."""
+        block = self.BLOCK
+        head_end = min(hi, (lo // block + 1) * block)
+        found = self._scan(limite, preco_base, lo, head_end)
+        if found >= 0 or head_end >= hi:
+            return found
+
+        b_lo, b_hi = head_end // block, min(hi // block, len(self.block_min))
+        if b_lo < b_hi:
+            hits = np.flatnonzero(_variacoes(self.block_min[b_lo:b_hi], preco_base) <= limite)
+            if hits.size:
+                b = b_lo + int(hits[0])
+                return self._scan(limite, preco_base, b * block, (b + 1) * block)
+        return self._scan(limite, preco_base, max(head_end, b_hi * block), hi)
+
+    def _scan(self, limite: float, preco_base: float, lo: int, hi: int) -> int:
+        if lo >= hi:
+            return -1
+        hits = np.flatnonzero(_variacoes(self.prices[lo:hi], preco_base) <= limite)
+        return lo + int(hits[0]) if hits.size else -1
+
+
+def _variacoes(janela: np.ndarray, preco_base: float) -> np.ndarray:
+    """Variação acumulada em relação ao preço base (mesma fórmula da referência)."""
+    if not preco_base:
+        return np.zeros_like(janela)
+    return (janela - preco_base) / preco_base
+
+
+def _variacoes_posicao(janela: np.ndarray, btc_total: float, custo: float) -> np.ndarray:
+    """Variação da posição inteira contra o custo de compra."""
+    if custo <= 0:
+        return np.zeros_like(janela)
+    return (janela * btc_total - custo) / custo
+
+
+def _duracoes(timestamps_ns: np.ndarray, anterior_ns: Optional[int]) -> np.ndarray:
+    """Duração de cada barra em µs desde a anterior; sem barra anterior, 1 hora (como a referência)."""
+    timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+    duracoes = np.empty(len(timestamps_ns), dtype=np.int64)
+    if len(timestamps_ns):
+        duracoes[0] = HOUR_US if anterior_ns is None else (int(timestamps_ns[0]) - anterior_ns) // 1000
+        duracoes[1:] = np.diff(timestamps_ns) // 1000
+    return duracoes
+
+
+def _timestamps_ns(market: MarketData) -> np.ndarray:
+    if isinstance(market, ArrayMarketData):
+        return np.asarray(market.timestamps_ns, dtype=np.int64)
+    return ArrayMarketData.from_market(market).timestamps_ns
+
+
+def _monitor_ticks(max_duration_hours: float) -> int:
+    """Quantidade de steps horários percorridos pelo monitoramento da referência."""
+    limite = max_duration_hours * 3600
+    if not limite > 0:
+        return 0
+    ticks = math.ceil(limite / 3600)
+    while ticks > 0 and (ticks - 1) * 3600 >= limite:
+        ticks -= 1
+    while ticks * 3600 < limite:
+        ticks += 1
+    return ticks
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import concurrent.futures
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+from .exchange_interface import ExchangeInterface
+from .models import BotState, MarketData
+
+
+@dataclass
+class Fill:
+    """Execução confirmada de uma ordem."""
+
+    order_id: str
+    quantidade: float  # BTC na compra, BRL na venda
+    taxa: float
+
+
+class AsyncExchangeInterface(ABC):
+    """Versão assíncrona da exchange: cotação, envio de ordem e confirmação são corrotinas.
+
+    ``buy``/``sell`` compõem ``place_order`` + ``wait_fill`` e devolvem as mesmas tuplas
+    da interface síncrona.
+    """
+
+    @abstractmethod
+    async def get_current_price(self, symbol: str = "BTCUSDT") -> float:
+        raise NotImplementedError
+
+    @abstractmethod
+    async def place_order(self, side: str, quantidade: float, price_brl: float, ts: datetime) -> str:
+        """Envia a ordem (``quantidade`` em BRL na compra, em BTC na venda); retorna o id."""
+        raise NotImplementedError
+
+    @abstractmethod
+    async def wait_fill(self, order_id: str) -> Fill:
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        return None
+
+    async def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:
+        if montante_brl <= 0 or price_brl <= 0:
+            return 0.0, 0.0
+        fill = await self.wait_fill(await self.place_order("buy", montante_brl, price_brl, ts))
+        return fill.quantidade, fill.taxa
+
+    async def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:
+        if btc_total <= 0 or price_brl <= 0:
+            return 0.0, 0.0
+        fill = await self.wait_fill(await self.place_order("sell", btc_total, price_brl, ts))
+        return fill.quantidade, fill.taxa
+
+
+class AsyncExchangeBridge(ExchangeInterface):
+    """Expõe uma exchange assíncrona ao motor síncrono, que roda em outra thread.
+
+    Cada chamada vira uma corrotina no loop do bridge. A próxima cotação é pedida assim
+    que a anterior é entregue, então ela trafega em paralelo com ordens e confirmações.
+    """
+
+    def __init__(self, exchange: AsyncExchangeInterface, loop: asyncio.AbstractEventLoop):
+        self.exchange = exchange
+        self.loop = loop
+        self._next_quote: Optional[concurrent.futures.Future] = None
+
+    def get_current_price(self, symbol: str = "BTCUSDT") -> float:
+        quote = self._next_quote or self._submit(self.exchange.get_current_price(symbol))
+        self._next_quote = self._submit(self.exchange.get_current_price(symbol))
+        return quote.result()
+
+    def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:
+        return self._submit(self.exchange.buy(montante_brl, price_brl, ts)).result()
+
+    def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:
+        return self._submit(self.exchange.sell(btc_total, price_brl, ts, reason)).result()
+
+    def discard_prefetch(self) -> None:
+        if self._next_quote is not None:
+            self._next_quote.cancel()
+            self._next_quote = None
+
+    def _submit(self, coro) -> concurrent.futures.Future:
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+
+async def run_engine_async(
+    engine, exchange: AsyncExchangeInterface, market: Optional[MarketData], state: BotState
+) -> BotState:
+    """Roda ``engine.run_operations`` numa thread, com a exchange assíncrona no loop atual."""
+    bridge = AsyncExchangeBridge(exchange, asyncio.get_running_loop())
+    original = engine.exchange
+    engine.exchange = bridge
+    try:
+        return await bridge.loop.run_in_executor(None, engine.run_operations, market, state)
+    finally:
+        bridge.discard_prefetch()
+        engine.exchange = original
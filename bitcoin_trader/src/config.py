@@ -33,11 +33,149 @@ def build_parser() -> argparse.ArgumentParser:
     test_parser = subparsers.add_parser("test", help="Rodar simulação com dados históricos (CSV)")
     _add_trading_arguments(test_parser)
     test_parser.add_argument("--csv-file", type=Path, required=True, help="Arquivo CSV com preços históricos")
+    _add_engine_argument(test_parser, default="reference")
+    _add_cache_argument(test_parser)
+    _add_timeframe_argument(test_parser)
+    _add_book_arguments(test_parser)
+    _add_ledger_argument(test_parser)
+    _add_graph_arguments(test_parser)
+    test_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continua do último checkpoint (--checkpoint-ops) de um backtest interrompido, com o mesmo CSV e "
+        "parâmetros; sem ele o test parte do estado ao fim da última execução concluída",
+    )
+    test_parser.add_argument(
+        "--checkpoint-ops",
+        type=int,
+        default=10,
+        help="Grava o estado a cada N operações concluídas; 0 = só no fim (default: 10)",
+    )
+    test_parser.add_argument(
+        "--chunk-rows",
+        type=int,
+        default=None,
+        help="Lê o CSV em blocos deste tamanho (memória limitada; gráfico sem a série histórica)",
+    )
+
+    # Subcomando: sweep (varredura de parâmetros em paralelo)
+    sweep_parser = subparsers.add_parser("sweep", help="Varredura paralela de TradingParams sobre um CSV")
+    _add_trading_arguments(sweep_parser)
+    sweep_parser.add_argument("--csv-file", type=Path, required=True, help="Arquivo CSV com preços históricos")
+    _add_engine_argument(sweep_parser, default="numpy")
+    _add_cache_argument(sweep_parser)
+    _add_timeframe_argument(sweep_parser)
+    _add_grid_arguments(sweep_parser)
+    sweep_parser.add_argument("--top", type=int, default=10, help="Linhas exibidas do ranking (default: 10)")
+
+    # Subcomando: walkforward (otimiza no treino, aplica fora da amostra)
+    wf_parser = subparsers.add_parser(
+        "walkforward", help="Walk-forward: otimiza o grid em cada janela de treino e testa na janela seguinte"
+    )
+    _add_trading_arguments(wf_parser)
+    wf_parser.add_argument("--csv-file", type=Path, required=True, help="Arquivo CSV com preços históricos")
+    _add_engine_argument(wf_parser, default="numpy")
+    _add_cache_argument(wf_parser)
+    _add_timeframe_argument(wf_parser)
+    _add_grid_arguments(wf_parser)
+    wf_parser.add_argument("--train-rows", type=int, default=720, help="Linhas (barras) de cada janela de treino (default: 720)")
+    wf_parser.add_argument("--test-rows", type=int, default=168, help="Linhas (barras) de cada janela fora da amostra (default: 168)")
+    wf_parser.add_argument(
+        "--step-rows", type=int, default=None, help="Avanço entre janelas (default: igual a --test-rows)"
+    )
+
+    # Subcomando: montecarlo (caminhos sintéticos em lote)
+    mc_parser = subparsers.add_parser(
+        "montecarlo", help="Monte Carlo: roda o grid sobre muitos caminhos de preço sintéticos"
+    )
+    _add_trading_arguments(mc_parser)
+    mc_parser.add_argument(
+        "--generator",
+        choices=["random-walk", "bootstrap", "gbm"],
+        default="random-walk",
+        help="Gerador: random-walk (mesmo passo da MockExchange), bootstrap (blocos de retornos do CSV) ou gbm",
+    )
+    mc_parser.add_argument(
+        "--csv-file", type=Path, default=None, help="Histórico para bootstrap/estimativa do gbm e preço inicial"
+    )
+    mc_parser.add_argument("--paths", dest="n_paths", type=int, default=200, help="Quantidade de caminhos (default: 200)")
+    mc_parser.add_argument("--path-rows", type=int, default=720, help="Barras por caminho (default: 720)")
+    mc_parser.add_argument("--block-rows", type=int, default=24, help="Tamanho do bloco no bootstrap (default: 24)")
+    mc_parser.add_argument("--drift", type=float, default=None, help="Drift por barra do gbm (default: estimado do CSV ou 0)")
+    mc_parser.add_argument(
+        "--volatility", type=float, default=None, help="Volatilidade por barra do gbm (default: estimada do CSV ou 0.01)"
+    )
+    mc_parser.add_argument("--start-price", type=float, default=None, help="Preço inicial em BRL (default: último do CSV)")
+    mc_parser.add_argument("--seed", type=int, default=0, help="Semente do gerador (default: 0)")
+    _add_engine_argument(mc_parser, default="numpy")
+    _add_cache_argument(mc_parser)
+    _add_timeframe_argument(mc_parser)
+    _add_grid_arguments(mc_parser)
 
     # Subcomando: real (modo real usando exchange - mock por enquanto)
     real_parser = subparsers.add_parser("real", help="Rodar em modo real (usa exchange mock por ora)")
     _add_trading_arguments(real_parser)
-    real_parser.add_argument("--exchange", choices=["mock", "binance", "coinbase"], default="mock")
+    real_parser.add_argument(
+        "--exchange",
+        choices=["mock", "fake", "binance", "coinbase"],
+        default="mock",
+        help="mock (síncrona, em memória), fake (exchange assíncrona local via TCP), binance ou coinbase",
+    )
+    real_parser.add_argument(
+        "--base-url",
+        type=str,
+        default=None,
+        help="URL da API REST (binance/coinbase); ex.: o stand-in local de src.exchange_standin",
+    )
+    real_parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Semente da exchange mock: preços reprodutíveis, gerados em lote (default: aleatório)",
+    )
+    _add_book_arguments(real_parser)
+    _add_ledger_argument(real_parser)
+    _add_graph_arguments(real_parser)
+    real_parser.add_argument(
+        "--feed-url",
+        type=str,
+        default=None,
+        help="Cotações por stream WebSocket de trades (ex.: wss://stream.binance.com:9443/ws/btcbrl@trade) "
+        "em vez de uma consulta por step; ordens continuam na --exchange",
+    )
+    real_parser.add_argument(
+        "--feed-replay",
+        type=Path,
+        default=None,
+        help="Sobe um feed WebSocket local que reenvia este CSV e opera sobre ele (todos os ticks, em ordem)",
+    )
+    real_parser.add_argument(
+        "--feed-rate", type=float, default=0.0, help="Ticks por segundo do --feed-replay; 0 = sem pausa (default: 0)"
+    )
+    real_parser.add_argument(
+        "--tick-buffer", type=int, default=65536, help="Capacidade do buffer circular de ticks (default: 65536)"
+    )
+    real_parser.add_argument(
+        "--daemon",
+        action="store_true",
+        help="Processo contínuo: uma cotação por barra (alinhada ao relógio) até concluir as operações",
+    )
+    real_parser.add_argument(
+        "--interval", type=str, default="1h", help="Duração da barra no --daemon (ex.: 1min, 15min, 1h; default: 1h)"
+    )
+    real_parser.add_argument(
+        "--checkpoint-ops",
+        type=int,
+        default=1,
+        help="No --daemon, grava o estado a cada N operações concluídas (default: 1)",
+    )
+    real_parser.add_argument(
+        "--history-keep",
+        type=int,
+        default=0,
+        help="Mantém no estado só os N itens mais recentes de cada série (lucros, pontos, saldo, detalhes); "
+        "os anteriores ficam em outputs/history e continuam no relatório. 0 = tudo no estado (default: 0)",
+    )
     real_parser.add_argument(
         "--force-graph",
         action="store_true",
@@ -47,6 +185,84 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def _add_engine_argument(subparser: argparse.ArgumentParser, default: str) -> None:
+    subparser.add_argument(
+        "--engine",
+        choices=["reference", "numpy"],
+        default=default,
+        help=f"Backend do motor: reference (passo a passo) ou numpy (arrays vetorizados). Default: {default}",
+    )
+
+
+def _add_grid_arguments(subparser: argparse.ArgumentParser) -> None:
+    subparser.add_argument(
+        "--grid",
+        action="append",
+        default=[],
+        metavar="CAMPO=VALORES",
+        help="Valores de um campo: v1,v2,... ou inicio:fim:passo; tuplas com '/' (ex.: levels_sell=0.01/0.03/0.05)",
+    )
+    subparser.add_argument("--workers", type=int, default=None, help="Processos paralelos (default: todos os núcleos)")
+
+
+def _add_cache_argument(subparser: argparse.ArgumentParser) -> None:
+    subparser.add_argument(
+        "--no-cache",
+        dest="use_cache",
+        action="store_false",
+        help="Ignora o cache binário do CSV (data/.cache) e relê o arquivo texto",
+    )
+
+
+def _add_ledger_argument(subparser: argparse.ArgumentParser) -> None:
+    subparser.add_argument(
+        "--no-ledger",
+        dest="ledger",
+        action="store_false",
+        help="Não grava o livro de operações SQLite (outputs/trades.db)",
+    )
+
+
+def _add_graph_arguments(subparser: argparse.ArgumentParser) -> None:
+    subparser.add_argument("--graph-dpi", type=int, default=300, help="Resolução do gráfico em DPI (default: 300)")
+    subparser.add_argument(
+        "--graph-size",
+        nargs=2,
+        type=float,
+        default=[15.0, 10.0],
+        metavar=("LARGURA", "ALTURA"),
+        help="Tamanho do gráfico em polegadas (default: 15 10)",
+    )
+
+
+def _add_timeframe_argument(subparser: argparse.ArgumentParser) -> None:
+    subparser.add_argument(
+        "--timeframe",
+        type=str,
+        default=None,
+        help="Agrega o CSV em barras OHLC deste período antes da simulação (ex.: 15min, 1h, 4h, 1d)",
+    )
+
+
+def _add_book_arguments(subparser: argparse.ArgumentParser) -> None:
+    subparser.add_argument(
+        "--book-depth",
+        type=float,
+        default=None,
+        help="Executa as ordens da exchange mock contra um livro sintético com esta profundidade "
+        "(BTC) no primeiro nível: slippage e execução por níveis (default: preço cheio, sem livro)",
+    )
+    subparser.add_argument(
+        "--book-levels", type=int, default=1000, help="Níveis do livro sintético por lado (default: 1000)"
+    )
+    subparser.add_argument(
+        "--book-spread",
+        type=float,
+        default=0.0005,
+        help="Spread do livro sintético como fração do preço (default: 0.0005)",
+    )
+
+
 def _add_trading_arguments(subparser: argparse.ArgumentParser) -> None:
     subparser.add_argument("--montante", type=float, default=10000, help="Montante inicial em reais")
     subparser.add_argument("--qtd-operacoes", type=int, default=30, help="Quantidade de operações")
@@ -100,6 +316,19 @@ def _add_trading_arguments(subparser: argparse.ArgumentParser) -> None:
         default=24,
         help="Duração máxima da operação em horas. Default: 24",
     )
+    subparser.add_argument(
+        "--time-steps",
+        dest="time_based_steps",
+        action="store_true",
+        help="Mede --max-steps-in e --max-duration-hours pelos timestamps das barras, não por linhas",
+    )
+    subparser.add_argument(
+        "--log-mode",
+        choices=["full", "buffer", "off"],
+        default="full",
+        help="Log das operações: full (imediato), buffer (em memória, gravado no fim em "
+        "outputs/trade_events.log) ou off. Default: full",
+    )
 
 
 def parse_args(project_root: Path) -> Tuple[AppConfig, Paths]:
@@ -121,6 +350,7 @@ def parse_args(project_root: Path) -> Tuple[AppConfig, Paths]:
         max_steps_in=args.max_steps_in if hasattr(args, "max_steps_in") else 168,
         fixed_tranche_allocation=getattr(args, "fixed_tranche_allocation", False),
         max_duration_hours=getattr(args, "max_duration_hours", 24),
+        time_based_steps=getattr(args, "time_based_steps", False),
     )
 
     fetch_cfg = FetchConfig(
@@ -136,6 +366,41 @@ def parse_args(project_root: Path) -> Tuple[AppConfig, Paths]:
         csv_file=getattr(args, "csv_file", None),
         exchange=getattr(args, "exchange", "mock"),
         force_graph=getattr(args, "force_graph", False),
+        engine=getattr(args, "engine", "reference"),
+        grid=getattr(args, "grid", []),
+        workers=getattr(args, "workers", None),
+        top=getattr(args, "top", 10),
+        log_mode=getattr(args, "log_mode", "full"),
+        use_cache=getattr(args, "use_cache", True),
+        chunk_rows=getattr(args, "chunk_rows", None),
+        timeframe=getattr(args, "timeframe", None),
+        train_rows=getattr(args, "train_rows", 720),
+        test_rows=getattr(args, "test_rows", 168),
+        step_rows=getattr(args, "step_rows", None),
+        generator=getattr(args, "generator", "random-walk"),
+        n_paths=getattr(args, "n_paths", 200),
+        path_rows=getattr(args, "path_rows", 720),
+        block_rows=getattr(args, "block_rows", 24),
+        drift=getattr(args, "drift", None),
+        volatility=getattr(args, "volatility", None),
+        start_price=getattr(args, "start_price", None),
+        seed=getattr(args, "seed", None),
+        base_url=getattr(args, "base_url", None),
+        book_depth=getattr(args, "book_depth", None),
+        book_levels=getattr(args, "book_levels", 1000),
+        book_spread=getattr(args, "book_spread", 0.0005),
+        feed_url=getattr(args, "feed_url", None),
+        feed_replay=getattr(args, "feed_replay", None),
+        feed_rate=getattr(args, "feed_rate", 0.0),
+        tick_buffer=getattr(args, "tick_buffer", 65536),
+        daemon=getattr(args, "daemon", False),
+        interval=getattr(args, "interval", "1h"),
+        checkpoint_ops=getattr(args, "checkpoint_ops", 1),
+        resume=getattr(args, "resume", False),
+        history_keep=getattr(args, "history_keep", 0),
+        ledger=getattr(args, "ledger", True),
+        graph_dpi=getattr(args, "graph_dpi", 300),
+        graph_size=tuple(getattr(args, "graph_size", (15.0, 10.0))),
         output_graph=True,
     )
 
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional, Tuple
+
+from .exchange_interface import ExchangeInterface
+
+
+class DaemonStopped(Exception):
+    """Parada pedida (sinal) enquanto o daemon esperava a próxima barra."""
+
+
+class BarClock:
+    """Espera até a próxima fronteira de barra alinhada à época (``interval`` em segundos).
+
+    Com 15 min, as consultas caem em :00, :15, :30 e :45, seja qual for o horário de
+    início. Barras perdidas (passo do motor mais longo que a barra) são puladas e
+    contadas em ``skipped``. ``stop`` interrompe a espera com ``DaemonStopped``.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        stop: Optional[threading.Event] = None,
+        clock: Callable[[], float] = time.time,
+        sleep: Optional[Callable[[float], bool]] = None,
+    ):
+        if interval <= 0:
+            raise ValueError("interval deve ser positivo")
+        self.interval = interval
+        self.stop = stop or threading.Event()
+        self._clock = clock
+        self._sleep = sleep or self.stop.wait  # devolve True se a parada foi pedida
+        self.last_boundary: Optional[float] = None
+        self.skipped = 0
+
+    def next_boundary(self, agora: float) -> float:
+        return (math.floor(agora / self.interval) + 1) * self.interval
+
+    def wait(self) -> float:
+        """Dorme até a próxima fronteira e a devolve (epoch em segundos)."""
+        if self.stop.is_set():
+            raise DaemonStopped()
+        alvo = self.next_boundary(self._clock())
+        if self.last_boundary is not None:
+            self.skipped += max(0, round((alvo - self.last_boundary) / self.interval) - 1)
+        while True:
+            restante = alvo - self._clock()
+            if restante <= 0:
+                break
+            if self._sleep(restante):
+                raise DaemonStopped()
+        self.last_boundary = alvo
+        return alvo
+
+
+class ScheduledExchange(ExchangeInterface):
+    """Exchange cujas cotações saem uma por barra, no horário do ``BarClock``.
+
+    Ordens passam direto para ``inner``. Mede o tempo entre a entrega de uma cotação e
+    o pedido da seguinte, que é o custo do passo do motor (``engine_seconds``).
+    """
+
+    def __init__(self, inner: ExchangeInterface, clock: BarClock, timer: Callable[[], float] = time.perf_counter):
+        self.inner = inner
+        self.clock = clock
+        self._timer = timer
+        self._entregue: Optional[float] = None
+        self.ticks = 0
+        self.engine_seconds = 0.0
+        self.max_engine_seconds = 0.0
+
+    def get_current_price(self, symbol: str = "BTCUSDT") -> float:
+        if self._entregue is not None:
+            passo = self._timer() - self._entregue
+            self.engine_seconds += passo
+            self.max_engine_seconds = max(self.max_engine_seconds, passo)
+        self.clock.wait()
+        price = self.inner.get_current_price(symbol)
+        self.ticks += 1
+        self._entregue = self._timer()
+        return price
+
+    def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:
+        return self.inner.buy(montante_brl, price_brl, ts)
+
+    def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:
+        return self.inner.sell(btc_total, price_brl, ts, reason)
@@ -0,0 +1,73 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+def min_max(y, buckets: int) -> np.ndarray:
+    """Índices do mínimo e do máximo de cada um de ``buckets`` blocos contíguos de ``y``.
+
+    Uma coluna de pixels por bloco: picos e vales continuam no gráfico, com até
+    ``2 * buckets + 2`` pontos. Séries que já cabem voltam inteiras.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if buckets <= 0 or n <= 2 * buckets:
+        return np.arange(n)
+    size = -(-n // buckets)
+    blocos = -(-n // size)
+    preenchido = np.empty(blocos * size)
+    preenchido[:n] = y
+    preenchido[n:] = y[-1]  # o bloco final é completado com o último valor (não muda mín/máx)
+    matriz = preenchido.reshape(blocos, size)
+    base = np.arange(blocos) * size
+    indices = np.concatenate(([0, n - 1], base + matriz.argmin(axis=1), base + matriz.argmax(axis=1)))
+    return np.unique(np.minimum(indices, n - 1))
+
+
+def lttb(x, y, n: int) -> np.ndarray:
+    """Índices de ``n`` pontos escolhidos por Largest-Triangle-Three-Buckets.
+
+    Mantém o primeiro e o último ponto e, em cada um dos ``n - 2`` blocos do meio, o ponto
+    que forma o maior triângulo com o escolhido no bloco anterior e a média do seguinte.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    total = len(y)
+    if n < 3 or total <= n:
+        return np.arange(total)
+    bordas = np.linspace(1, total - 1, n - 1).astype(np.int64)
+    indices = np.empty(n, dtype=np.int64)
+    indices[0], indices[-1] = 0, total - 1
+    anterior = 0
+    for i in range(n - 2):
+        inicio, fim = bordas[i], bordas[i + 1]
+        if i + 2 < len(bordas):
+            media_x = x[fim : bordas[i + 2]].mean()
+            media_y = y[fim : bordas[i + 2]].mean()
+        else:
+            media_x, media_y = x[-1], y[-1]
+        area = np.abs(
+            (x[anterior] - media_x) * (y[inicio:fim] - y[anterior])
+            - (x[anterior] - x[inicio:fim]) * (media_y - y[anterior])
+        )
+        anterior = inicio + int(area.argmax())
+        indices[i + 1] = anterior
+    return indices
+
+
+def bin_markers(x, y, bins: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Agrupa marcadores em ``bins`` faixas iguais de x: (x médio, y médio, quantidade) das faixas ocupadas."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if len(x) <= bins:
+        return x, y, np.ones(len(x), dtype=np.int64)
+    inicio, fim = x.min(), x.max()
+    faixa = np.minimum(((x - inicio) * bins / max(fim - inicio, 1e-12)).astype(np.int64), bins - 1)
+    quantidade = np.bincount(faixa, minlength=bins)
+    ocupadas = quantidade > 0
+    soma_x = np.bincount(faixa, weights=x, minlength=bins)[ocupadas]
+    soma_y = np.bincount(faixa, weights=y, minlength=bins)[ocupadas]
+    quantidade = quantidade[ocupadas]
+    return soma_x / quantidade, soma_y / quantidade, quantidade
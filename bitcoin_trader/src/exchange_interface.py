@@ -1,12 +1,27 @@
 from __future__ import annotations
 
+import base64
+import hashlib
+import hmac
+import json
+import math
 import random
+import time
+import uuid
 from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Tuple
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode
 
 import logging
 
+import numpy as np
+
+from .http_pool import ConnectionPool, ExchangeHTTPError, RateLimiter, Request
+
+# Variação por tick da MockExchange, em milésimos do preço anterior
+MOCK_VARIATION = (-1.0, 1.0002)
+
 
 class ExchangeInterface(ABC):
     """Abstração mínima para integrar exchanges reais."""
@@ -27,17 +42,45 @@ class ExchangeInterface(ABC):
 
 
 class MockExchange(ExchangeInterface):
-    """Implementação mockada com variação aleatória e taxa fixa."""
+    """Implementação mockada com variação aleatória e taxa fixa.
 
-    def __init__(self, taxa_transacao: float = 0.002, start_price: float = 654139.18, logger: logging.Logger | None = None):
+    Sem ``seed``, cada preço vem do módulo global ``random`` (comportamento original).
+    Com ``seed``, os preços são gerados em lotes de ``buffer_size`` via NumPy e servidos
+    de um buffer: a sequência é reprodutível e cada tick custa só um índice.
+    """
+
+    def __init__(
+        self,
+        taxa_transacao: float = 0.002,
+        start_price: float = 654139.18,
+        logger: logging.Logger | None = None,
+        verbose: bool = True,
+        seed: Optional[int] = None,
+        buffer_size: int = 4096,
+    ):
+        if buffer_size <= 0:
+            raise ValueError("buffer_size deve ser positivo")
         self.taxa_transacao = taxa_transacao
         self.last_price = start_price
         self.logger = logger or logging.getLogger(__name__)
+        self.verbose = verbose
+        self.seed = seed
+        self.buffer_size = buffer_size
+        self._rng = np.random.default_rng(seed) if seed is not None else None
+        self._buffer = np.empty(0, dtype=np.float64)
+        self._pos = 0
 
     def get_current_price(self, symbol: str = "BTCUSDT") -> float:
-        variation = random.uniform(-1, 1.0002)
-        new_price = self.last_price * (1 + (variation / 1000))
-        self.last_price = max(new_price, 1.0)
+        if self._rng is None:
+            variation = random.uniform(*MOCK_VARIATION)
+            new_price = self.last_price * (1 + (variation / 1000))
+            self.last_price = max(new_price, 1.0)
+            return self.last_price
+        if self._pos >= len(self._buffer):
+            self._buffer = mock_price_batch(self._rng, self.last_price, self.buffer_size)
+            self._pos = 0
+        self.last_price = float(self._buffer[self._pos])
+        self._pos += 1
         return self.last_price
 
     def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:
@@ -45,9 +88,10 @@ class MockExchange(ExchangeInterface):
             return 0.0, 0.0
         taxa = montante_brl * self.taxa_transacao
         btc = (montante_brl - taxa) / price_brl
-        self.logger.info(
-            f"[MOCK] {ts.strftime('%Y-%m-%d %H:%M:%S')} - Comprou {btc:.5f} BTC por R${price_brl:,.2f} (taxa: R${taxa:,.2f})"
-        )
+        if self.verbose and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                f"[MOCK] {ts.strftime('%Y-%m-%d %H:%M:%S')} - Comprou {btc:.5f} BTC por R${price_brl:,.2f} (taxa: R${taxa:,.2f})"
+            )
         return btc, taxa
 
     def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:
@@ -55,33 +99,242 @@ class MockExchange(ExchangeInterface):
             return 0.0, 0.0
         valor = btc_total * price_brl
         taxa = valor * self.taxa_transacao
-        self.logger.info(
-            f"[MOCK] {ts.strftime('%Y-%m-%d %H:%M:%S')} - Vendeu {btc_total:.5f} BTC por R${price_brl:,.2f} (taxa: R${taxa:,.2f}) Motivo: {reason}"
-        )
+        if self.verbose and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(
+                f"[MOCK] {ts.strftime('%Y-%m-%d %H:%M:%S')} - Vendeu {btc_total:.5f} BTC por R${price_brl:,.2f} (taxa: R${taxa:,.2f}) Motivo: {reason}"
+            )
         return valor, taxa
 
 
+def mock_price_batch(rng: np.random.Generator, last_price: float, size: int) -> np.ndarray:
+    """Próximos ``size`` preços do passeio da MockExchange a partir de ``last_price``."""
+    fatores = 1 + rng.uniform(*MOCK_VARIATION, size=size) / 1000
+    precos = last_price * np.cumprod(fatores)
+    if precos.min() >= 1.0:
+        return precos
+    # Piso de 1.0 reinicia o passeio: só nesse caso raro o lote é refeito passo a passo
+    preco = last_price
+    for i, fator in enumerate(fatores):
+        preco = max(preco * fator, 1.0)
+        precos[i] = preco
+    return precos
+
+
+def _floor_step(value: float, step: float) -> str:
+    """Arredonda para baixo no passo aceito pela exchange (nunca vende/gasta além do saldo)."""
+    casas = max(0, -int(math.floor(math.log10(step))))
+    return f"{math.floor(value / step + 1e-9) * step:.{casas}f}"
+
+
+def _error_code(body: bytes) -> Optional[int]:
+    """Código de erro da Binance no corpo da resposta (``{"code": -2013, ...}``)."""
+    try:
+        return json.loads(body).get("code")
+    except (ValueError, AttributeError):
+        return None
+
+
 class BinanceExchange(ExchangeInterface):
-    """Placeholder para integração futura com Binance (ccxt)."""
+    """Binance spot via REST: ordens a mercado, pool keep-alive, retry e contagem de peso.
+
+    Preços são multiplicados por ``taxa_cambio`` (1.0 para o par em BRL, ``BTCBRL``).
+    Credenciais só são exigidas por ``buy``/``sell``.
+    """
+
+    BASE_URL = "https://api.binance.com"
+    WEIGHT_LIMIT = 6000  # peso por minuto da api/v3
+    WEIGHT_HEADER = "X-MBX-USED-WEIGHT-1M"
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        symbol: str = "BTCBRL",
+        taxa_cambio: float = 1.0,
+        base_url: Optional[str] = None,
+        quantity_step: float = 1e-5,
+        pool: Optional[ConnectionPool] = None,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.symbol = symbol
+        self.taxa_cambio = taxa_cambio
+        self.quantity_step = quantity_step
+        self.base_asset = symbol[:3]
+        self.pool = pool or ConnectionPool(
+            base_url or self.BASE_URL,
+            rate_limiter=RateLimiter(self.WEIGHT_LIMIT, 60.0),
+            used_weight_header=self.WEIGHT_HEADER,
+        )
+
+    def get_current_price(self, symbol: Optional[str] = None) -> float:
+        return self.get_prices([symbol or self.symbol])[0]
+
+    def get_prices(self, symbols: Sequence[str]) -> List[float]:
+        """Cotações de vários pares numa única ida e volta (requisições em pipeline)."""
+        responses = self.pool.pipeline(
+            [Request("GET", "/api/v3/ticker/price", {"symbol": s}, weight=2) for s in symbols]
+        )
+        return [float(r.json()["price"]) * self.taxa_cambio for r in responses]
+
+    def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:
+        if montante_brl <= 0 or price_brl <= 0:
+            return 0.0, 0.0
+        order = self._market_order("BUY", quoteOrderQty=f"{montante_brl / self.taxa_cambio:.2f}")
+        btc = float(order["executedQty"])
+        taxa = 0.0
+        for fill in order.get("fills", []):
+            if fill["commissionAsset"] == self.base_asset:
+                btc -= float(fill["commission"])
+                taxa += float(fill["commission"]) * float(fill["price"]) * self.taxa_cambio
+            else:
+                taxa += float(fill["commission"]) * self.taxa_cambio
+        return btc, taxa
 
-    def get_current_price(self, symbol: str = "BTCUSDT") -> float:  # pragma: no cover - placeholder
-        raise NotImplementedError("Integração com Binance pendente")
+    def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:
+        if btc_total <= 0 or price_brl <= 0:
+            return 0.0, 0.0
+        order = self._market_order("SELL", quantity=_floor_step(btc_total, self.quantity_step))
+        valor = float(order["cummulativeQuoteQty"]) * self.taxa_cambio
+        taxa = sum(float(f["commission"]) for f in order.get("fills", [])) * self.taxa_cambio
+        return valor, taxa
 
-    def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:  # pragma: no cover - placeholder
-        raise NotImplementedError("Integração com Binance pendente")
+    def close(self) -> None:
+        self.pool.close()
 
-    def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:  # pragma: no cover - placeholder
-        raise NotImplementedError("Integração com Binance pendente")
+    def _market_order(self, side: str, **quantidade: str) -> dict:
+        # O pool não repete a ordem às cegas: sem resposta (ou com 5xx), consulta pelo id do
+        # cliente e só reenvia, com o mesmo id e nova assinatura, se a Binance não a conhece
+        client_id = uuid.uuid4().hex
+        params = {"symbol": self.symbol, "side": side, "type": "MARKET", "newClientOrderId": client_id,
+                  "newOrderRespType": "FULL", **quantidade}
+        for tentativa in range(self.pool.max_retries + 1):
+            try:
+                return self.pool.request(self._signed("POST", "/api/v3/order", params)).json()
+            except ExchangeHTTPError as exc:
+                if exc.status < 500:
+                    raise
+                erro: Exception = exc
+            except ConnectionError as exc:
+                erro = exc
+            order = self._query_order(client_id)
+            if order is not None:
+                return order
+        raise ConnectionError(f"Ordem {client_id} não enviada após {tentativa + 1} tentativas: {erro}")
+
+    def _query_order(self, client_id: str) -> Optional[dict]:
+        """A ordem pelo id do cliente, ou None se a Binance não a recebeu."""
+        query = {"symbol": self.symbol, "origClientOrderId": client_id}
+        try:
+            return self.pool.request(self._signed("GET", "/api/v3/order", query, weight=4)).json()
+        except ExchangeHTTPError as exc:
+            if exc.status == 400 and _error_code(exc.body) == -2013:  # ordem não existe
+                return None
+            raise
+
+    def _signed(self, method: str, path: str, params: Dict[str, object], weight: int = 1) -> Request:
+        if not self.api_key or not self.api_secret:
+            raise ValueError("BinanceExchange requer api_key e api_secret para ordens")
+        params = {**params, "recvWindow": 5000, "timestamp": int(time.time() * 1000)}
+        assinatura = hmac.new(self.api_secret.encode(), urlencode(params).encode(), hashlib.sha256).hexdigest()
+        return Request(method, path, {**params, "signature": assinatura}, {"X-MBX-APIKEY": self.api_key}, weight=weight)
 
 
 class CoinbaseExchange(ExchangeInterface):
-    """Placeholder para integração futura com Coinbase."""
+    """Coinbase Exchange via REST: ordem a mercado + consulta até a liquidação.
+
+    Os valores da API estão na moeda de cotação do produto (ex.: USD em ``BTC-USD``)
+    e são convertidos por ``taxa_cambio``.
+    """
+
+    BASE_URL = "https://api.exchange.coinbase.com"
+    REQUESTS_PER_SECOND = 10
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        passphrase: Optional[str] = None,
+        product_id: str = "BTC-USD",
+        taxa_cambio: float = 1.0,
+        base_url: Optional[str] = None,
+        poll_interval: float = 0.2,
+        pool: Optional[ConnectionPool] = None,
+    ):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.passphrase = passphrase
+        self.product_id = product_id
+        self.taxa_cambio = taxa_cambio
+        self.poll_interval = poll_interval
+        self.pool = pool or ConnectionPool(
+            base_url or self.BASE_URL, rate_limiter=RateLimiter(self.REQUESTS_PER_SECOND, 1.0)
+        )
+
+    def get_current_price(self, symbol: Optional[str] = None) -> float:
+        return self.get_prices([symbol or self.product_id])[0]
+
+    def get_prices(self, products: Sequence[str]) -> List[float]:
+        """Cotações de vários produtos numa única ida e volta (requisições em pipeline)."""
+        responses = self.pool.pipeline([Request("GET", f"/products/{p}/ticker") for p in products])
+        return [float(r.json()["price"]) * self.taxa_cambio for r in responses]
+
+    def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:
+        if montante_brl <= 0 or price_brl <= 0:
+            return 0.0, 0.0
+        order = self._market_order("buy", funds=f"{montante_brl / self.taxa_cambio:.2f}")
+        return float(order["filled_size"]), float(order["fill_fees"]) * self.taxa_cambio
+
+    def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:
+        if btc_total <= 0 or price_brl <= 0:
+            return 0.0, 0.0
+        order = self._market_order("sell", size=_floor_step(btc_total, 1e-8))
+        return float(order["executed_value"]) * self.taxa_cambio, float(order["fill_fees"]) * self.taxa_cambio
 
-    def get_current_price(self, symbol: str = "BTCUSDT") -> float:  # pragma: no cover - placeholder
-        raise NotImplementedError("Integração com Coinbase pendente")
+    def close(self) -> None:
+        self.pool.close()
 
-    def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:  # pragma: no cover - placeholder
-        raise NotImplementedError("Integração com Coinbase pendente")
+    def _market_order(self, side: str, **quantidade: str) -> dict:
+        body = {"type": "market", "side": side, "product_id": self.product_id, "client_oid": str(uuid.uuid4()),
+                **quantidade}
+        order_id = None
+        for tentativa in range(self.pool.max_retries + 1):
+            try:
+                order_id = self.pool.request(self._signed("POST", "/orders", body)).json()["id"]
+                break
+            except ExchangeHTTPError as exc:
+                if exc.status < 500:
+                    raise
+                erro: Exception = exc
+            except ConnectionError as exc:
+                erro = exc
+            # Resultado desconhecido: busca a ordem pelo id do cliente; 404 = não chegou, reenvia
+            try:
+                order_id = self.pool.request(self._signed("GET", f"/orders/client:{body['client_oid']}")).json()["id"]
+                break
+            except ExchangeHTTPError as exc:
+                if exc.status != 404:
+                    raise
+        if order_id is None:
+            raise ConnectionError(f"Ordem {body['client_oid']} não enviada após {tentativa + 1} tentativas: {erro}")
+        while True:
+            order = self.pool.request(self._signed("GET", f"/orders/{order_id}")).json()
+            if order.get("settled"):
+                return order
+            time.sleep(self.poll_interval)
 
-    def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:  # pragma: no cover - placeholder
-        raise NotImplementedError("Integração com Coinbase pendente")
+    def _signed(self, method: str, path: str, body: Optional[dict] = None) -> Request:
+        if not (self.api_key and self.api_secret and self.passphrase):
+            raise ValueError("CoinbaseExchange requer api_key, api_secret e passphrase para ordens")
+        payload = json.dumps(body).encode() if body is not None else b""
+        timestamp = str(time.time())
+        mensagem = timestamp.encode() + method.encode() + path.encode() + payload
+        assinatura = base64.b64encode(hmac.new(base64.b64decode(self.api_secret), mensagem, hashlib.sha256).digest())
+        headers = {
+            "CB-ACCESS-KEY": self.api_key,
+            "CB-ACCESS-SIGN": assinatura.decode(),
+            "CB-ACCESS-TIMESTAMP": timestamp,
+            "CB-ACCESS-PASSPHRASE": self.passphrase,
+            "Content-Type": "application/json",
+        }
+        return Request(method, path, headers=headers, body=payload)
@@ -0,0 +1,295 @@
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import math
+import socket
+import statistics
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+from .exchange_interface import BinanceExchange, CoinbaseExchange, MockExchange
+
+
+class ExchangeStandIn:
+    """Servidor HTTP local que imita os endpoints REST usados de Binance e Coinbase.
+
+    Conexões são keep-alive (HTTP/1.1) e aceitam pipelining. Preços seguem o passeio
+    semeado da ``MockExchange``; ordens a mercado executam no último preço com a taxa
+    ``taxa_transacao``. O peso das requisições Binance é contado por janela e volta no
+    cabeçalho ``X-MBX-USED-WEIGHT-1M``; acima de ``weight_limit`` a resposta é 429.
+    ``latency`` atrasa cada requisição no servidor; ``fail_next``/``drop_next`` injetam
+    erros 503 e conexões derrubadas antes de processar, e ``lose_next`` processa a
+    requisição e derruba a conexão sem responder (ordem executada, resposta perdida).
+    Como na Binance, uma ordem com ``newClientOrderId`` já usado é recusada (400, -2010).
+    """
+
+    def __init__(
+        self,
+        taxa_transacao: float = 0.001,
+        start_price: float = 350000.0,
+        seed: int = 0,
+        latency: float = 0.0,
+        weight_limit: int = BinanceExchange.WEIGHT_LIMIT,
+        window: float = 60.0,
+    ):
+        self.taxa_transacao = taxa_transacao
+        self.latency = latency
+        self.weight_limit = weight_limit
+        self.window = window
+        self.prices = MockExchange(taxa_transacao, start_price, verbose=False, seed=seed)
+        self.last_price = start_price
+        self.requests = 0
+        self.connections = 0
+        self.fail_next = 0
+        self.drop_next = 0
+        self.lose_next = 0
+        self._weights: Deque[Tuple[float, int]] = deque()
+        self._orders: Dict[str, dict] = {}
+        self._by_client_id: Dict[str, str] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Sobe o servidor numa thread e devolve a URL base."""
+        self._server = ThreadingHTTPServer((host, port), _handler_for(self))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return f"http://{host}:{self._server.server_address[1]}"
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self) -> "ExchangeStandIn":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # --- lógica dos endpoints (chamada com o lock do servidor) ---
+
+    def quote(self) -> float:
+        self.last_price = round(self.prices.get_current_price(), 2)  # cotação com centavos, como a API
+        return self.last_price
+
+    def binance_order(self, params: Dict[str, str]) -> dict:
+        client_id = params.get("newClientOrderId") or f"auto-{next(self._ids)}"
+        preco = self.last_price
+        if params["side"] == "BUY":
+            gasto = float(params["quoteOrderQty"])
+            qtd = gasto / preco
+            fill = {"price": f"{preco}", "qty": f"{qtd}", "commission": f"{qtd * self.taxa_transacao}",
+                    "commissionAsset": params["symbol"][:3]}
+        else:
+            qtd = float(params["quantity"])
+            gasto = qtd * preco
+            fill = {"price": f"{preco}", "qty": f"{qtd}", "commission": f"{gasto * self.taxa_transacao}",
+                    "commissionAsset": params["symbol"][3:]}
+        order = {"symbol": params["symbol"], "orderId": next(self._ids), "clientOrderId": client_id,
+                 "status": "FILLED", "side": params["side"], "type": "MARKET", "executedQty": f"{qtd}",
+                 "cummulativeQuoteQty": f"{gasto}", "fills": [fill]}
+        self._orders[str(order["orderId"])] = order
+        self._by_client_id[client_id] = str(order["orderId"])
+        return order
+
+    def coinbase_order(self, body: dict) -> dict:
+        client_id = body.get("client_oid") or f"auto-{next(self._ids)}"
+        if client_id in self._by_client_id:
+            return self._orders[self._by_client_id[client_id]]
+        preco = self.last_price
+        if body["side"] == "buy":
+            funds = float(body["funds"])
+            fees = funds * self.taxa_transacao
+            size = (funds - fees) / preco
+            valor = funds - fees
+        else:
+            size = float(body["size"])
+            valor = size * preco
+            fees = valor * self.taxa_transacao
+        order = {"id": f"cb-{next(self._ids)}", "client_oid": client_id, "product_id": body["product_id"],
+                 "side": body["side"], "type": "market", "status": "done", "settled": True,
+                 "filled_size": f"{size}", "executed_value": f"{valor}", "fill_fees": f"{fees}"}
+        self._orders[order["id"]] = order
+        self._by_client_id[client_id] = order["id"]
+        return order
+
+    def account_weight(self, weight: int) -> Tuple[int, Optional[float]]:
+        """Soma o peso na janela; devolve (peso usado, segundos até liberar se estourou o limite)."""
+        agora = time.monotonic()
+        while self._weights and self._weights[0][0] + self.window <= agora:
+            self._weights.popleft()
+        usado = sum(w for _, w in self._weights)
+        if usado + weight > self.weight_limit:
+            return usado, self._weights[0][0] + self.window - agora
+        self._weights.append((agora, weight))
+        return usado + weight, None
+
+
+def _handler_for(standin: ExchangeStandIn):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def setup(self) -> None:
+            super().setup()
+            # Cabeçalho e corpo saem em writes separados: sem NODELAY, o ACK atrasado custa ~40 ms
+            self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            with standin._lock:
+                standin.connections += 1
+
+        def log_message(self, format, *args) -> None:  # silencioso
+            pass
+
+        def do_GET(self) -> None:
+            self._route("GET")
+
+        def do_POST(self) -> None:
+            self._route("POST")
+
+        def _route(self, method: str) -> None:
+            url = urlsplit(self.path)
+            params = dict(parse_qsl(url.query))
+            corpo = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+            if standin.latency:
+                time.sleep(standin.latency)
+            with standin._lock:
+                standin.requests += 1
+                if standin.drop_next:
+                    standin.drop_next -= 1
+                    self.close_connection = True
+                    self.connection.shutdown(2)
+                    return
+                if standin.fail_next:
+                    standin.fail_next -= 1
+                    return self._send(503, {"msg": "Serviço indisponível"})
+                if url.path.startswith("/api/"):
+                    return self._binance(method, url.path, params)
+                return self._coinbase(method, url.path, json.loads(corpo) if corpo else {})
+
+        def _binance(self, method: str, path: str, params: Dict[str, str]) -> None:
+            pesos = {("GET", "/api/v3/ticker/price"): 2, ("POST", "/api/v3/order"): 1, ("GET", "/api/v3/order"): 4}
+            if (method, path) not in pesos:
+                return self._send(404, {"code": -1, "msg": "Endpoint desconhecido"})
+            usado, espera = standin.account_weight(pesos[(method, path)])
+            extra = {"X-MBX-USED-WEIGHT-1M": str(usado)}
+            if espera is not None:
+                retry_after = {"Retry-After": str(max(1, math.ceil(espera)))}
+                return self._send(429, {"code": -1003, "msg": "Limite de peso excedido"}, {**extra, **retry_after})
+            if path == "/api/v3/ticker/price":
+                return self._send(200, {"symbol": params.get("symbol"), "price": f"{standin.quote():.2f}"}, extra)
+            if not self.headers.get("X-MBX-APIKEY") or "signature" not in params:
+                return self._send(401, {"code": -2014, "msg": "Chave ou assinatura ausente"}, extra)
+            if method == "POST":
+                if params.get("newClientOrderId") in standin._by_client_id:
+                    return self._send(400, {"code": -2010, "msg": "Duplicate order sent."}, extra)
+                return self._send(200, standin.binance_order(params), extra)
+            order_id = standin._by_client_id.get(params.get("origClientOrderId", ""))
+            if order_id is None:
+                return self._send(400, {"code": -2013, "msg": "Ordem não existe"}, extra)
+            return self._send(200, standin._orders[order_id], extra)
+
+        def _coinbase(self, method: str, path: str, body: dict) -> None:
+            partes = path.strip("/").split("/")
+            if method == "GET" and len(partes) == 3 and partes[0] == "products" and partes[2] == "ticker":
+                return self._send(200, {"price": f"{standin.quote():.2f}"})
+            if partes[0] != "orders":
+                return self._send(404, {"message": "NotFound"})
+            if not self.headers.get("CB-ACCESS-SIGN"):
+                return self._send(401, {"message": "invalid signature"})
+            if method == "POST" and len(partes) == 1:
+                return self._send(200, standin.coinbase_order(body))
+            if method == "GET" and len(partes) == 2:
+                chave = partes[1]
+                if chave.startswith("client:"):
+                    chave = standin._by_client_id.get(chave[len("client:"):], "")
+                if chave in standin._orders:
+                    return self._send(200, standin._orders[chave])
+            return self._send(404, {"message": "NotFound"})
+
+        def _send(self, status: int, body: dict, headers: Optional[Dict[str, str]] = None) -> None:
+            if standin.lose_next:
+                standin.lose_next -= 1
+                self.close_connection = True
+                self.connection.shutdown(2)
+                return
+            dados = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(dados)))
+            for nome, valor in (headers or {}).items():
+                self.send_header(nome, valor)
+            self.end_headers()
+            self.wfile.write(dados)
+
+    return Handler
+
+
+def benchmark_quotes(exchange, total: int, batch: int = 1) -> Dict[str, float]:
+    """Mede cotações por segundo e latência por ida e volta (``batch`` > 1 usa pipelining)."""
+    duracoes = []
+    inicio = time.perf_counter()
+    for _ in range(0, total, batch):
+        t0 = time.perf_counter()
+        exchange.get_prices([exchange_symbol(exchange)] * batch)
+        duracoes.append(time.perf_counter() - t0)
+    decorrido = time.perf_counter() - inicio
+    return {
+        "cotacoes_por_s": total / decorrido if decorrido else float("inf"),
+        "latencia_media_ms": statistics.mean(duracoes) * 1000,
+        "latencia_p95_ms": sorted(duracoes)[int(len(duracoes) * 0.95) - 1] * 1000 if duracoes else 0.0,
+    }
+
+
+def exchange_symbol(exchange) -> str:
+    return exchange.symbol if isinstance(exchange, BinanceExchange) else exchange.product_id
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in local dos endpoints REST de Binance/Coinbase")
+    parser.add_argument("--port", type=int, default=8080, help="Porta do servidor (default: 8080)")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Atraso artificial por requisição")
+    parser.add_argument("--seed", type=int, default=0, help="Semente do passeio de preços")
+    parser.add_argument(
+        "--bench", type=int, default=0, help="Em vez de servir, mede N cotações (sequencial vs. pipeline) e sai"
+    )
+    args = parser.parse_args()
+
+    # No benchmark o limite de peso fica fora do caminho: mede-se só o transporte
+    standin = ExchangeStandIn(
+        seed=args.seed, latency=args.latency_ms / 1000, weight_limit=10**9 if args.bench else BinanceExchange.WEIGHT_LIMIT
+    )
+    base_url = standin.start(port=0 if args.bench else args.port)
+    if not args.bench:
+        print(f"Stand-in ouvindo em {base_url} (Ctrl+C para sair)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            standin.stop()
+        return
+
+    for nome, exchange in (("binance", BinanceExchange(base_url=base_url)), ("coinbase", CoinbaseExchange(base_url=base_url))):
+        exchange.pool.rate_limiter = None
+        for batch in (1, 10):
+            r = benchmark_quotes(exchange, args.bench, batch)
+            print(
+                f"{nome:8s} lote={batch:<3d} {r['cotacoes_por_s']:9.1f} cotações/s  "
+                f"média {r['latencia_media_ms']:.2f} ms  p95 {r['latencia_p95_ms']:.2f} ms"
+            )
+        exchange.close()
+    print(f"Conexões abertas no servidor: {standin.connections}")
+    standin.stop()
+
+
+if __name__ == "__main__":
+    main()
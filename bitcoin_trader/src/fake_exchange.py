@@ -0,0 +1,187 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from .async_exchange import AsyncExchangeInterface, Fill
+from .exchange_interface import MockExchange
+
+
+class FakeExchangeServer:
+    """Exchange falsa em processo (TCP local, uma mensagem JSON por linha).
+
+    Preços seguem o passeio semeado da ``MockExchange`` e as ordens são executadas ao
+    preço enviado, com a mesma taxa; ``latency`` atrasa cada resposta e ``fill_delay``
+    a confirmação das ordens. Requisições de uma conexão são atendidas em paralelo.
+    """
+
+    def __init__(
+        self,
+        taxa_transacao: float = 0.002,
+        start_price: float = 654139.18,
+        seed: int = 0,
+        latency: float = 0.0,
+        fill_delay: float = 0.0,
+    ):
+        self.market = MockExchange(taxa_transacao=taxa_transacao, start_price=start_price, verbose=False, seed=seed)
+        self.latency = latency
+        self.fill_delay = fill_delay
+        self.requests = 0
+        self._orders: Dict[str, asyncio.Future] = {}
+        self._order_ids = itertools.count(1)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> Tuple[str, int]:
+        self._server = await asyncio.start_server(self._handle_connection, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            # Fecha as conexões abertas para que cada handler termine por EOF, sem cancelamento
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        pending = set()
+        self._connections[asyncio.current_task()] = writer
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.ensure_future(self._respond(json.loads(line), writer))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        finally:
+            for task in pending:
+                task.cancel()
+            writer.close()
+            self._connections.pop(asyncio.current_task(), None)
+
+    async def _respond(self, request: dict, writer: asyncio.StreamWriter) -> None:
+        self.requests += 1
+        try:
+            body = await self._dispatch(request)
+        except (KeyError, ValueError) as exc:
+            body = {"error": str(exc)}
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(json.dumps({"id": request.get("id"), **body}).encode() + b"\n")
+        await writer.drain()
+
+    async def _dispatch(self, request: dict) -> dict:
+        op = request.get("op")
+        if op == "price":
+            # A cotação é sorteada na chegada: a ordem das requisições define a sequência
+            return {"price": self.market.get_current_price()}
+        if op == "order":
+            order_id = f"o{next(self._order_ids)}"
+            self._orders[order_id] = asyncio.ensure_future(
+                self._execute(request["side"], float(request["quantidade"]), float(request["price"]))
+            )
+            return {"order_id": order_id}
+        if op == "fill":
+            future = self._orders.pop(request["order_id"], None)
+            if future is None:
+                raise ValueError(f"Ordem desconhecida: {request['order_id']}")
+            quantidade, taxa = await future
+            return {"order_id": request["order_id"], "quantidade": quantidade, "taxa": taxa}
+        raise ValueError(f"Operação desconhecida: {op}")
+
+    async def _execute(self, side: str, quantidade: float, price: float) -> Tuple[float, float]:
+        if self.fill_delay:
+            await asyncio.sleep(self.fill_delay)
+        agora = datetime.now()
+        if side == "buy":
+            return self.market.buy(quantidade, price, agora)
+        if side == "sell":
+            return self.market.sell(quantidade, price, agora, "ordem")
+        raise ValueError(f"Lado desconhecido: {side}")
+
+
+class FakeExchangeClient(AsyncExchangeInterface):
+    """Cliente da ``FakeExchangeServer``: uma conexão, várias requisições em voo (por id)."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count(1)
+        self._waiting: Dict[int, asyncio.Future] = {}
+        self._receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def connect(cls, host: str, port: int) -> "FakeExchangeClient":
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def get_current_price(self, symbol: str = "BTCUSDT") -> float:
+        return float((await self._request({"op": "price", "symbol": symbol}))["price"])
+
+    async def place_order(self, side: str, quantidade: float, price_brl: float, ts: datetime) -> str:
+        return (await self._request({"op": "order", "side": side, "quantidade": quantidade, "price": price_brl}))[
+            "order_id"
+        ]
+
+    async def wait_fill(self, order_id: str) -> Fill:
+        body = await self._request({"op": "fill", "order_id": order_id})
+        return Fill(order_id, float(body["quantidade"]), float(body["taxa"]))
+
+    async def close(self) -> None:
+        self._writer.close()
+        self._receiver.cancel()
+        await asyncio.gather(self._receiver, return_exceptions=True)
+        for future in self._waiting.values():
+            future.cancel()
+        self._waiting.clear()
+
+    async def _request(self, body: dict) -> dict:
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self._writer.write(json.dumps({"id": request_id, **body}).encode() + b"\n")
+        await self._writer.drain()
+        response = await future
+        if "error" in response:
+            raise ValueError(response["error"])
+        return response
+
+    async def _receive(self) -> None:
+        while True:
+            line = await self._reader.readline()
+            if not line:
+                break
+            response = json.loads(line)
+            future = self._waiting.pop(response.get("id"), None)
+            if future is not None and not future.done():
+                future.set_result(response)
+        for future in self._waiting.values():
+            future.set_exception(ConnectionError("Conexão com a exchange falsa encerrada"))
+        self._waiting.clear()
+
+
+@asynccontextmanager
+async def fake_exchange_session(
+    taxa_transacao: float = 0.002,
+    start_price: float = 654139.18,
+    seed: int = 0,
+    latency: float = 0.0,
+    fill_delay: float = 0.0,
+) -> AsyncIterator[FakeExchangeClient]:
+    """Sobe o servidor falso e entrega um cliente conectado; fecha ambos na saída."""
+    server = FakeExchangeServer(taxa_transacao, start_price, seed, latency, fill_delay)
+    host, port = await server.start()
+    client = await FakeExchangeClient.connect(host, port)
+    try:
+        yield client
+    finally:
+        await client.close()
+        await server.close()
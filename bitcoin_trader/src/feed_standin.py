@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from .price_feed import OP_CLOSE, OP_TEXT, ws_accept_key, ws_read_frame, ws_write_frame
+from .utils import load_market_arrays
+
+
+class ReplayFeedServer:
+    """Servidor WebSocket local que reenvia uma série de preços como trades da Binance.
+
+    Cada conexão recebe a série inteira desde o início (``rate`` ticks por segundo;
+    0 envia o mais rápido possível) e um frame de close no fim. Os preços saem como
+    estão (USD no CSV): a conversão cambial fica com o cliente, como num feed real.
+    """
+
+    def __init__(
+        self,
+        prices: np.ndarray,
+        timestamps_ns: Optional[np.ndarray] = None,
+        rate: float = 0.0,
+        symbol: str = "BTCBRL",
+    ):
+        self.prices = np.asarray(prices, dtype=np.float64)
+        self.timestamps_ns = timestamps_ns
+        self.rate = rate
+        self.symbol = symbol
+        self.connections = 0
+        self._writers = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_csv(cls, csv_file: Path, rate: float = 0.0, use_cache: bool = True) -> "ReplayFeedServer":
+        market = load_market_arrays(csv_file, 1.0, use_cache=use_cache)
+        return cls(market.prices, market.timestamps_ns, rate)
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Sobe o servidor numa thread e devolve a URL ``ws://``."""
+        pronto = threading.Event()
+        endereco = []
+
+        def _serve() -> None:
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, host, port))
+            endereco.append(self._server.sockets[0].getsockname()[1])
+            pronto.set()
+            self._loop.run_forever()
+            self._server.close()
+            self._loop.run_until_complete(self._server.wait_closed())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=_serve, name="feed-standin", daemon=True)
+        self._thread.start()
+        pronto.wait()
+        return f"ws://{host}:{endereco[0]}/ws/{self.symbol.lower()}@trade"
+
+    def stop(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._shutdown)
+            self._thread.join()
+            self._loop = None
+
+    def _shutdown(self) -> None:
+        for writer in self._writers:  # encerra replays em andamento antes de parar o loop
+            writer.close()
+        self._loop.stop()
+
+    def __enter__(self) -> "ReplayFeedServer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self._writers.add(writer)
+        try:
+            pedido = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+            headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in pedido[1:] if l)}
+            key = headers.get("sec-websocket-key")
+            if headers.get("upgrade", "").lower() != "websocket" or not key:
+                writer.write(b"HTTP/1.1 400 Bad Request\r\nContent-Length: 0\r\n\r\n")
+                return
+            writer.write(
+                (
+                    "HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                    f"Sec-WebSocket-Accept: {ws_accept_key(key)}\r\n\r\n"
+                ).encode()
+            )
+            self.connections += 1
+            await self._replay(writer)
+            ws_write_frame(writer, OP_CLOSE, (1000).to_bytes(2, "big"), masked=False)
+            await writer.drain()
+            # Espera o close do cliente (ignorando outros frames) antes de fechar o socket
+            while (await ws_read_frame(reader))[1] != OP_CLOSE:
+                pass
+        except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
+
+    async def _replay(self, writer: asyncio.StreamWriter) -> None:
+        intervalo = 1.0 / self.rate if self.rate > 0 else 0.0
+        inicio = time.monotonic()
+        for i, preco in enumerate(self.prices.tolist()):
+            if writer.is_closing():  # cliente desconectou no meio do replay
+                return
+            ts_ms = int(self.timestamps_ns[i]) // 1_000_000 if self.timestamps_ns is not None else int(time.time() * 1000)
+            mensagem = {"e": "trade", "E": ts_ms, "s": self.symbol, "t": i, "p": f"{preco:.2f}", "q": "0.001", "T": ts_ms}
+            ws_write_frame(writer, OP_TEXT, json.dumps(mensagem).encode(), masked=False)
+            if intervalo:
+                await writer.drain()
+                await asyncio.sleep(max(0.0, inicio + (i + 1) * intervalo - time.monotonic()))
+            elif i % 256 == 255:
+                await writer.drain()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Stand-in local de um feed WebSocket de trades (replay de CSV)")
+    parser.add_argument("--csv-file", type=Path, required=True, help="CSV com a série de preços a reenviar")
+    parser.add_argument("--port", type=int, default=8765, help="Porta do servidor (default: 8765)")
+    parser.add_argument("--rate", type=float, default=10.0, help="Ticks por segundo; 0 = sem pausa (default: 10)")
+    args = parser.parse_args()
+
+    server = ReplayFeedServer.from_csv(args.csv_file, args.rate)
+    url = server.start(port=args.port)
+    print(f"Feed de replay em {url} (Ctrl+C para sair)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .models import BotState
+from .utils import detail_from_dict
+
+POINT_DTYPE = np.dtype([("idx", "<i8"), ("preco", "<f8")])
+# Séries do BotState com retenção limitada e o tipo de cada registro no arquivo
+SERIES = {
+    "lucros": np.dtype("<f8"),
+    "precos_venda": np.dtype("<f8"),
+    "variacoes_compra": np.dtype("<f8"),
+    "variacoes_venda": np.dtype("<f8"),
+    "saldo_history": np.dtype("<f8"),
+    "buy_points": POINT_DTYPE,
+    "sell_points": POINT_DTYPE,
+}
+DETAILS = "operation_details"
+CHUNK = 65536
+
+
+class HistoryArchive:
+    """Arquivo em disco, append-only, das séries do histórico (um arquivo tipado por série).
+
+    Séries numéricas são registros binários de tamanho fixo, lidos por faixa via memmap;
+    ``operation_details`` é JSONL com um índice de offsets. ``truncate`` volta cada
+    série a uma contagem conhecida (recuperação após queda).
+    """
+
+    def __init__(self, directory: Path, fsync: bool = True):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.fsync = fsync
+
+    def count(self, name: str) -> int:
+        path = self._path(name)
+        itemsize = 8 if name == DETAILS else SERIES[name].itemsize
+        return path.stat().st_size // itemsize if path.exists() else 0
+
+    def append(self, name: str, values) -> None:
+        if name == DETAILS:
+            self._append_details(values)
+        else:
+            self._write(self._path(name), as_array(name, values).tobytes())
+
+    def read(self, name: str, start: int = 0, stop: Optional[int] = None) -> np.ndarray:
+        """Registros ``start:stop`` de uma série numérica (memmap; não carrega o arquivo inteiro)."""
+        stop = self.count(name) if stop is None else stop
+        if start >= stop:
+            return np.empty(0, dtype=SERIES[name])
+        dtype = SERIES[name]
+        return np.memmap(self._path(name), dtype=dtype, mode="r", offset=start * dtype.itemsize, shape=(stop - start,))
+
+    def read_details(self, start: int = 0, stop: Optional[int] = None) -> List[dict]:
+        offsets = self._offsets()
+        stop = len(offsets) if stop is None else min(stop, len(offsets))
+        if start >= stop:
+            return []
+        inicio = int(offsets[start - 1]) if start else 0
+        with open(self.directory / f"{DETAILS}.jsonl", "rb") as fh:
+            fh.seek(inicio)
+            bruto = fh.read(int(offsets[stop - 1]) - inicio)
+        return [detail_from_dict(json.loads(linha)) for linha in bruto.splitlines()]
+
+    def truncate(self, name: str, count: int) -> None:
+        if self.count(name) <= count:
+            return
+        if name == DETAILS:
+            fim = int(self._offsets()[count - 1]) if count else 0
+            os.truncate(self.directory / f"{DETAILS}.jsonl", fim)
+            os.truncate(self._path(name), count * 8)
+        else:
+            os.truncate(self._path(name), count * SERIES[name].itemsize)
+
+    def _offsets(self) -> np.ndarray:
+        path = self._path(DETAILS)
+        return np.fromfile(path, dtype="<i8") if path.exists() else np.empty(0, dtype="<i8")
+
+    def _append_details(self, details: List[dict]) -> None:
+        linhas = [json.dumps(d, default=str, separators=(",", ":")).encode() + b"\n" for d in details]
+        jsonl = self.directory / f"{DETAILS}.jsonl"
+        inicio = jsonl.stat().st_size if jsonl.exists() else 0
+        offsets = inicio + np.cumsum([len(linha) for linha in linhas], dtype=np.int64)
+        # Dados antes do índice: o índice nunca aponta para uma linha que não foi gravada
+        self._write(jsonl, b"".join(linhas))
+        self._write(self._path(DETAILS), offsets.astype("<i8").tobytes())
+
+    def _write(self, path: Path, dados: bytes) -> None:
+        with open(path, "ab") as fh:
+            fh.write(dados)
+            fh.flush()
+            if self.fsync:
+                os.fsync(fh.fileno())
+
+    def _path(self, name: str) -> Path:
+        if name == DETAILS:
+            return self.directory / f"{DETAILS}.idx"
+        if name not in SERIES:
+            raise ValueError(f"Série desconhecida: {name}")
+        return self.directory / f"{name}.bin"
+
+
+class BoundedHistory:
+    """Retenção do histórico do bot: os ``keep`` itens mais recentes no estado, tudo no arquivo.
+
+    ``absorb`` (a cada checkpoint) grava no arquivo os itens novos das listas do ``BotState``
+    e, quando uma lista passa de ``2 * keep`` itens, descarta os mais antigos, deixando
+    ``keep``; ``state.archived`` conta os descartados de cada série. Memória e tamanho do
+    estado ficam limitados, e o journal só regrava as listas inteiras a cada ``keep``
+    operações. ``reconcile`` (após carregar o estado) corta do arquivo o que foi gravado
+    depois do último checkpoint. Leituras da série inteira são feitas em blocos
+    (``chunks``/``iter_details``), sem carregar o arquivo.
+    """
+
+    def __init__(self, archive: HistoryArchive, keep: int):
+        if keep <= 0:
+            raise ValueError("keep deve ser positivo")
+        self.archive = archive
+        self.keep = keep
+        self._on_disk: Dict[str, int] = {}
+
+    def reconcile(self, state: BotState) -> None:
+        for name in (*SERIES, DETAILS):
+            descartados = state.archived.get(name, 0)
+            if self.archive.count(name) < descartados:
+                raise ValueError(f"Histórico em disco incompleto para {name} em {self.archive.directory}")
+            self.archive.truncate(name, self.count(name, state))
+            self._on_disk[name] = self.archive.count(name)
+
+    def absorb(self, state: BotState) -> None:
+        for name in (*SERIES, DETAILS):
+            itens = getattr(state, name)
+            descartados = state.archived.get(name, 0)
+            gravados = self._on_disk.get(name, descartados) - descartados
+            if len(itens) > gravados:
+                self.archive.append(name, itens[gravados:])
+                self._on_disk[name] = descartados + len(itens)
+            if len(itens) > 2 * self.keep:
+                excesso = len(itens) - self.keep
+                del itens[:excesso]
+                state.archived[name] = descartados + excesso
+
+    def count(self, name: str, state: BotState) -> int:
+        return state.archived.get(name, 0) + len(getattr(state, name))
+
+    def chunks(self, name: str, state: BotState, size: int = CHUNK) -> Iterator[np.ndarray]:
+        """Série inteira em blocos de até ``size`` itens: a parte descartada vem do arquivo, o resto do estado."""
+        descartados = state.archived.get(name, 0)
+        for inicio in range(0, descartados, size):
+            yield self.archive.read(name, inicio, min(inicio + size, descartados))
+        if getattr(state, name):
+            yield as_array(name, getattr(state, name))
+
+    def series(self, name: str, state: BotState) -> np.ndarray:
+        return np.concatenate([np.asarray(bloco) for bloco in self.chunks(name, state)] or [as_array(name, [])])
+
+    def iter_details(self, state: BotState, size: int = 1024) -> Iterator[dict]:
+        descartados = state.archived.get(DETAILS, 0)
+        for inicio in range(0, descartados, size):
+            yield from self.archive.read_details(inicio, min(inicio + size, descartados))
+        yield from state.operation_details
+
+
+def as_array(name: str, values) -> np.ndarray:
+    """Itens de uma série (lista do ``BotState``) como array com o dtype do arquivo."""
+    if SERIES[name] is not POINT_DTYPE:
+        return np.asarray(values, dtype=SERIES[name])
+    array = np.empty(len(values), dtype=POINT_DTYPE)
+    if len(values):
+        indices, precos = zip(*values)
+        array["idx"], array["preco"] = indices, precos
+    return array
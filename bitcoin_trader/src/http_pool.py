@@ -0,0 +1,319 @@
+from __future__ import annotations
+
+import json
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Callable, Deque, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlencode, urlsplit
+
+# Status que valem nova tentativa (limite de taxa, ban temporário da Binance e erros do servidor)
+RETRY_STATUS = frozenset({418, 429, 500, 502, 503, 504})
+# Recusas antes de executar: as únicas que valem nova tentativa também para ordens (POST)
+REJECTED_STATUS = frozenset({418, 429})
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD"})
+
+
+class ExchangeHTTPError(RuntimeError):
+    """Resposta HTTP de erro que não vale (ou esgotou) novas tentativas."""
+
+    def __init__(self, status: int, body: bytes):
+        super().__init__(f"HTTP {status}: {body[:200].decode('utf-8', 'replace')}")
+        self.status = status
+        self.body = body
+
+
+@dataclass
+class Request:
+    method: str
+    path: str
+    params: Optional[Dict[str, object]] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+    body: bytes = b""
+    weight: int = 1  # custo no limite de taxa da exchange
+
+    def target(self) -> str:
+        return f"{self.path}?{urlencode(self.params)}" if self.params else self.path
+
+
+@dataclass
+class Response:
+    status: int
+    headers: Dict[str, str]  # nomes em minúsculas
+    body: bytes
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class RateLimiter:
+    """Contabiliza o peso das requisições numa janela deslizante e espera quando o limite acabaria.
+
+    ``sync`` ajusta a conta com o uso informado pelo servidor (ex.: ``X-MBX-USED-WEIGHT-1M``),
+    que também inclui requisições de outros clientes da mesma chave.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        if limit <= 0 or window <= 0:
+            raise ValueError("limit e window devem ser positivos")
+        self.limit = limit
+        self.window = window
+        self._clock = clock
+        self._sleep = sleep
+        self._events: Deque[Tuple[float, int]] = deque()
+        self._lock = threading.Lock()
+        self.waited = 0.0
+
+    @property
+    def used(self) -> int:
+        with self._lock:
+            self._expire(self._clock())
+            return sum(weight for _, weight in self._events)
+
+    def acquire(self, weight: int = 1) -> None:
+        weight = min(weight, self.limit)
+        while True:
+            with self._lock:
+                agora = self._clock()
+                self._expire(agora)
+                usado = sum(w for _, w in self._events)
+                if usado + weight <= self.limit:
+                    self._events.append((agora, weight))
+                    return
+                espera = self._events[0][0] + self.window - agora
+            self.waited += espera
+            self._sleep(espera)
+
+    def sync(self, used_by_server: int) -> None:
+        with self._lock:
+            agora = self._clock()
+            self._expire(agora)
+            faltando = used_by_server - sum(w for _, w in self._events)
+            if faltando > 0:
+                self._events.append((agora, faltando))
+
+    def _expire(self, agora: float) -> None:
+        while self._events and self._events[0][0] + self.window <= agora:
+            self._events.popleft()
+
+
+class _Connection:
+    """Conexão HTTP/1.1 persistente; respostas são lidas em ordem (permite pipelining)."""
+
+    def __init__(self, host: str, port: int, use_tls: bool, timeout: float):
+        self.host = host
+        sock = socket.create_connection((host, port), timeout=timeout)
+        if use_tls:
+            sock = ssl.create_default_context().wrap_socket(sock, server_hostname=host)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock = sock
+        self.reader = sock.makefile("rb")
+        self.reusable = True
+
+    def send(self, requests: Sequence[Request]) -> None:
+        self.sock.sendall(b"".join(self._encode(r) for r in requests))
+
+    def read_response(self) -> Response:
+        status_line = self.reader.readline(65537)
+        if not status_line:
+            raise ConnectionError("Conexão encerrada pelo servidor")
+        parts = status_line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise ConnectionError(f"Linha de status inválida: {status_line[:80]!r}")
+        headers: Dict[str, str] = {}
+        while True:
+            line = self.reader.readline(65537)
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            body = self._read_chunked()
+        else:
+            body = self._read_exact(int(headers.get("content-length", "0")))
+        if headers.get("connection", "").lower() == "close" or parts[0] == b"HTTP/1.0":
+            self.reusable = False
+        return Response(int(parts[1]), headers, body)
+
+    def close(self) -> None:
+        self.reusable = False
+        try:
+            self.reader.close()
+            self.sock.close()
+        except OSError:
+            pass
+
+    def _encode(self, request: Request) -> bytes:
+        headers = {"Host": self.host, "Connection": "keep-alive", "Content-Length": str(len(request.body))}
+        headers.update(request.headers)
+        head = f"{request.method} {request.target()} HTTP/1.1\r\n"
+        head += "".join(f"{k}: {v}\r\n" for k, v in headers.items())
+        return head.encode("latin-1") + b"\r\n" + request.body
+
+    def _read_exact(self, size: int) -> bytes:
+        data = self.reader.read(size)
+        if len(data) != size:
+            raise ConnectionError("Resposta truncada")
+        return data
+
+    def _read_chunked(self) -> bytes:
+        chunks = []
+        while True:
+            size = int(self.reader.readline(65537).split(b";")[0], 16)
+            if size == 0:
+                while self.reader.readline(65537) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(self._read_exact(size))
+            self.reader.readline(65537)
+
+
+class ConnectionPool:
+    """Pool de conexões keep-alive para uma origem, com retry/backoff e limite de taxa.
+
+    ``pipeline`` envia um lote de requisições numa única conexão antes de ler as
+    respostas; só deve receber requisições idempotentes (GET). Requisições não
+    idempotentes (ordens) só são repetidas após 418/429; sem resposta ou com 5xx o
+    resultado é desconhecido e o erro sobe para quem chamou consultar antes de reenviar.
+    """
+
+    def __init__(
+        self,
+        base_url: str,
+        size: int = 4,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 0.25,
+        max_backoff: float = 8.0,
+        rate_limiter: Optional[RateLimiter] = None,
+        used_weight_header: Optional[str] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"URL base inválida: {base_url}")
+        self.host = parts.hostname
+        self.use_tls = parts.scheme == "https"
+        self.port = parts.port or (443 if self.use_tls else 80)
+        self.size = size
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.rate_limiter = rate_limiter
+        self.used_weight_header = used_weight_header.lower() if used_weight_header else None
+        self._sleep = sleep
+        self._idle: List[_Connection] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(size)
+        self.stats = {"requests": 0, "retries": 0, "connections": 0}
+
+    def request(self, request: Request) -> Response:
+        return self._with_retries([request])[0]
+
+    def pipeline(self, requests: Sequence[Request]) -> List[Response]:
+        if any(r.method != "GET" for r in requests):
+            raise ValueError("Pipelining só aceita requisições GET")
+        return self._with_retries(list(requests))
+
+    def close(self) -> None:
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+    def __enter__(self) -> "ConnectionPool":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _with_retries(self, pending: List[Request]) -> List[Response]:
+        """Respostas em ordem; falhas reenviam só as requisições ainda sem resposta válida."""
+        done: List[Response] = []
+        attempt = 0
+        idempotente = all(r.method in IDEMPOTENT_METHODS for r in pending)
+        while pending:
+            if self.rate_limiter is not None:
+                self.rate_limiter.acquire(sum(r.weight for r in pending))
+            received, erro = self._send_batch(pending)
+            for response in received:
+                if response.status in RETRY_STATUS and (idempotente or response.status in REJECTED_STATUS):
+                    erro = response
+                    break
+                if response.status >= 400:
+                    raise ExchangeHTTPError(response.status, response.body)
+                done.append(response)
+                pending = pending[1:]
+            if not pending:
+                break
+            if not idempotente and not isinstance(erro, Response):
+                # A requisição pode ter sido executada: reenviar às cegas duplicaria a ordem
+                raise ConnectionError(f"Sem resposta para {pending[0].method} {pending[0].path}: {erro or 'conexão fechada'}")
+            if erro is None:  # servidor fechou a conexão keep-alive: reenvia o resto sem esperar
+                continue
+            if attempt >= self.max_retries:
+                if isinstance(erro, Response):
+                    raise ExchangeHTTPError(erro.status, erro.body)
+                raise ConnectionError(f"Falha após {attempt + 1} tentativas: {erro}")
+            self.stats["retries"] += 1
+            self._sleep(self._delay(attempt, erro))
+            attempt += 1
+        return done
+
+    def _send_batch(self, requests: List[Request]):
+        received: List[Response] = []
+        self._slots.acquire()
+        conn = None
+        try:
+            conn = self._checkout()
+            conn.send(requests)
+            for _ in requests:
+                response = conn.read_response()
+                self.stats["requests"] += 1
+                self._account(response)
+                received.append(response)
+                if not conn.reusable:
+                    break
+            return received, None
+        except OSError as exc:  # inclui ConnectionError e timeout
+            if conn is not None:
+                conn.close()
+            return received, exc
+        finally:
+            if conn is not None and conn.reusable:
+                with self._lock:
+                    self._idle.append(conn)
+            elif conn is not None:
+                conn.close()
+            self._slots.release()
+
+    def _checkout(self) -> _Connection:
+        with self._lock:
+            if self._idle:
+                return self._idle.pop()
+        self.stats["connections"] += 1
+        return _Connection(self.host, self.port, self.use_tls, self.timeout)
+
+    def _account(self, response: Response) -> None:
+        if self.rate_limiter is None or not self.used_weight_header:
+            return
+        used = response.headers.get(self.used_weight_header)
+        if used and used.isdigit():
+            self.rate_limiter.sync(int(used))
+
+    def _delay(self, attempt: int, erro) -> float:
+        if isinstance(erro, Response):
+            retry_after = erro.headers.get("retry-after", "")
+            if retry_after.replace(".", "", 1).isdigit():
+                return min(float(retry_after), self.max_backoff)
+        return min(self.backoff * 2**attempt, self.max_backoff)
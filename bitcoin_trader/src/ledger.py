@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .models import BotState
+from .utils import _parse_dt
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS operations (
+    operation_id INTEGER PRIMARY KEY,
+    start_time TEXT NOT NULL,
+    end_time TEXT NOT NULL,
+    motivo_venda TEXT NOT NULL,
+    lucro REAL NOT NULL,
+    preco_compra REAL NOT NULL,
+    preco_venda REAL NOT NULL,
+    btc_comprado REAL NOT NULL,
+    custo_total REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS fills (
+    id INTEGER PRIMARY KEY,
+    operation_id INTEGER NOT NULL,
+    lado TEXT NOT NULL,
+    time TEXT NOT NULL,
+    preco REAL NOT NULL,
+    btc REAL NOT NULL,
+    valor REAL NOT NULL,
+    taxa REAL NOT NULL,
+    motivo TEXT,
+    tranche INTEGER
+);
+CREATE INDEX IF NOT EXISTS operations_end_time ON operations (end_time);
+CREATE INDEX IF NOT EXISTS operations_motivo ON operations (motivo_venda, end_time);
+CREATE INDEX IF NOT EXISTS fills_time ON fills (time);
+CREATE INDEX IF NOT EXISTS fills_motivo ON fills (motivo, time);
+CREATE INDEX IF NOT EXISTS fills_operation ON fills (operation_id);
+"""
+_DETAIL_COLUMNS = (
+    "operation_id",
+    "start_time",
+    "end_time",
+    "motivo_venda",
+    "lucro",
+    "preco_compra",
+    "preco_venda",
+    "btc_comprado",
+    "custo_total",
+)
+
+
+class TradeLedger:
+    """Livro de operações em SQLite (WAL): cada compra de tranche, venda e resumo de operação.
+
+    O motor chama ``fill`` a cada execução e ``end_operation`` ao fim da operação; as
+    linhas da operação entram numa única transação. Horários ficam em ISO 8601 (ordenáveis
+    como texto), com índices por horário e por motivo, e as consultas percorrem o cursor
+    sem carregar o histórico. As linhas acompanham o estado persistido: ``reconcile``
+    (após carregar o estado) apaga operações que ele ainda não concluiu, e uma operação
+    executada de novo ao retomar um checkpoint substitui a anterior.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        # check_same_thread=False: no modo real assíncrono o motor roda numa thread do executor
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")  # com WAL, durável a cada checkpoint do SQLite
+        self.conn.executescript(_SCHEMA)
+        self._fills: List[tuple] = []
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "TradeLedger":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def reconcile(self, state: BotState) -> None:
+        """Descarta operações a partir de ``state.current_operation`` (de uma execução interrompida ou de outro estado)."""
+        self._fills.clear()
+        with self.conn:
+            self.conn.execute("DELETE FROM fills WHERE operation_id >= ?", (state.current_operation,))
+            self.conn.execute("DELETE FROM operations WHERE operation_id >= ?", (state.current_operation,))
+
+    def fill(
+        self,
+        lado: str,
+        ts: datetime,
+        preco: float,
+        btc: float,
+        valor: float,
+        taxa: float,
+        motivo: Optional[str] = None,
+        tranche: Optional[int] = None,
+    ) -> None:
+        self._fills.append((lado, ts.isoformat(), float(preco), float(btc), float(valor), float(taxa), motivo, tranche))
+
+    def end_operation(self, op: int, detail: Optional[dict]) -> None:
+        """Grava as execuções da operação ``op`` e o resumo (``detail``) numa transação só."""
+        fills, self._fills = self._fills, []
+        if detail is None and not fills:
+            return
+        with self.conn:
+            self.conn.execute("DELETE FROM fills WHERE operation_id = ?", (op,))
+            self.conn.executemany(
+                "INSERT INTO fills (operation_id, lado, time, preco, btc, valor, taxa, motivo, tranche) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(op, *f) for f in fills],
+            )
+            if detail is not None:
+                self.conn.execute(
+                    f"INSERT OR REPLACE INTO operations ({', '.join(_DETAIL_COLUMNS)}) VALUES ({', '.join('?' * len(_DETAIL_COLUMNS))})",
+                    _detail_row(detail),
+                )
+
+    def operations(
+        self,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        motivo: Optional[str] = None,
+        before_operation: Optional[int] = None,
+    ) -> Iterator[dict]:
+        """Resumos das operações com ``end_time`` em [start, end], em ordem; mesmo formato de ``operation_details``.
+
+        ``before_operation`` limita às operações anteriores a ela (as concluídas num estado salvo).
+        """
+        where, args = _filters("end_time", start, end, "motivo_venda", motivo, before_operation)
+        cursor = self.conn.execute(f"SELECT {', '.join(_DETAIL_COLUMNS)} FROM operations{where} ORDER BY operation_id", args)
+        for row in cursor:
+            detail = dict(zip(_DETAIL_COLUMNS, row))
+            detail["start_time"], detail["end_time"] = _parse_dt(detail["start_time"]), _parse_dt(detail["end_time"])
+            yield detail
+
+    def fills(self, start: Optional[datetime] = None, end: Optional[datetime] = None, motivo: Optional[str] = None) -> Iterator[tuple]:
+        """(operation_id, lado, time, preco, btc, valor, taxa, motivo, tranche) em [start, end]."""
+        where, args = _filters("time", start, end, "motivo", motivo)
+        return self.conn.execute(
+            f"SELECT operation_id, lado, time, preco, btc, valor, taxa, motivo, tranche FROM fills{where} ORDER BY id", args
+        )
+
+    def summary_by_reason(
+        self, start: Optional[datetime] = None, end: Optional[datetime] = None, before_operation: Optional[int] = None
+    ) -> List[Tuple[str, int, float]]:
+        """(motivo, operações, lucro somado) por motivo de venda."""
+        where, args = _filters("end_time", start, end, before_operation=before_operation)
+        return self.conn.execute(
+            f"SELECT motivo_venda, COUNT(*), SUM(lucro) FROM operations{where} GROUP BY motivo_venda ORDER BY COUNT(*) DESC",
+            args,
+        ).fetchall()
+
+    def count(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM operations").fetchone()[0]
+
+
+def _detail_row(detail: dict) -> tuple:
+    return (
+        int(detail["operation_id"]),
+        detail["start_time"].isoformat(),
+        detail["end_time"].isoformat(),
+        detail["motivo_venda"],
+        *(float(detail[c]) for c in _DETAIL_COLUMNS[4:]),
+    )
+
+
+def _filters(
+    coluna_tempo: str,
+    start,
+    end,
+    coluna_motivo: Optional[str] = None,
+    motivo: Optional[str] = None,
+    before_operation: Optional[int] = None,
+):
+    condicoes, args = [], []
+    if before_operation is not None:
+        condicoes.append("operation_id < ?")
+        args.append(before_operation)
+    if start is not None:
+        condicoes.append(f"{coluna_tempo} >= ?")
+        args.append(start.isoformat())
+    if end is not None:
+        condicoes.append(f"{coluna_tempo} <= ?")
+        args.append(end.isoformat())
+    if motivo is not None:
+        condicoes.append(f"{coluna_motivo} = ?")
+        args.append(motivo)
+    return (" WHERE " + " AND ".join(condicoes) if condicoes else ""), args
@@ -1,15 +1,44 @@
 from __future__ import annotations
 
+import os
+import signal
 import sys
+import threading
+from contextlib import ExitStack
 from pathlib import Path
 
+import numpy as np
+
+from .array_engine import ArrayTradingEngine
 from .config import parse_args
+from .daemon import BarClock
 from .data_fetcher import DataFetcher
 from .exchange_interface import BinanceExchange, CoinbaseExchange, MockExchange
-from .reporter import create_graph, generate_report, graph_due_real, setup_logging
+from .fake_exchange import fake_exchange_session
+from .feed_standin import ReplayFeedServer
+from .history import BoundedHistory, HistoryArchive
+from .ledger import TradeLedger
+from .report_worker import ReportWorker
+from .reporter import create_graph, graph_due_real, setup_logging, write_report
+from .montecarlo import (
+    bootstrap_paths,
+    format_montecarlo_table,
+    gbm_estimate,
+    gbm_paths,
+    random_walk_paths,
+    run_montecarlo,
+    simple_returns,
+    write_montecarlo_results,
+)
+from .order_book import BookModel, OrderBookExchange
+from .price_feed import FeedExchange, StreamingPriceFeed
+from .resample import load_resampled_market, parse_timeframe
 from .simulator import Simulator
+from .sweep import build_param_grid, format_sweep_table, parse_grid_spec, run_sweep, write_sweep_results
+from .tick_store import TickRing
 from .trading_engine import TradingEngine
-from .utils import ensure_dirs, validate_tranches
+from .utils import ensure_dirs, load_market_arrays, validate_tranches
+from .walkforward import format_walkforward_table, plan_windows, run_walkforward, write_walkforward_results
 
 
 def main() -> None:
@@ -36,16 +65,65 @@ def main() -> None:
             sys.exit(1)
         return
 
-    exchange = _resolve_exchange(app_cfg.exchange, app_cfg.trading.taxa_transacao, logger)
-    engine = TradingEngine(app_cfg.trading, exchange, logger)
-    simulator = Simulator(engine, paths, logger)
+    if app_cfg.mode == "sweep":
+        _run_sweep_mode(app_cfg, paths, logger)
+        return
+
+    if app_cfg.mode == "walkforward":
+        _run_walkforward_mode(app_cfg, paths, logger)
+        return
+
+    if app_cfg.mode == "montecarlo":
+        _run_montecarlo_mode(app_cfg, paths, logger)
+        return
+
+    if app_cfg.graph_dpi <= 0 or min(app_cfg.graph_size) <= 0:
+        logger.error("--graph-dpi e --graph-size devem ser positivos")
+        sys.exit(1)
+
+    book = _build_book(app_cfg, logger)
+    exchange = _resolve_exchange(
+        app_cfg.exchange,
+        app_cfg.trading.taxa_transacao,
+        logger,
+        verbose=app_cfg.log_mode == "full",
+        seed=app_cfg.seed,
+        base_url=app_cfg.base_url,
+        taxa_cambio=app_cfg.trading.taxa_cambio,
+        book=book,
+    )
+    ledger = TradeLedger(paths.outputs_dir / "trades.db") if app_cfg.ledger else None
+    engine = _resolve_engine(app_cfg.engine)(app_cfg.trading, exchange, logger, log_mode=app_cfg.log_mode, ledger=ledger)
+    history = _open_history(app_cfg, paths, logger) if app_cfg.mode == "real" else None
+    simulator = Simulator(engine, paths, logger, history=history)
 
     if app_cfg.mode == "test":
         if not app_cfg.csv_file:
             logger.error("Modo test requer --csv-file")
             sys.exit(1)
-        state, market, start_time = simulator.run_test(app_cfg.csv_file, app_cfg.trading)
-        report = generate_report(
+        if app_cfg.chunk_rows is not None and app_cfg.chunk_rows <= 0:
+            logger.error("--chunk-rows deve ser positivo")
+            sys.exit(1)
+        if app_cfg.chunk_rows and app_cfg.timeframe:
+            logger.error("--timeframe não pode ser combinado com --chunk-rows")
+            sys.exit(1)
+        _validate_timeframe(app_cfg, logger)
+        if app_cfg.checkpoint_ops < 0:
+            logger.error("--checkpoint-ops não pode ser negativo")
+            sys.exit(1)
+        state, market, start_time = simulator.run_test(
+            app_cfg.csv_file,
+            app_cfg.trading,
+            use_cache=app_cfg.use_cache,
+            arrays=app_cfg.engine == "numpy",
+            chunk_rows=app_cfg.chunk_rows,
+            timeframe=app_cfg.timeframe,
+            resume=app_cfg.resume,
+            checkpoint_ops=app_cfg.checkpoint_ops,
+        )
+        _write_trade_events(engine, paths, logger)
+        _log_slippage(exchange, logger)
+        write_report(
             state,
             app_cfg.trading,
             app_cfg.trading.montante,
@@ -53,38 +131,274 @@ def main() -> None:
             state.last_operation_time,
             paths.outputs_dir,
             historical_used=True,
+            ledger=ledger,
+            echo=sys.stdout,
         )
-        print(report)
         if app_cfg.output_graph:
-            graph_path = create_graph(state, market, paths.outputs_dir)
+            # Em stream a série já foi descartada; o gráfico usa só os preços das operações
+            graph_market = None if app_cfg.chunk_rows else market
+            graph_path = create_graph(
+                state, graph_market, paths.outputs_dir, dpi=app_cfg.graph_dpi, size=app_cfg.graph_size
+            )
             logger.info(f"Gráfico salvo em {graph_path}")
 
     elif app_cfg.mode == "real":
-        state, market, start_time = simulator.run_real(app_cfg.trading)
-        report = generate_report(
-            state,
+        async_session = None
+        if app_cfg.exchange == "fake":
+            async_session = fake_exchange_session(app_cfg.trading.taxa_transacao, seed=app_cfg.seed or 0)
+        # Relatório e gráfico ficam com uma thread própria; o bot só entrega cópias do estado
+        worker = ReportWorker(
             app_cfg.trading,
-            app_cfg.trading.montante,
-            start_time,
-            state.last_operation_time,
             paths.outputs_dir,
-            historical_used=False,
+            logger,
+            history=history,
+            ledger_path=ledger.path if ledger is not None else None,
+            graph_dpi=app_cfg.graph_dpi,
+            graph_size=app_cfg.graph_size,
+        )
+        with worker, ExitStack() as stack:
+            if app_cfg.feed_url or app_cfg.feed_replay:
+                engine.exchange = _open_feed(app_cfg, exchange, stack, logger)
+            try:
+                if app_cfg.daemon:
+                    state, market, start_time = _run_daemon(app_cfg, simulator, async_session, logger, worker)
+                else:
+                    state, market, start_time = simulator.run_real(app_cfg.trading, async_session)
+            except ConnectionError as exc:
+                logger.error(f"Modo real interrompido: {exc}")
+                sys.exit(1)
+            _write_trade_events(engine, paths, logger)
+            _log_slippage(exchange, logger)
+            graph = app_cfg.output_graph and graph_due_real(app_cfg.force_graph)
+            worker.submit(state, start_time, market, graph=graph, echo=sys.stdout)
+            if app_cfg.output_graph and not graph:
+                logger.info("Gráfico não gerado (modo real) - janela diária é 00:00:00. Use --force-graph para forçar.")
+
+    if ledger is not None:
+        ledger.close()
+
+
+def _run_sweep_mode(app_cfg, paths, logger) -> None:
+    grid, combos = _build_grid(app_cfg, logger)
+    market = _load_history_arrays(app_cfg, logger)
+    logger.info(f"Varredura: {len(combos)} combinações sobre {market.length()} preços")
+    results = run_sweep(market, combos, _resolve_engine(app_cfg.engine), app_cfg.workers)
+
+    swept_fields = list(grid)
+    results_path = write_sweep_results(results, swept_fields, paths.outputs_dir / "sweep_results.csv")
+    print(format_sweep_table(results, swept_fields, app_cfg.top))
+    logger.info(f"Ranking da varredura salvo em {results_path}")
+
+
+def _run_walkforward_mode(app_cfg, paths, logger) -> None:
+    grid, combos = _build_grid(app_cfg, logger)
+    market = _load_history_arrays(app_cfg, logger)
+    try:
+        windows = plan_windows(market.length(), app_cfg.train_rows, app_cfg.test_rows, app_cfg.step_rows)
+    except ValueError as exc:
+        logger.error(f"Erro nas janelas do walk-forward: {exc}")
+        sys.exit(1)
+    if not windows:
+        logger.error(f"Histórico com {market.length()} linhas é curto demais para --train-rows {app_cfg.train_rows}")
+        sys.exit(1)
+
+    logger.info(f"Walk-forward: {len(windows)} janelas x {len(combos)} combinações sobre {market.length()} preços")
+    report = run_walkforward(market, combos, windows, _resolve_engine(app_cfg.engine), app_cfg.workers)
+
+    swept_fields = list(grid)
+    windows_path, equity_path = write_walkforward_results(report, swept_fields, paths.outputs_dir)
+    print(format_walkforward_table(report, swept_fields))
+    logger.info(f"Janelas salvas em {windows_path}; equity fora da amostra em {equity_path}")
+
+
+def _run_montecarlo_mode(app_cfg, paths, logger) -> None:
+    grid, combos = _build_grid(app_cfg, logger)
+    if app_cfg.n_paths <= 0 or app_cfg.path_rows < 2:
+        logger.error("--paths deve ser positivo e --path-rows ao menos 2")
+        sys.exit(1)
+    if app_cfg.generator == "bootstrap" and not app_cfg.csv_file:
+        logger.error("Gerador bootstrap requer --csv-file")
+        sys.exit(1)
+
+    history = _load_history_arrays(app_cfg, logger).prices if app_cfg.csv_file else None
+    start_price = app_cfg.start_price or (float(history[-1]) if history is not None else MockExchange().last_price)
+    rng = np.random.default_rng(app_cfg.seed)
+    shape = (app_cfg.n_paths, app_cfg.path_rows)
+    try:
+        if app_cfg.generator == "bootstrap":
+            prices = bootstrap_paths(rng, simple_returns(history), *shape, start_price, app_cfg.block_rows)
+        elif app_cfg.generator == "gbm":
+            drift, volatility = gbm_estimate(history) if history is not None else (0.0, 0.01)
+            drift = app_cfg.drift if app_cfg.drift is not None else drift
+            volatility = app_cfg.volatility if app_cfg.volatility is not None else volatility
+            prices = gbm_paths(rng, *shape, start_price, drift, volatility)
+        else:
+            prices = random_walk_paths(rng, *shape, start_price)
+    except ValueError as exc:
+        logger.error(f"Erro ao gerar caminhos: {exc}")
+        sys.exit(1)
+
+    logger.info(
+        f"Monte Carlo ({app_cfg.generator}): {len(combos)} combinações x {app_cfg.n_paths} caminhos de {app_cfg.path_rows} barras"
+    )
+    summaries = run_montecarlo(prices, combos, _resolve_engine(app_cfg.engine), app_cfg.workers)
+
+    swept_fields = list(grid)
+    summary_path, runs_path = write_montecarlo_results(summaries, swept_fields, paths.outputs_dir)
+    print(format_montecarlo_table(summaries, swept_fields))
+    logger.info(f"Distribuições salvas em {summary_path}; execuções individuais em {runs_path}")
+
+
+def _build_grid(app_cfg, logger):
+    try:
+        grid = dict(parse_grid_spec(spec) for spec in app_cfg.grid)
+    except ValueError as exc:
+        logger.error(f"Erro no grid da varredura: {exc}")
+        sys.exit(1)
+
+    combos = build_param_grid(app_cfg.trading, grid)
+    if not combos:
+        logger.error("Nenhuma combinação válida de parâmetros no grid")
+        sys.exit(1)
+    return grid, combos
+
+
+def _load_history_arrays(app_cfg, logger):
+    _validate_timeframe(app_cfg, logger)
+    if app_cfg.timeframe:
+        return load_resampled_market(
+            app_cfg.csv_file, app_cfg.trading.taxa_cambio, app_cfg.timeframe, use_cache=app_cfg.use_cache
         )
-        print(report)
-        if app_cfg.output_graph and graph_due_real(app_cfg.force_graph):
-            graph_path = create_graph(state, market, paths.outputs_dir)
-            logger.info(f"Gráfico (modo real) salvo em {graph_path}")
-        elif app_cfg.output_graph:
-            logger.info("Gráfico não gerado (modo real) - janela diária é 00:00:00. Use --force-graph para forçar.")
+    return load_market_arrays(app_cfg.csv_file, app_cfg.trading.taxa_cambio, use_cache=app_cfg.use_cache)
+
+
+def _validate_timeframe(app_cfg, logger) -> None:
+    if not app_cfg.timeframe:
+        return
+    try:
+        parse_timeframe(app_cfg.timeframe)
+    except ValueError as exc:
+        logger.error(str(exc))
+        sys.exit(1)
+
+
+def _write_trade_events(engine: TradingEngine, paths, logger) -> None:
+    if engine.events is None:
+        return
+    events_path = engine.events.write(paths.outputs_dir / "trade_events.log")
+    logger.info(f"{len(engine.events)} eventos de trading gravados em {events_path}")
+
+
+def _build_book(app_cfg, logger):
+    if app_cfg.book_depth is None:
+        return None
+    if app_cfg.exchange != "mock":
+        logger.error("--book-depth só vale para a exchange mock")
+        sys.exit(1)
+    try:
+        return BookModel(levels=app_cfg.book_levels, spread=app_cfg.book_spread, depth=app_cfg.book_depth)
+    except ValueError as exc:
+        logger.error(str(exc))
+        sys.exit(1)
+
+
+def _open_history(app_cfg, paths, logger):
+    if app_cfg.history_keep < 0:
+        logger.error("--history-keep não pode ser negativo")
+        sys.exit(1)
+    if app_cfg.history_keep == 0:
+        return None
+    return BoundedHistory(HistoryArchive(paths.outputs_dir / "history"), keep=app_cfg.history_keep)
+
+
+def _run_daemon(app_cfg, simulator: Simulator, async_session, logger, worker: ReportWorker):
+    if async_session is not None:
+        logger.error("--daemon não se combina com --exchange fake")
+        sys.exit(1)
+    try:
+        interval = parse_timeframe(app_cfg.interval) / 1e9
+        clock = BarClock(interval, threading.Event())
+        if app_cfg.checkpoint_ops <= 0:
+            raise ValueError("--checkpoint-ops deve ser positivo")
+    except ValueError as exc:
+        logger.error(str(exc))
+        sys.exit(1)
+    # SIGTERM/Ctrl+C interrompem a espera pela próxima barra e salvam o último checkpoint
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(sig, lambda *_: clock.stop.set())
+    logger.info(f"Daemon iniciado: barras de {app_cfg.interval}, checkpoint a cada {app_cfg.checkpoint_ops} operação(ões)")
+
+    def _report(snapshot, start_time) -> None:
+        worker.submit(snapshot, start_time, graph=app_cfg.output_graph and graph_due_real(app_cfg.force_graph))
+
+    return simulator.run_daemon(app_cfg.trading, clock, app_cfg.checkpoint_ops, on_checkpoint=_report)
+
+
+def _open_feed(app_cfg, exchange, stack: ExitStack, logger) -> FeedExchange:
+    """Liga as cotações a um feed em stream (remoto ou replay local); vive até o fim do ``stack``."""
+    if app_cfg.exchange == "fake":
+        logger.error("--feed-url/--feed-replay não se combinam com --exchange fake")
+        sys.exit(1)
+    if app_cfg.feed_url and app_cfg.feed_replay:
+        logger.error("Use --feed-url ou --feed-replay, não ambos")
+        sys.exit(1)
+    try:
+        ring = TickRing(app_cfg.tick_buffer)
+    except ValueError as exc:
+        logger.error(f"--tick-buffer inválido: {exc}")
+        sys.exit(1)
+    url = app_cfg.feed_url
+    if app_cfg.feed_replay:
+        server = ReplayFeedServer.from_csv(app_cfg.feed_replay, app_cfg.feed_rate)
+        url = server.start()
+        stack.callback(server.stop)
+    # CSV e Coinbase cotam em USD; o par BTCBRL da Binance já vem em reais
+    usd = app_cfg.feed_replay is not None or app_cfg.exchange == "coinbase"
+    feed = StreamingPriceFeed(url, ring, taxa_cambio=app_cfg.trading.taxa_cambio if usd else 1.0, logger=logger)
+    stack.enter_context(feed)
+    logger.info(f"Cotações via feed {url} (buffer de {ring.capacity} ticks)")
+    # Replay processa todos os ticks em ordem; ao vivo vale sempre o mais recente
+    return FeedExchange(exchange, feed, conflate=app_cfg.feed_replay is None)
 
 
-def _resolve_exchange(name: str, taxa_transacao: float, logger):
-    if name == "mock":
-        return MockExchange(taxa_transacao=taxa_transacao, logger=logger)
+def _log_slippage(exchange, logger) -> None:
+    if isinstance(exchange, OrderBookExchange):
+        logger.info(f"Slippage total no livro simulado: R${exchange.slippage_total:,.2f}")
+
+
+def _resolve_engine(name: str):
+    if name == "reference":
+        return TradingEngine
+    if name == "numpy":
+        return ArrayTradingEngine
+    raise ValueError(f"Engine desconhecida: {name}")
+
+
+def _resolve_exchange(
+    name: str,
+    taxa_transacao: float,
+    logger,
+    verbose: bool = True,
+    seed=None,
+    base_url=None,
+    taxa_cambio: float = 1.0,
+    book=None,
+):
+    if book is not None:
+        return OrderBookExchange(taxa_transacao=taxa_transacao, logger=logger, verbose=verbose, seed=seed, book=book)
+    if name in ("mock", "fake"):  # fake: a mock só ocupa o lugar até o Simulator ligar a exchange assíncrona
+        return MockExchange(taxa_transacao=taxa_transacao, logger=logger, verbose=verbose, seed=seed)
+    # Credenciais vêm do ambiente, como a chave da CoinGecko no fetch
     if name == "binance":
-        return BinanceExchange()
+        return BinanceExchange(os.getenv("BINANCE_API_KEY"), os.getenv("BINANCE_API_SECRET"), base_url=base_url)
     if name == "coinbase":
-        return CoinbaseExchange()
+        return CoinbaseExchange(
+            os.getenv("COINBASE_API_KEY"),
+            os.getenv("COINBASE_API_SECRET"),
+            os.getenv("COINBASE_API_PASSPHRASE"),
+            taxa_cambio=taxa_cambio,
+            base_url=base_url,
+        )
     raise ValueError(f"Exchange desconhecida: {name}")
 
 
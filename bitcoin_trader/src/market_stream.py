@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from collections import deque
+from pathlib import Path
+from typing import Deque, Iterator, Tuple
+
+import numpy as np
+import pandas as pd
+
+from . import price_cache
+from .models import ArrayMarketData, EpochTimestamps
+from .utils import parse_timestamps, price_columns
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+
+def iter_price_chunks(
+    csv_file: Path, taxa_cambio: float, chunk_rows: int = DEFAULT_CHUNK_ROWS, use_cache: bool = True
+) -> Iterator[ArrayMarketData]:
+    """Lê o CSV em blocos de até ``chunk_rows`` linhas válidas, já convertidas para BRL.
+
+    Com cache válido os blocos são fatias do memmap; sem cache o CSV é lido com
+    ``pd.read_csv(chunksize=...)`` e nunca fica inteiro em memória.
+    """
+    if not csv_file.exists():
+        raise FileNotFoundError(f"Arquivo CSV não encontrado: {csv_file}")
+    if chunk_rows <= 0:
+        raise ValueError("chunk_rows deve ser positivo")
+
+    cached = price_cache.load_cached(csv_file) if use_cache else None
+    if cached is not None:
+        prices_usd, timestamps_ns = cached
+        for lo in range(0, len(prices_usd), chunk_rows):
+            hi = lo + chunk_rows
+            yield ArrayMarketData(prices_usd[lo:hi] * taxa_cambio, np.asarray(timestamps_ns[lo:hi]))
+        return
+
+    price_column = ts_column = None
+    for df in pd.read_csv(csv_file, chunksize=chunk_rows):
+        if price_column is None:
+            price_column, ts_column = price_columns(df.columns)
+        df = df.dropna()
+        if df.empty:
+            continue
+        timestamps = parse_timestamps(df, ts_column)
+        if timestamps.dt.tz is not None:
+            timestamps = timestamps.dt.tz_localize(None)
+        yield ArrayMarketData(
+            df[price_column].to_numpy(dtype=np.float64) * taxa_cambio,
+            timestamps.astype("datetime64[ns]").to_numpy().view(np.int64),
+        )
+
+
+class StreamingMarketData:
+    """Série de mercado consumida bloco a bloco, com índices globais como ``MarketData``.
+
+    Só ficam em memória os blocos ainda alcançáveis: ao acessar o índice ``i``, blocos
+    que terminam antes de ``i - 1`` são descartados. O motor só avança,
+    então ``current_index`` e posições abertas atravessam a fronteira entre blocos
+    normalmente. ``length()`` é o total lido até agora (exato depois do último bloco);
+    para saber se um índice existe use ``has_index``, que lê adiante o necessário.
+    """
+
+    def __init__(self, chunks: Iterator[ArrayMarketData], chunk_rows: int = DEFAULT_CHUNK_ROWS):
+        self.chunk_rows = chunk_rows
+        self._source = iter(chunks)
+        self._chunks: Deque[Tuple[int, ArrayMarketData]] = deque()
+        self._start = 0  # primeiro índice ainda em memória
+        self._end = 0  # um além do último índice lido
+        self._exhausted = False
+
+    @classmethod
+    def from_csv(
+        cls, csv_file: Path, taxa_cambio: float, chunk_rows: int = DEFAULT_CHUNK_ROWS, use_cache: bool = True
+    ) -> "StreamingMarketData":
+        return cls(iter_price_chunks(csv_file, taxa_cambio, chunk_rows, use_cache), chunk_rows)
+
+    @property
+    def prices(self) -> "_StreamColumn":
+        return _StreamColumn(self, "prices")
+
+    @property
+    def timestamps(self) -> "_StreamColumn":
+        return _StreamColumn(self, "timestamps")
+
+    @property
+    def resident_rows(self) -> int:
+        """Linhas atualmente em memória."""
+        return self._end - self._start
+
+    def has_data(self) -> bool:
+        return self.has_index(0)
+
+    def length(self) -> int:
+        return self._end
+
+    def has_index(self, index: int) -> bool:
+        self._fill(index + 1)
+        return index < self._end
+
+    def prices_window(self, start: int, stop: int, release: bool = True) -> np.ndarray:
+        """Preços de ``[start, stop)`` (truncado no fim dos dados) como array float64."""
+        return self._window("prices", start, stop, np.float64, release)
+
+    def timestamps_window(self, start: int, stop: int, release: bool = True) -> np.ndarray:
+        """Timestamps (epoch ns) de ``[start, stop)``; ``release=False`` lê adiante sem descartar blocos."""
+        return self._window("timestamps_ns", start, stop, np.int64, release)
+
+    def _window(self, column: str, start: int, stop: int, dtype, release: bool = True) -> np.ndarray:
+        if release:
+            self._release(start)
+        if start < self._start:
+            raise IndexError(f"Índice {start} já descartado do stream (primeiro em memória: {self._start})")
+        self._fill(stop)
+        stop = min(stop, self._end)
+        if start >= stop:
+            return np.empty(0, dtype=dtype)
+        partes = []
+        for offset, chunk in self._chunks:
+            lo, hi = max(start, offset), min(stop, offset + chunk.length())
+            if lo < hi:
+                partes.append(getattr(chunk, column)[lo - offset:hi - offset])
+        return partes[0] if len(partes) == 1 else np.concatenate(partes)
+
+    def _locate(self, index: int) -> Tuple[ArrayMarketData, int]:
+        if index < self._start:
+            raise IndexError(f"Índice {index} já descartado do stream (primeiro em memória: {self._start})")
+        self._fill(index + 1)
+        for offset, chunk in self._chunks:
+            if index < offset + chunk.length():
+                return chunk, index - offset
+        raise IndexError(f"Índice {index} além do fim dos dados ({self._end})")
+
+    def _fill(self, stop: int) -> None:
+        while self._end < stop and not self._exhausted:
+            chunk = next(self._source, None)
+            if chunk is None:
+                self._exhausted = True
+                break
+            if chunk.has_data():
+                self._chunks.append((self._end, chunk))
+                self._end += chunk.length()
+
+    def _release(self, index: int) -> None:
+        # Mantém a linha anterior a ``index``: a duração de uma barra vem do timestamp anterior
+        while self._chunks and self._chunks[0][0] + self._chunks[0][1].length() < index:
+            offset, chunk = self._chunks.popleft()
+            self._start = offset + chunk.length()
+
+
+class _StreamColumn:
+    """``prices``/``timestamps`` indexáveis por índice global; o acesso libera blocos antigos."""
+
+    __slots__ = ("stream", "column")
+
+    def __init__(self, stream: StreamingMarketData, column: str):
+        self.stream = stream
+        self.column = column
+
+    def __len__(self) -> int:
+        return self.stream.length()
+
+    def __getitem__(self, index: int):
+        self.stream._release(index)
+        chunk, local = self.stream._locate(index)
+        if self.column == "prices":
+            return float(chunk.prices[local])
+        return EpochTimestamps(chunk.timestamps_ns)[local]
@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from dataclasses import dataclass, field
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Optional, Sequence, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
 
 
 @dataclass
@@ -28,6 +30,91 @@ class TradingParams:
     min_stop_loss_time_hours: int = 6
     max_steps_in: int = 168
     fixed_tranche_allocation: bool = False
+    time_based_steps: bool = False  # max_steps_in/max_duration_hours pelo relógio das barras, não por linha
+
+
+class Tranche:
+    """Lote de BTC comprado em uma tranche."""
+
+    __slots__ = ("btc", "preco_compra", "tranche_idx")
+
+    def __init__(self, btc: float, preco_compra: float, tranche_idx: int):
+        self.btc = btc
+        self.preco_compra = preco_compra
+        self.tranche_idx = tranche_idx
+
+    def to_dict(self) -> dict:
+        return {"btc": self.btc, "preco_compra": self.preco_compra, "tranche_idx": self.tranche_idx}
+
+    def __repr__(self) -> str:
+        return f"Tranche(btc={self.btc!r}, preco_compra={self.preco_compra!r}, tranche_idx={self.tranche_idx!r})"
+
+
+class Position:
+    """Tranches abertas de uma operação, indexadas por ``tranche_idx``.
+
+    Iteração sempre em ordem de ``tranche_idx``, remoção O(1) e ``btc_total``/``custo``
+    (soma de btc * preço de compra) mantidos a cada compra/venda, sem re-somar a lista.
+    """
+
+    __slots__ = ("_slots", "_count", "btc_total", "custo", "preco_entrada")
+
+    def __init__(self) -> None:
+        self._slots: List[Optional[Tranche]] = []
+        self._count = 0
+        self.btc_total = 0.0
+        self.custo = 0.0
+        self.preco_entrada: Optional[float] = None  # preço da primeira tranche comprada
+
+    def add(self, tranche: Tranche) -> None:
+        idx = tranche.tranche_idx
+        if idx >= len(self._slots):
+            self._slots.extend([None] * (idx + 1 - len(self._slots)))
+        if self._slots[idx] is not None:
+            raise ValueError(f"Tranche {idx} já está aberta")
+        self._slots[idx] = tranche
+        self._count += 1
+        self.btc_total += tranche.btc
+        self.custo += tranche.btc * tranche.preco_compra
+        if self.preco_entrada is None:
+            self.preco_entrada = tranche.preco_compra
+
+    def remove(self, tranche_idx: int) -> Tranche:
+        tranche = self._slots[tranche_idx]
+        if tranche is None:
+            raise KeyError(tranche_idx)
+        self._slots[tranche_idx] = None
+        self._count -= 1
+        if self._count:
+            self.btc_total -= tranche.btc
+            self.custo -= tranche.btc * tranche.preco_compra
+        else:
+            self.btc_total = 0.0
+            self.custo = 0.0
+        return tranche
+
+    def clear(self) -> None:
+        self._slots = []
+        self._count = 0
+        self.btc_total = 0.0
+        self.custo = 0.0
+
+    def __iter__(self) -> Iterator[Tranche]:
+        return (t for t in self._slots if t is not None)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def to_list(self) -> List[dict]:
+        """Formato JSON histórico: lista de dicts ``{btc, preco_compra, tranche_idx}``."""
+        return [t.to_dict() for t in self]
+
+    @classmethod
+    def from_list(cls, items: Iterable[dict]) -> "Position":
+        position = cls()
+        for item in items:
+            position.add(Tranche(item["btc"], item["preco_compra"], item["tranche_idx"]))
+        return position
 
 
 @dataclass
@@ -35,7 +122,7 @@ class BotState:
     """Estado persistente do bot entre execuções."""
 
     btc_total: float = 0.0
-    btc_tranches: List[dict] = field(default_factory=list)
+    btc_tranches: Position = field(default_factory=Position)
     montante: float = 0.0
     last_price: float = 0.0
     total_lucro: float = 0.0
@@ -56,6 +143,8 @@ class BotState:
     consecutive_losses: int = 0
     cooldown_remaining: int = 0
     operation_details: List[dict] = field(default_factory=list)  # Detalhes de cada operação realizada
+    run_start_time: Optional[datetime] = None  # Início da execução; mantido ao retomar de um checkpoint
+    archived: Dict[str, int] = field(default_factory=dict)  # Itens mais antigos de cada lista, já só no histórico em disco
 
 
 @dataclass
@@ -71,6 +160,109 @@ class MarketData:
     def length(self) -> int:
         return len(self.prices)
 
+    def has_index(self, index: int) -> bool:
+        return index < len(self.prices)
+
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class EpochTimestamps(Sequence):
+    """Visão sequencial sobre epoch ns (int64); cada acesso devolve um ``datetime``."""
+
+    __slots__ = ("ns",)
+
+    def __init__(self, ns: np.ndarray):
+        self.ns = ns
+
+    def __len__(self) -> int:
+        return len(self.ns)
+
+    def __getitem__(self, index: Union[int, slice]):
+        if isinstance(index, slice):
+            return EpochTimestamps(self.ns[index])
+        return _EPOCH + timedelta(microseconds=int(self.ns[index]) // 1000)
+
+
+@dataclass
+class ArrayMarketData:
+    """Série de preços em arrays NumPy (float64 + epoch ns int64), opcionalmente em memmap.
+
+    Mesmo contrato de ``MarketData`` (``prices[i]``, ``timestamps[i]``, ``length()``).
+    Quando aberta de arquivo via ``open``, é serializada para outros processos como
+    caminho + intervalo: cada worker mapeia o mesmo arquivo, sem copiar os dados.
+    """
+
+    prices: np.ndarray
+    timestamps_ns: np.ndarray
+    source: Optional[Path] = field(default=None, repr=False, compare=False)
+    bounds: Tuple[int, int] = field(default=(0, -1), repr=False, compare=False)
+
+    PRICES_FILE = "prices.npy"
+    TIMESTAMPS_FILE = "timestamps_ns.npy"
+
+    def __post_init__(self) -> None:
+        if len(self.prices) != len(self.timestamps_ns):
+            raise ValueError("prices e timestamps_ns devem ter o mesmo tamanho")
+        if self.bounds[1] < 0:
+            self.bounds = (self.bounds[0], self.bounds[0] + len(self.prices))
+
+    @property
+    def timestamps(self) -> EpochTimestamps:
+        return EpochTimestamps(self.timestamps_ns)
+
+    def has_data(self) -> bool:
+        return len(self.prices) > 0
+
+    def length(self) -> int:
+        return len(self.prices)
+
+    def has_index(self, index: int) -> bool:
+        return index < len(self.prices)
+
+    def window(self, start: int, stop: int) -> "ArrayMarketData":
+        """Fatia [start, stop) como visão (sem cópia) dos mesmos arrays."""
+        start, stop, _ = slice(start, stop).indices(len(self.prices))
+        stop = max(start, stop)
+        offset = self.bounds[0]
+        return ArrayMarketData(
+            self.prices[start:stop], self.timestamps_ns[start:stop], self.source, (offset + start, offset + stop)
+        )
+
+    def save(self, directory: Path) -> Path:
+        """Grava os arrays em ``directory`` para reabrir via memmap."""
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / self.PRICES_FILE, np.ascontiguousarray(self.prices, dtype=np.float64))
+        np.save(directory / self.TIMESTAMPS_FILE, np.ascontiguousarray(self.timestamps_ns, dtype=np.int64))
+        return directory
+
+    @classmethod
+    def open(cls, directory: Path, mmap: bool = True) -> "ArrayMarketData":
+        mode = "r" if mmap else None
+        prices = np.load(directory / cls.PRICES_FILE, mmap_mode=mode)
+        timestamps_ns = np.load(directory / cls.TIMESTAMPS_FILE, mmap_mode=mode)
+        return cls(prices, timestamps_ns, directory if mmap else None)
+
+    @classmethod
+    def from_market(cls, market: "MarketData") -> "ArrayMarketData":
+        if isinstance(market, cls):
+            return market
+        prices = np.asarray(market.prices, dtype=np.float64)
+        timestamps_ns = np.array(
+            [(ts.replace(tzinfo=None) - _EPOCH) // timedelta(microseconds=1) * 1000 for ts in market.timestamps],
+            dtype=np.int64,
+        )
+        return cls(prices, timestamps_ns)
+
+    def __reduce__(self):
+        if self.source is not None:
+            return _open_market_window, (self.source, self.bounds)
+        return ArrayMarketData, (np.asarray(self.prices), np.asarray(self.timestamps_ns))
+
+
+def _open_market_window(source: Path, bounds: Tuple[int, int]) -> ArrayMarketData:
+    return ArrayMarketData.open(source).window(*bounds)
+
 
 @dataclass
 class Paths:
@@ -103,3 +295,38 @@ class AppConfig:
     exchange: str = "mock"
     output_graph: bool = True
     force_graph: bool = False
+    engine: str = "reference"
+    grid: List[str] = field(default_factory=list)
+    workers: Optional[int] = None
+    top: int = 10
+    log_mode: str = "full"
+    use_cache: bool = True
+    chunk_rows: Optional[int] = None
+    timeframe: Optional[str] = None
+    train_rows: int = 720
+    test_rows: int = 168
+    step_rows: Optional[int] = None
+    generator: str = "random-walk"
+    n_paths: int = 200
+    path_rows: int = 720
+    block_rows: int = 24
+    drift: Optional[float] = None
+    volatility: Optional[float] = None
+    start_price: Optional[float] = None
+    seed: Optional[int] = None
+    base_url: Optional[str] = None
+    book_depth: Optional[float] = None
+    book_levels: int = 1000
+    book_spread: float = 0.0005
+    feed_url: Optional[str] = None
+    feed_replay: Optional[Path] = None
+    feed_rate: float = 0.0
+    tick_buffer: int = 65536
+    daemon: bool = False
+    interval: str = "1h"
+    checkpoint_ops: int = 1
+    resume: bool = False
+    history_keep: int = 0
+    ledger: bool = True
+    graph_dpi: int = 300
+    graph_size: Tuple[float, float] = (15.0, 10.0)
@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Type
+
+import numpy as np
+
+from .exchange_interface import MOCK_VARIATION
+from .models import ArrayMarketData, TradingParams
+from .sweep import SweepResult, evaluation_pool, format_param_value
+from .trading_engine import TradingEngine
+
+GENERATORS = ("random-walk", "bootstrap", "gbm")
+
+_HOUR_NS = 3600 * 10**9
+_EPOCH_2024_NS = 1704067200 * 10**9
+
+
+def random_walk_paths(rng: np.random.Generator, n_paths: int, length: int, start_price: float) -> np.ndarray:
+    """Mesmo passeio aleatório da ``MockExchange``, gerado em bloco: ``(n_paths, length)``."""
+    passos = 1 + rng.uniform(*MOCK_VARIATION, size=(n_paths, length - 1)) / 1000
+    return _compound(start_price, passos)
+
+
+def bootstrap_paths(
+    rng: np.random.Generator,
+    returns: np.ndarray,
+    n_paths: int,
+    length: int,
+    start_price: float,
+    block_rows: int = 24,
+) -> np.ndarray:
+    """Reamostra blocos contíguos de retornos históricos (preserva autocorrelação curta)."""
+    returns = np.asarray(returns, dtype=np.float64)
+    if block_rows <= 0:
+        raise ValueError("block_rows deve ser positivo")
+    if len(returns) < block_rows:
+        raise ValueError(f"Histórico com {len(returns)} retornos é menor que o bloco de {block_rows}")
+    n_blocks = -(-(length - 1) // block_rows)
+    inicios = rng.integers(0, len(returns) - block_rows + 1, size=(n_paths, n_blocks))
+    indices = (inicios[:, :, None] + np.arange(block_rows)).reshape(n_paths, -1)[:, : length - 1]
+    return _compound(start_price, 1 + returns[indices])
+
+
+def gbm_paths(
+    rng: np.random.Generator, n_paths: int, length: int, start_price: float, drift: float, volatility: float
+) -> np.ndarray:
+    """Movimento browniano geométrico com ``drift``/``volatility`` por barra."""
+    if volatility < 0:
+        raise ValueError("volatility não pode ser negativa")
+    choques = rng.standard_normal((n_paths, length - 1))
+    return _compound(start_price, np.exp(drift - volatility**2 / 2 + volatility * choques))
+
+
+def simple_returns(prices: np.ndarray) -> np.ndarray:
+    """Retornos simples barra a barra, base do bootstrap."""
+    prices = np.asarray(prices, dtype=np.float64)
+    return prices[1:] / prices[:-1] - 1
+
+
+def gbm_estimate(prices: np.ndarray) -> Tuple[float, float]:
+    """``(drift, volatility)`` por barra estimados dos log-retornos do histórico."""
+    log_returns = np.diff(np.log(np.asarray(prices, dtype=np.float64)))
+    if len(log_returns) < 2:
+        raise ValueError("Histórico curto demais para estimar drift/volatilidade")
+    volatility = float(log_returns.std(ddof=1))
+    return float(log_returns.mean()) + volatility**2 / 2, volatility
+
+
+def _compound(start_price: float, fatores: np.ndarray) -> np.ndarray:
+    paths = np.empty((fatores.shape[0], fatores.shape[1] + 1), dtype=np.float64)
+    paths[:, 0] = start_price
+    np.cumprod(fatores, axis=1, out=paths[:, 1:])
+    paths[:, 1:] *= start_price
+    return np.maximum(paths, 1.0, out=paths)
+
+
+def paths_market(paths: np.ndarray) -> ArrayMarketData:
+    """Caminhos concatenados numa única série horária; cada caminho é uma janela dela."""
+    flat = np.ascontiguousarray(paths, dtype=np.float64).reshape(-1)
+    timestamps_ns = _EPOCH_2024_NS + np.arange(len(flat), dtype=np.int64) * _HOUR_NS
+    return ArrayMarketData(flat, timestamps_ns)
+
+
+@dataclass
+class MonteCarloRun:
+    path: int
+    montante_final: float
+    max_drawdown: float
+    stop_losses: int
+
+
+@dataclass
+class MonteCarloSummary:
+    """Distribuição dos resultados de um conjunto de parâmetros sobre todos os caminhos."""
+
+    params: TradingParams
+    runs: List[MonteCarloRun]
+
+    def _values(self, attr: str) -> np.ndarray:
+        return np.array([getattr(run, attr) for run in self.runs], dtype=np.float64)
+
+    def percentiles(self, attr: str, qs: Sequence[float] = (5, 50, 95)) -> List[float]:
+        return np.percentile(self._values(attr), qs).tolist()
+
+    def mean(self, attr: str) -> float:
+        return float(self._values(attr).mean())
+
+    @property
+    def prob_prejuizo(self) -> float:
+        return float((self._values("montante_final") < self.params.montante).mean())
+
+
+def run_montecarlo(
+    paths: np.ndarray,
+    params_list: Sequence[TradingParams],
+    engine_cls: Type[TradingEngine] = TradingEngine,
+    workers: Optional[int] = None,
+) -> List[MonteCarloSummary]:
+    """Roda cada conjunto de parâmetros sobre cada caminho, em paralelo.
+
+    Os caminhos viram uma série única compartilhada pelos workers (memmap); cada
+    tarefa é uma janela dela, como no walk-forward.
+    """
+    if not params_list or not len(paths):
+        raise ValueError("Monte Carlo requer ao menos uma combinação e um caminho")
+    n_paths, length = paths.shape
+    bounds = [(k * length, (k + 1) * length) for k in range(n_paths)]
+    with evaluation_pool(paths_market(paths), engine_cls, workers, n_paths * len(params_list)) as evaluate:
+        results = evaluate([(params, b) for params in params_list for b in bounds])
+    return [
+        MonteCarloSummary(
+            params,
+            [_to_run(k, r) for k, r in enumerate(results[i * n_paths:(i + 1) * n_paths])],
+        )
+        for i, params in enumerate(params_list)
+    ]
+
+
+def max_drawdown(saldo_history: Sequence[float], montante_inicial: float) -> float:
+    """Maior queda relativa do saldo a partir do pico anterior (0.25 = -25%)."""
+    saldos = np.asarray([montante_inicial, *saldo_history], dtype=np.float64)
+    picos = np.maximum.accumulate(saldos)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        quedas = np.where(picos > 0, 1 - saldos / picos, 0.0)
+    return float(quedas.max())
+
+
+def _to_run(path: int, result: SweepResult) -> MonteCarloRun:
+    """Posição aberta no fim do caminho é marcada a mercado pelo último preço."""
+    return MonteCarloRun(
+        path=path,
+        montante_final=result.equity,
+        max_drawdown=max_drawdown(result.equity_history(), result.params.montante),
+        stop_losses=result.stop_losses,
+    )
+
+
+_SUMMARY_METRICS = (("montante_final", "montante"), ("max_drawdown", "drawdown"), ("stop_losses", "stop_losses"))
+
+
+def write_montecarlo_results(
+    summaries: Sequence[MonteCarloSummary], swept_fields: Sequence[str], outputs_dir: Path
+) -> Tuple[Path, Path]:
+    """Grava ``montecarlo_summary.csv`` (percentis por conjunto) e ``montecarlo_runs.csv`` (cada caminho)."""
+    outputs_dir.mkdir(parents=True, exist_ok=True)
+    summary_path = outputs_dir / "montecarlo_summary.csv"
+    with summary_path.open("w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        metricas = [f"{nome}_{sufixo}" for _, nome in _SUMMARY_METRICS for sufixo in ("media", "p5", "p50", "p95")]
+        writer.writerow(["conjunto", *swept_fields, "caminhos", "prob_prejuizo", *metricas])
+        for idx, summary in enumerate(summaries, start=1):
+            valores = []
+            for attr, _ in _SUMMARY_METRICS:
+                valores.extend(round(v, 6) for v in [summary.mean(attr), *summary.percentiles(attr)])
+            writer.writerow(
+                [idx, *(format_param_value(getattr(summary.params, f)) for f in swept_fields),
+                 len(summary.runs), round(summary.prob_prejuizo, 6), *valores]
+            )
+
+    runs_path = outputs_dir / "montecarlo_runs.csv"
+    with runs_path.open("w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["conjunto", "caminho", "montante_final", "max_drawdown", "stop_losses"])
+        for idx, summary in enumerate(summaries, start=1):
+            for run in summary.runs:
+                writer.writerow(
+                    [idx, run.path, round(run.montante_final, 2), round(run.max_drawdown, 6), run.stop_losses]
+                )
+    return summary_path, runs_path
+
+
+def format_montecarlo_table(summaries: Sequence[MonteCarloSummary], swept_fields: Sequence[str]) -> str:
+    """Tabela texto: montante (p5/p50/p95), drawdown e stop-losses por conjunto de parâmetros."""
+    header = ["#", *swept_fields, "montante p5", "p50", "p95", "P(prejuízo)", "drawdown p50", "p95", "stops médio"]
+    rows = [header]
+    for idx, summary in enumerate(summaries, start=1):
+        p5, p50, p95 = summary.percentiles("montante_final")
+        _, dd50, dd95 = summary.percentiles("max_drawdown")
+        rows.append(
+            [
+                str(idx),
+                *(format_param_value(getattr(summary.params, f)) for f in swept_fields),
+                f"R${p5:,.2f}",
+                f"R${p50:,.2f}",
+                f"R${p95:,.2f}",
+                f"{summary.prob_prejuizo:.1%}",
+                f"{dd50:.2%}",
+                f"{dd95:.2%}",
+                f"{summary.mean('stop_losses'):.2f}",
+            ]
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
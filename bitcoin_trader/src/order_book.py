@@ -0,0 +1,213 @@
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .exchange_interface import MockExchange
+
+
+@dataclass
+class BookFill:
+    """Resultado de uma ordem contra o livro: um pedaço por nível atingido."""
+
+    prices: np.ndarray
+    sizes: np.ndarray  # BTC executado em cada nível
+    remaining: float  # não executado (BTC, ou moeda na compra por valor)
+
+    @property
+    def size(self) -> float:
+        return float(self.sizes.sum())
+
+    @property
+    def notional(self) -> float:
+        return float(self.prices @ self.sizes)
+
+    @property
+    def avg_price(self) -> float:
+        size = self.size
+        return self.notional / size if size else 0.0
+
+    @property
+    def levels(self) -> int:
+        return len(self.sizes)
+
+
+class OrderBook:
+    """Livro de ofertas limitado em arrays ordenados (melhor preço primeiro em cada lado).
+
+    Ordens a mercado consomem níveis com somas acumuladas + ``searchsorted``, sem laço
+    por nível; ``limit`` interrompe a varredura e deixa o resto sem execução (parcial).
+    """
+
+    __slots__ = ("bid_prices", "bid_sizes", "ask_prices", "ask_sizes")
+
+    def __init__(self, bid_prices, bid_sizes, ask_prices, ask_sizes):
+        self.bid_prices = np.asarray(bid_prices, dtype=np.float64)
+        self.bid_sizes = np.asarray(bid_sizes, dtype=np.float64)
+        self.ask_prices = np.asarray(ask_prices, dtype=np.float64)
+        self.ask_sizes = np.asarray(ask_sizes, dtype=np.float64)
+        if len(self.bid_prices) != len(self.bid_sizes) or len(self.ask_prices) != len(self.ask_sizes):
+            raise ValueError("Preços e tamanhos do livro devem ter o mesmo comprimento")
+        if np.any(np.diff(self.bid_prices) > 0) or np.any(np.diff(self.ask_prices) < 0):
+            raise ValueError("Bids devem estar em ordem decrescente e asks em ordem crescente")
+
+    @property
+    def best_bid(self) -> float:
+        return float(self.bid_prices[0]) if len(self.bid_prices) else 0.0
+
+    @property
+    def best_ask(self) -> float:
+        return float(self.ask_prices[0]) if len(self.ask_prices) else float("inf")
+
+    def add_limit(self, side: str, price: float, size: float) -> None:
+        """Insere (ou soma a) um nível mantendo a ordenação."""
+        if size <= 0:
+            raise ValueError("Tamanho da ordem deve ser positivo")
+        if side == "buy":
+            # searchsorted exige ordem crescente: busca no array negado
+            i = int(np.searchsorted(-self.bid_prices, -price))
+            if i < len(self.bid_prices) and self.bid_prices[i] == price:
+                self.bid_sizes[i] += size
+            else:
+                self.bid_prices = np.insert(self.bid_prices, i, price)
+                self.bid_sizes = np.insert(self.bid_sizes, i, size)
+        elif side == "sell":
+            i = int(np.searchsorted(self.ask_prices, price))
+            if i < len(self.ask_prices) and self.ask_prices[i] == price:
+                self.ask_sizes[i] += size
+            else:
+                self.ask_prices = np.insert(self.ask_prices, i, price)
+                self.ask_sizes = np.insert(self.ask_sizes, i, size)
+        else:
+            raise ValueError(f"Lado desconhecido: {side}")
+
+    def buy(self, size: float, limit: Optional[float] = None) -> BookFill:
+        """Compra ``size`` BTC consumindo asks (até ``limit``, se dado)."""
+        fill, self.ask_prices, self.ask_sizes = _take(self.ask_prices, self.ask_sizes, size, limit, by_value=False)
+        return fill
+
+    def buy_value(self, amount: float, limit: Optional[float] = None) -> BookFill:
+        """Compra gastando até ``amount`` em moeda (ordem por valor, como ``quoteOrderQty``)."""
+        fill, self.ask_prices, self.ask_sizes = _take(self.ask_prices, self.ask_sizes, amount, limit, by_value=True)
+        return fill
+
+    def sell(self, size: float, limit: Optional[float] = None) -> BookFill:
+        """Vende ``size`` BTC consumindo bids (até ``limit``, se dado)."""
+        fill, self.bid_prices, self.bid_sizes = _take(
+            self.bid_prices, self.bid_sizes, size, limit, by_value=False, descending=True
+        )
+        return fill
+
+
+def _take(prices, sizes, amount, limit, by_value, descending=False):
+    """Consome níveis do lado até somar ``amount``; retorna (fill, preços, tamanhos restantes)."""
+    if limit is not None:
+        n = int(np.searchsorted(-prices, -limit, side="right") if descending else np.searchsorted(prices, limit, side="right"))
+    else:
+        n = len(prices)
+    custo = prices[:n] * sizes[:n] if by_value else sizes[:n]
+    acumulado = np.cumsum(custo)
+    k = int(np.searchsorted(acumulado, amount, side="left"))  # nível onde a ordem termina
+    if k >= n:  # profundidade (ou limite) insuficiente: executa tudo o que há e sobra o resto
+        fill = BookFill(prices[:n].copy(), sizes[:n].copy(), max(amount - (acumulado[-1] if n else 0.0), 0.0))
+        return fill, prices[n:], sizes[n:]
+    anterior = acumulado[k - 1] if k else 0.0
+    parcial = (amount - anterior) / prices[k] if by_value else amount - anterior
+    executado = sizes[: k + 1].copy()
+    executado[k] = parcial
+    restantes = sizes[k:].copy()
+    restantes[0] -= parcial
+    if restantes[0] <= 1e-12:
+        return BookFill(prices[: k + 1].copy(), executado, 0.0), prices[k + 1:], restantes[1:]
+    return BookFill(prices[: k + 1].copy(), executado, 0.0), prices[k:], restantes
+
+
+@dataclass
+class BookModel:
+    """Livro sintético em torno de um preço: ``levels`` níveis por lado, espaçados em ``tick``.
+
+    ``spread`` e ``tick`` são frações do preço; cada nível tem ``depth`` BTC, crescendo
+    ``depth_growth`` por nível (livros reais são mais fundos longe do topo).
+    """
+
+    levels: int = 1000
+    spread: float = 0.0005
+    tick: float = 0.0001
+    depth: float = 0.05
+    depth_growth: float = 0.01
+
+    def __post_init__(self) -> None:
+        if self.levels <= 0 or self.tick <= 0 or self.depth <= 0 or self.spread < 0:
+            raise ValueError("levels, tick e depth devem ser positivos e spread não negativo")
+        passos = np.arange(self.levels, dtype=np.float64)
+        # Forma do livro é fixa; só a escala de preço muda a cada ordem
+        self._offsets = self.spread / 2 + self.tick * passos
+        self._sizes = self.depth * (1 + self.depth_growth * passos)
+
+    def book_at(self, mid: float) -> OrderBook:
+        return OrderBook(
+            mid * (1 - self._offsets), self._sizes.copy(), mid * (1 + self._offsets), self._sizes.copy()
+        )
+
+
+class OrderBookExchange(MockExchange):
+    """``MockExchange`` que executa ordens contra um livro sintético em volta do preço.
+
+    Ordens grandes atravessam vários níveis (execuções parciais por nível), pagando
+    slippage sobre ``price_brl`` além da taxa. Se o livro inteiro não bastar, o resto
+    sai no pior nível, para que o motor nunca fique com ordem pela metade.
+    """
+
+    def __init__(
+        self,
+        taxa_transacao: float = 0.002,
+        start_price: float = 654139.18,
+        logger: logging.Logger | None = None,
+        verbose: bool = True,
+        seed: Optional[int] = None,
+        book: Optional[BookModel] = None,
+    ):
+        super().__init__(taxa_transacao, start_price, logger, verbose, seed)
+        self.book = book or BookModel()
+        self.last_fill: Optional[BookFill] = None
+        self.slippage_total = 0.0  # BRL pagos acima (compra) ou recebidos abaixo (venda) de price_brl
+
+    def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:
+        if montante_brl <= 0 or price_brl <= 0:
+            return 0.0, 0.0
+        taxa = montante_brl * self.taxa_transacao
+        fill = self._complete(self.book.book_at(price_brl).buy_value(montante_brl - taxa), by_value=True)
+        btc = fill.size
+        self.slippage_total += fill.notional - btc * price_brl
+        self._log_fill("Comprou", ts, btc, fill, taxa)
+        return btc, taxa
+
+    def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:
+        if btc_total <= 0 or price_brl <= 0:
+            return 0.0, 0.0
+        fill = self._complete(self.book.book_at(price_brl).sell(btc_total), by_value=False)
+        valor = fill.notional
+        taxa = valor * self.taxa_transacao
+        self.slippage_total += btc_total * price_brl - valor
+        self._log_fill("Vendeu", ts, btc_total, fill, taxa, reason)
+        return valor, taxa
+
+    def _complete(self, fill: BookFill, by_value: bool) -> BookFill:
+        if fill.remaining > 0 and fill.levels:
+            pior = fill.prices[-1]
+            extra = fill.remaining / pior if by_value else fill.remaining
+            fill = BookFill(np.append(fill.prices, pior), np.append(fill.sizes, extra), 0.0)
+        self.last_fill = fill
+        return fill
+
+    def _log_fill(self, verbo: str, ts: datetime, btc: float, fill: BookFill, taxa: float, reason: str = "") -> None:
+        if self.verbose and self.logger.isEnabledFor(logging.INFO):
+            motivo = f" Motivo: {reason}" if reason else ""
+            self.logger.info(
+                f"[BOOK] {ts.strftime('%Y-%m-%d %H:%M:%S')} - {verbo} {btc:.5f} BTC a R${fill.avg_price:,.2f} "
+                f"médio em {fill.levels} níveis (taxa: R${taxa:,.2f}){motivo}"
+            )
@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Optional, Tuple
+
+import numpy as np
+
+CACHE_VERSION = 1
+CACHE_DIRNAME = ".cache"
+
+
+def cache_files(csv_file: Path, suffix: str = "") -> Tuple[Path, Path, Path]:
+    """Arquivos (preços USD, timestamps ns, metadados) do cache de um CSV."""
+    base = csv_file.parent / CACHE_DIRNAME / f"{csv_file.name}{suffix}"
+    return (
+        base.with_name(base.name + ".prices_usd.npy"),
+        base.with_name(base.name + ".timestamps_ns.npy"),
+        base.with_name(base.name + ".meta.json"),
+    )
+
+
+def fingerprint(csv_file: Path) -> dict:
+    """Chave do cache: caminho, tamanho e mtime do CSV de origem."""
+    stat = csv_file.stat()
+    return {
+        "version": CACHE_VERSION,
+        "path": str(csv_file.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def load_cached(csv_file: Path, suffix: str = "", mmap: bool = True) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """Retorna (preços USD, timestamps ns) se o cache existir e ainda for válido."""
+    prices_file, ts_file, meta_file = cache_files(csv_file, suffix)
+    try:
+        meta = json.loads(meta_file.read_text())
+    except (OSError, ValueError):
+        return None
+    if meta.get("source") != fingerprint(csv_file):
+        return None
+    mode = "r" if mmap else None
+    try:
+        prices = np.load(prices_file, mmap_mode=mode)
+        timestamps = np.load(ts_file, mmap_mode=mode)
+    except (OSError, ValueError):
+        return None
+    if len(prices) != meta.get("rows") or len(timestamps) != len(prices):
+        return None
+    return prices, timestamps
+
+
+def store(csv_file: Path, prices_usd: np.ndarray, timestamps_ns: np.ndarray, suffix: str = "") -> bool:
+    """Grava o cache de forma atômica; metadados por último marcam o cache como válido."""
+    prices_file, ts_file, meta_file = cache_files(csv_file, suffix)
+    meta = {
+        "source": fingerprint(csv_file),
+        "rows": int(len(prices_usd)),
+    }
+    try:
+        prices_file.parent.mkdir(parents=True, exist_ok=True)
+        meta_file.unlink(missing_ok=True)
+        _atomic_save(prices_file, np.ascontiguousarray(prices_usd, dtype=np.float64))
+        _atomic_save(ts_file, np.ascontiguousarray(timestamps_ns, dtype=np.int64))
+        tmp = meta_file.with_name(meta_file.name + ".tmp")
+        tmp.write_text(json.dumps(meta))
+        os.replace(tmp, meta_file)
+    except OSError:
+        # Cache é só otimização: diretório somente leitura não impede a simulação
+        return False
+    return True
+
+
+def _atomic_save(target: Path, array: np.ndarray) -> None:
+    tmp = target.with_name(target.name + ".tmp")
+    with tmp.open("wb") as fh:
+        np.save(fh, array)
+    os.replace(tmp, target)
@@ -0,0 +1,263 @@
+from __future__ import annotations
+
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+import os
+import struct
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+from urllib.parse import urlsplit
+
+from .exchange_interface import ExchangeInterface
+from .tick_store import TickRing
+
+WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONT, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+
+def ws_accept_key(key: str) -> str:
+    return base64.b64encode(hashlib.sha1((key + WS_GUID).encode()).digest()).decode()
+
+
+async def ws_read_frame(reader: asyncio.StreamReader) -> Tuple[bool, int, bytes]:
+    """Lê um frame WebSocket; retorna (fin, opcode, payload já sem máscara)."""
+    b0, b1 = await reader.readexactly(2)
+    size = b1 & 0x7F
+    if size == 126:
+        size = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif size == 127:
+        size = struct.unpack("!Q", await reader.readexactly(8))[0]
+    mask = await reader.readexactly(4) if b1 & 0x80 else None
+    payload = await reader.readexactly(size)
+    if mask:
+        payload = _unmask(payload, mask)
+    return bool(b0 & 0x80), b0 & 0x0F, payload
+
+
+def ws_write_frame(writer: asyncio.StreamWriter, opcode: int, payload: bytes, masked: bool) -> None:
+    """Enfileira um frame final; clientes mascaram o payload (RFC 6455), servidores não."""
+    size = len(payload)
+    if size < 126:
+        head = struct.pack("!BB", 0x80 | opcode, (0x80 if masked else 0) | size)
+    elif size < 1 << 16:
+        head = struct.pack("!BBH", 0x80 | opcode, (0x80 if masked else 0) | 126, size)
+    else:
+        head = struct.pack("!BBQ", 0x80 | opcode, (0x80 if masked else 0) | 127, size)
+    if masked:
+        mask = os.urandom(4)
+        writer.write(head + mask + _unmask(payload, mask))
+    else:
+        writer.write(head + payload)
+
+
+def _unmask(payload: bytes, mask: bytes) -> bytes:
+    size = len(payload)
+    chave = (mask * (size // 4 + 1))[:size]
+    return (int.from_bytes(payload, "big") ^ int.from_bytes(chave, "big")).to_bytes(size, "big")
+
+
+async def ws_connect(url: str, timeout: float = 10.0) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """Abre a conexão e faz o handshake de upgrade (``ws://`` ou ``wss://``)."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("ws", "wss") or not parts.hostname:
+        raise ValueError(f"URL de feed inválida: {url}")
+    port = parts.port or (443 if parts.scheme == "wss" else 80)
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(parts.hostname, port, ssl=parts.scheme == "wss" or None), timeout
+    )
+    key = base64.b64encode(os.urandom(16)).decode()
+    caminho = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+    writer.write(
+        (
+            f"GET {caminho} HTTP/1.1\r\nHost: {parts.hostname}:{port}\r\nUpgrade: websocket\r\n"
+            f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+        ).encode()
+    )
+    await writer.drain()
+    resposta = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), timeout)
+    linhas = resposta.decode("latin-1").split("\r\n")
+    headers = {k.strip().lower(): v.strip() for k, _, v in (l.partition(":") for l in linhas[1:] if l)}
+    if " 101 " not in linhas[0] + " " or headers.get("sec-websocket-accept") != ws_accept_key(key):
+        writer.close()
+        raise ConnectionError(f"Handshake WebSocket recusado: {linhas[0]}")
+    return reader, writer
+
+
+def parse_tick(message: dict) -> Optional[Tuple[float, int]]:
+    """(preço, timestamp ns) de uma mensagem de trade Binance ou ticker Coinbase; None se não for tick."""
+    if "p" in message:  # Binance: {"e": "trade", "p": "350000.00", "T": 1700000000000, ...}
+        return float(message["p"]), int(message.get("T") or message.get("E") or time.time() * 1000) * 1_000_000
+    if message.get("type") == "ticker" and "price" in message:
+        ts = message.get("time")
+        ns = int(datetime.fromisoformat(ts.replace("Z", "+00:00")).timestamp() * 1e9) if ts else time.time_ns()
+        return float(message["price"]), ns
+    return None
+
+
+class StreamingPriceFeed:
+    """Assina um stream WebSocket de trades numa thread própria e grava os ticks no ``TickRing``.
+
+    Preços são convertidos por ``taxa_cambio``. Quedas da conexão reconectam com backoff
+    exponencial (até ``max_retries`` seguidas); um frame de close encerra o feed.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        ring: Optional[TickRing] = None,
+        taxa_cambio: float = 1.0,
+        subscribe: Optional[dict] = None,
+        max_retries: int = 5,
+        backoff: float = 0.5,
+        logger: Optional[logging.Logger] = None,
+    ):
+        self.url = url
+        self.ring = ring or TickRing()
+        self.taxa_cambio = taxa_cambio
+        self.subscribe = subscribe
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.logger = logger or logging.getLogger(__name__)
+        self.closed = False
+        self.error: Optional[BaseException] = None
+        self._cond = threading.Condition()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "StreamingPriceFeed":
+        self._thread = threading.Thread(target=self._thread_main, name="price-feed", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._loop is not None and self._task is not None and not self.closed:
+            try:
+                self._loop.call_soon_threadsafe(self._task.cancel)
+            except RuntimeError:  # o feed terminou sozinho entre a checagem e o cancelamento
+                pass
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StreamingPriceFeed":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    def wait_for(self, seq: int, timeout: Optional[float] = None) -> bool:
+        """Bloqueia até existir o tick ``seq`` (ou o feed fechar); False se não chegou."""
+        with self._cond:
+            return self._cond.wait_for(lambda: self.ring.count > seq or self.closed, timeout) and self.ring.count > seq
+
+    def _thread_main(self) -> None:
+        self._loop = asyncio.new_event_loop()
+        try:
+            self._task = self._loop.create_task(self._run())
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        except Exception as exc:  # registrado para o leitor; a thread não tem a quem propagar
+            self.error = exc
+            self.logger.error(f"Feed de preços encerrado com erro: {exc}")
+        finally:
+            self._loop.close()
+            with self._cond:
+                self.closed = True
+                self._cond.notify_all()
+
+    async def _run(self) -> None:
+        falhas = 0
+        while True:
+            try:
+                reader, writer = await ws_connect(self.url)
+            except (OSError, asyncio.TimeoutError) as exc:
+                falhas += 1
+                if falhas > self.max_retries:
+                    raise ConnectionError(f"Feed indisponível após {falhas} tentativas: {exc}") from exc
+                await asyncio.sleep(self.backoff * 2 ** (falhas - 1))
+                continue
+            try:
+                if self.subscribe is not None:
+                    ws_write_frame(writer, OP_TEXT, json.dumps(self.subscribe).encode(), masked=True)
+                    await writer.drain()
+                falhas = 0
+                if await self._consume(reader, writer):
+                    return
+            except (OSError, asyncio.IncompleteReadError) as exc:
+                self.logger.warning(f"Conexão do feed caiu ({exc}); reconectando")
+            finally:
+                writer.close()
+
+    async def _consume(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> bool:
+        """Lê frames até o close do servidor (True) ou erro de conexão (exceção)."""
+        partes = []
+        ring, cond, taxa = self.ring, self._cond, self.taxa_cambio
+        while True:
+            fin, opcode, payload = await ws_read_frame(reader)
+            if opcode == OP_PING:
+                ws_write_frame(writer, OP_PONG, payload, masked=True)
+                continue
+            if opcode == OP_CLOSE:
+                ws_write_frame(writer, OP_CLOSE, payload[:2], masked=True)
+                return True
+            if opcode not in (OP_TEXT, OP_BINARY, OP_CONT):
+                continue
+            partes.append(payload)
+            if not fin:
+                continue
+            tick = parse_tick(json.loads(b"".join(partes)))
+            partes.clear()
+            if tick is not None:
+                ring.push(tick[0] * taxa, tick[1])
+                with cond:
+                    cond.notify_all()
+
+
+class FeedExchange(ExchangeInterface):
+    """Exchange cujas cotações vêm do feed em stream; ordens vão para ``orders``.
+
+    Cada ``get_current_price`` consome o próximo tick do buffer (espera até ``timeout``
+    se ainda não chegou). Com ``conflate``, pula direto para o tick mais recente; sem ele,
+    processa todos em ordem e, se ficar ``capacity`` ticks atrás ou mais, salta para o
+    mais antigo que o produtor não está sobrescrevendo (pulados contados em ``dropped``).
+    """
+
+    def __init__(
+        self, orders: ExchangeInterface, feed: StreamingPriceFeed, conflate: bool = True, timeout: float = 30.0
+    ):
+        self.orders = orders
+        self.feed = feed
+        self.conflate = conflate
+        self.timeout = timeout
+        self.next_seq = 0
+        self.dropped = 0
+
+    @property
+    def ring(self) -> TickRing:
+        return self.feed.ring
+
+    def get_current_price(self, symbol: str = "BTCUSDT") -> float:
+        if not self.feed.wait_for(self.next_seq, self.timeout):
+            if self.feed.error is not None:
+                raise ConnectionError(f"Feed de preços falhou: {self.feed.error}")
+            raise ConnectionError("Feed de preços encerrado" if self.feed.closed else "Feed de preços sem ticks")
+        ring = self.ring
+        # Leitura validada: o produtor pode passar por cima do tick entre escolher e ler
+        seq, preco = ring.read_from(ring.count - 1 if self.conflate else self.next_seq)
+        if not self.conflate:
+            self.dropped += seq - self.next_seq
+        self.next_seq = seq + 1
+        return preco
+
+    def buy(self, montante_brl: float, price_brl: float, ts: datetime) -> Tuple[float, float]:
+        return self.orders.buy(montante_brl, price_brl, ts)
+
+    def sell(self, btc_total: float, price_brl: float, ts: datetime, reason: str) -> Tuple[float, float]:
+        return self.orders.sell(btc_total, price_brl, ts, reason)
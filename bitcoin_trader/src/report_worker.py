@@ -0,0 +1,121 @@
+from __future__ import annotations
+
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, TextIO, Tuple
+
+from .history import BoundedHistory
+from .ledger import TradeLedger
+from .models import BotState, MarketData, TradingParams
+from .reporter import GRAPH_DPI, GRAPH_SIZE, create_graph, write_report
+
+
+class ReportWorker:
+    """Relatório e gráfico do modo real numa thread própria, a partir de cópias do estado.
+
+    ``submit`` só registra o pedido e retorna: o laço de trading não espera disco nem
+    desenho. Um pedido ainda não iniciado é substituído pelo seguinte (só o estado mais
+    recente interessa; um gráfico pedido não se perde). O estado recebido não pode mais ser
+    alterado por quem o enviou. O livro é lido por uma conexão SQLite da própria thread.
+    ``close`` espera o último pedido e encerra a thread.
+    """
+
+    def __init__(
+        self,
+        params: TradingParams,
+        outputs_dir: Path,
+        logger: logging.Logger,
+        history: Optional[BoundedHistory] = None,
+        ledger_path: Optional[Path] = None,
+        graph_dpi: int = GRAPH_DPI,
+        graph_size: Tuple[float, float] = GRAPH_SIZE,
+    ):
+        self.params = params
+        self.outputs_dir = outputs_dir
+        self.logger = logger
+        self.history = history
+        self.ledger_path = ledger_path
+        self.graph_dpi = graph_dpi
+        self.graph_size = graph_size
+        self.completed = 0
+        self._cond = threading.Condition()
+        self._pending: Optional[tuple] = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="report-worker", daemon=True)
+        self._thread.start()
+
+    def submit(
+        self,
+        state: BotState,
+        start_time: datetime,
+        market: Optional[MarketData] = None,
+        graph: bool = False,
+        echo: Optional[TextIO] = None,
+    ) -> None:
+        with self._cond:
+            if self._closed:
+                raise ValueError("ReportWorker já foi encerrado")
+            if self._pending is not None:
+                graph = graph or self._pending[3]
+            self._pending = (state, start_time, market, graph, echo)
+            self._cond.notify()
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        self._thread.join()
+
+    def __enter__(self) -> "ReportWorker":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _run(self) -> None:
+        ledger = TradeLedger(self.ledger_path) if self.ledger_path is not None else None
+        try:
+            while True:
+                with self._cond:
+                    while self._pending is None and not self._closed:
+                        self._cond.wait()
+                    if self._pending is None:
+                        return
+                    job, self._pending = self._pending, None
+                try:
+                    self._render(ledger, *job)
+                except Exception as exc:  # uma falha de relatório não derruba o bot
+                    self.logger.error(f"Falha ao gerar relatório em segundo plano: {exc}")
+                self.completed += 1
+        finally:
+            if ledger is not None:
+                ledger.close()
+
+    def _render(
+        self,
+        ledger: Optional[TradeLedger],
+        state: BotState,
+        start_time: datetime,
+        market: Optional[MarketData],
+        graph: bool,
+        echo: Optional[TextIO],
+    ) -> None:
+        write_report(
+            state,
+            self.params,
+            self.params.montante,
+            start_time,
+            state.last_operation_time,
+            self.outputs_dir,
+            historical_used=False,
+            history=self.history,
+            ledger=ledger,
+            echo=echo,
+        )
+        if graph:
+            graph_path = create_graph(
+                state, market, self.outputs_dir, history=self.history, dpi=self.graph_dpi, size=self.graph_size
+            )
+            self.logger.info(f"Gráfico (modo real) salvo em {graph_path}")
@@ -1,13 +1,19 @@
 from __future__ import annotations
 
+import csv
+import json
 import logging
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Optional, TextIO, Tuple
 
 import matplotlib
-import matplotlib.pyplot as plt
+import numpy as np
+from matplotlib.figure import Figure
 
+from .downsample import bin_markers, lttb, min_max
+from .history import BoundedHistory
+from .ledger import TradeLedger
 from .models import BotState, MarketData, TradingParams
 
 # Usa backend não interativo
@@ -34,97 +40,291 @@ def setup_logging(log_file: Path) -> logging.Logger:
     return logger
 
 
-def generate_report(
-    state: BotState,
-    params: TradingParams,
-    montante_inicial: float,
-    start_operation_time: datetime,
-    final_time: datetime,
-    outputs_dir: Path,
-    historical_used: bool,
-) -> str:
-    report = f"""
+REPORT_TEXT = "relatorio_final.txt"
+REPORT_JSON = "relatorio_final.json"
+REPORT_CSV = "operacoes.csv"
+DETAIL_FIELDS = (
+    "operation_id",
+    "start_time",
+    "end_time",
+    "motivo_venda",
+    "lucro",
+    "preco_compra",
+    "preco_venda",
+    "btc_comprado",
+    "custo_total",
+)
+
+_HEADER = """
 === RELATÓRIO FINAL DA SIMULAÇÃO ===
 
 CONFIGURAÇÕES:
-- Montante inicial: R${montante_inicial:,.2f}
-- Número de operações: {params.qtd_operacoes}
-- Meta de lucro: {params.meta_lucro*100:.1f}%
-- Stop-loss: {params.stop_loss*100:.1f}%
-- Taxa de transação: {params.taxa_transacao*100:.2f}%
-- Usando dados históricos: {'Sim' if historical_used else 'Não'}
-- Tranches de compra: {' '.join(map(str, params.tranches_buy))} (níveis: {' '.join(map(str, params.levels_buy))})
-- Tranches de venda: {' '.join(map(str, params.tranches_sell))} (níveis: {' '.join(map(str, params.levels_sell))})
+- Montante inicial: R${c[montante_inicial]:,.2f}
+- Número de operações: {c[qtd_operacoes]}
+- Meta de lucro: {meta:.1f}%
+- Stop-loss: {stop:.1f}%
+- Taxa de transação: {taxa:.2f}%
+- Usando dados históricos: {historicos}
+- Tranches de compra: {tranches_buy} (níveis: {levels_buy})
+- Tranches de venda: {tranches_sell} (níveis: {levels_sell})
 
 RESULTADOS FINANCEIROS:
-- Montante final: R${state.montante:,.2f}
-- Lucro total: R${state.montante - montante_inicial:,.2f}
-- Soma de todos os lucros: R${sum(state.lucros):,.2f}
-- Imposto total pago: R${state.total_imposto:,.2f}
-- Taxas totais pagas: R${state.total_taxas:,.2f}
-- BTC final: {state.btc_total:.5f} BTC
+- Montante final: R${r[montante_final]:,.2f}
+- Lucro total: R${r[lucro_total]:,.2f}
+- Soma de todos os lucros: R${r[soma_lucros]:,.2f}
+- Imposto total pago: R${r[imposto_total]:,.2f}
+- Taxas totais pagas: R${r[taxas_totais]:,.2f}
+- BTC final: {r[btc_final]:.5f} BTC
 
 ESTATÍSTICAS:
-- Total de operações realizadas: {len(state.lucros)}
-- Operações com lucro: {sum(1 for l in state.lucros if l > 0)}
-- Operações com prejuízo: {sum(1 for l in state.lucros if l < 0)}
-- Pontos de compra: {len(state.buy_points)}
-- Pontos de venda: {len(state.sell_points)}
+- Total de operações realizadas: {e[operacoes]}
+- Operações com lucro: {e[com_lucro]}
+- Operações com prejuízo: {e[com_prejuizo]}
+- Pontos de compra: {e[pontos_compra]}
+- Pontos de venda: {e[pontos_venda]}
 
 PERÍODO:
-- Data início: {start_operation_time.strftime('%Y-%m-%d %H:%M:%S')}
-- Data fim: {final_time.strftime('%Y-%m-%d %H:%M:%S')}
-- Duração total: {(final_time - start_operation_time).total_seconds() / 3600:.1f} horas
+- Data início: {inicio}
+- Data fim: {fim}
+- Duração total: {p[duracao_horas]:.1f} horas
 
 GESTÃO DE RISCO:
-- Máximo de dobras consecutivas: {params.max_dobrar}
-- Cooldown após stop-loss: {params.cooldown_steps} steps
-- Taxa de câmbio USD/BRL: {params.taxa_cambio}
+- Máximo de dobras consecutivas: {g[max_dobrar]}
+- Cooldown após stop-loss: {g[cooldown_steps]} steps
+- Taxa de câmbio USD/BRL: {g[taxa_cambio]}
 """
-    # Adicionar detalhes das operações
-    if state.operation_details:
-        report += "\nDETALHES DAS OPERAÇÕES:\n"
-        for op_detail in state.operation_details:
-            report += f"""
-Operação #{op_detail['operation_id']}:
-- Motivo venda: {op_detail['motivo_venda']}
-- Lucro: R${op_detail['lucro']:,.2f}
-- Compra média: R${op_detail['preco_compra']:,.2f} | Venda média: R${op_detail['preco_venda']:,.2f}
-- BTC total: {op_detail['btc_comprado']:.5f} | Custo total: R${op_detail['custo_total']:,.2f}
-- Período: {op_detail['start_time'].strftime('%Y-%m-%d %H:%M:%S')} até {op_detail['end_time'].strftime('%Y-%m-%d %H:%M:%S')}
+
+_DETAIL = """
+Operação #{operation_id}:
+- Motivo venda: {motivo_venda}
+- Lucro: R${lucro:,.2f}
+- Compra média: R${preco_compra:,.2f} | Venda média: R${preco_venda:,.2f}
+- BTC total: {btc_comprado:.5f} | Custo total: R${custo_total:,.2f}
+- Período: {inicio} até {fim}
 """
 
+
+def write_report(
+    state: BotState,
+    params: TradingParams,
+    montante_inicial: float,
+    start_operation_time: datetime,
+    final_time: datetime,
+    outputs_dir: Path,
+    historical_used: bool,
+    history: Optional[BoundedHistory] = None,
+    ledger: Optional[TradeLedger] = None,
+    echo: Optional[TextIO] = None,
+) -> Path:
+    """Grava o relatório final em fluxo e devolve o caminho do texto.
+
+    Numa passada pelos detalhes das operações saem o texto (``relatorio_final.txt``,
+    repetido em ``echo`` se dado), o JSON (``relatorio_final.json``: resumo + operações)
+    e o CSV de operações (``operacoes.csv``); cada operação é escrita e descartada, então
+    tempo e memória não dependem de montar o relatório inteiro. Com ``history`` as séries
+    são lidas por faixas do histórico em disco; com ``ledger`` os detalhes vêm de uma
+    consulta ao livro SQLite e o relatório ganha o resumo agregado por motivo de venda.
+    """
+    resumo = _report_summary(state, params, montante_inicial, start_operation_time, final_time, historical_used, history, ledger)
+    if ledger is not None:
+        details = ledger.operations(before_operation=state.current_operation)
+    elif history is not None:
+        details = history.iter_details(state)
+    else:
+        details = state.operation_details
+
     outputs_dir.mkdir(parents=True, exist_ok=True)
-    (outputs_dir / "relatorio_final.txt").write_text(report, encoding="utf-8")
-    return report
-
-
-def create_graph(state: BotState, market: Optional[MarketData], outputs_dir: Path) -> Path:
-    fig, (ax1, ax2) = plt.subplots(2, 1, figsize=(15, 10))
-
-    if market and market.prices:
-        x_prices = range(len(market.prices))
-        ax1.plot(x_prices, market.prices, color="blue", linewidth=1, label="Preço BTC Histórico (R$)")
-        if state.buy_points:
-            buy_indices, buy_prices = zip(*state.buy_points)
-            ax1.scatter(buy_indices, buy_prices, color="green", s=100, marker="^", label="Compras", zorder=5)
-        if state.sell_points:
-            sell_indices, sell_prices = zip(*state.sell_points)
-            ax1.scatter(sell_indices, sell_prices, color="red", s=100, marker="v", label="Vendas", zorder=5)
+    text_path = outputs_dir / REPORT_TEXT
+    with open(text_path, "w", encoding="utf-8") as txt, open(
+        outputs_dir / REPORT_JSON, "w", encoding="utf-8"
+    ) as js, open(outputs_dir / REPORT_CSV, "w", encoding="utf-8", newline="") as cv:
+        sinks = [txt] if echo is None else [txt, echo]
+
+        def _text(chunk: str) -> None:
+            for sink in sinks:
+                sink.write(chunk)
+
+        _text(_format_header(resumo))
+        if resumo["resumo_por_motivo"]:
+            _text("\nRESUMO POR MOTIVO DE VENDA:\n")
+            for linha in resumo["resumo_por_motivo"]:
+                _text(f"- {linha['motivo']}: {linha['operacoes']} operações, lucro R${linha['lucro']:,.2f}\n")
+
+        # JSON aberto à mão: o resumo vai inteiro, a lista de operações é escrita item a item
+        js.write(json.dumps(resumo, ensure_ascii=False, indent=2)[:-2] + ',\n  "operacoes": [')
+        writer = csv.writer(cv)
+        writer.writerow(DETAIL_FIELDS)
+        for n, op_detail in enumerate(details):
+            if n == 0:
+                _text("\nDETALHES DAS OPERAÇÕES:\n")
+            _text(_format_detail(op_detail))
+            row = _detail_row(op_detail)
+            js.write(("," if n else "") + "\n    " + json.dumps(dict(zip(DETAIL_FIELDS, row)), ensure_ascii=False))
+            writer.writerow(row)
+        js.write("\n  ]\n}\n")
+    return text_path
+
+
+def generate_report(
+    state: BotState,
+    params: TradingParams,
+    montante_inicial: float,
+    start_operation_time: datetime,
+    final_time: datetime,
+    outputs_dir: Path,
+    historical_used: bool,
+    history: Optional[BoundedHistory] = None,
+    ledger: Optional[TradeLedger] = None,
+) -> str:
+    """Como ``write_report``, devolvendo também o texto do relatório (lido do arquivo gravado)."""
+    path = write_report(
+        state, params, montante_inicial, start_operation_time, final_time, outputs_dir, historical_used, history, ledger
+    )
+    return path.read_text(encoding="utf-8")
+
+
+def _report_summary(
+    state: BotState,
+    params: TradingParams,
+    montante_inicial: float,
+    start_operation_time: datetime,
+    final_time: datetime,
+    historical_used: bool,
+    history: Optional[BoundedHistory],
+    ledger: Optional[TradeLedger],
+) -> dict:
+    """Números do relatório (sem os detalhes das operações), base do texto e do JSON."""
+    soma, total, com_lucro, com_prejuizo = _lucro_stats(state, history)
+    por_motivo = ledger.summary_by_reason(before_operation=state.current_operation) if ledger is not None else []
+    return {
+        "configuracoes": {
+            "montante_inicial": montante_inicial,
+            "qtd_operacoes": params.qtd_operacoes,
+            "meta_lucro": params.meta_lucro,
+            "stop_loss": params.stop_loss,
+            "taxa_transacao": params.taxa_transacao,
+            "dados_historicos": historical_used,
+            "tranches_buy": list(params.tranches_buy),
+            "levels_buy": list(params.levels_buy),
+            "tranches_sell": list(params.tranches_sell),
+            "levels_sell": list(params.levels_sell),
+        },
+        "resultados": {
+            "montante_final": state.montante,
+            "lucro_total": state.montante - montante_inicial,
+            "soma_lucros": soma,
+            "imposto_total": state.total_imposto,
+            "taxas_totais": state.total_taxas,
+            "btc_final": state.btc_total,
+        },
+        "estatisticas": {
+            "operacoes": total,
+            "com_lucro": com_lucro,
+            "com_prejuizo": com_prejuizo,
+            "pontos_compra": _count(state, history, "buy_points"),
+            "pontos_venda": _count(state, history, "sell_points"),
+        },
+        "periodo": {
+            "inicio": start_operation_time.isoformat(),
+            "fim": final_time.isoformat(),
+            "duracao_horas": (final_time - start_operation_time).total_seconds() / 3600,
+        },
+        "gestao_risco": {
+            "max_dobrar": params.max_dobrar,
+            "cooldown_steps": params.cooldown_steps,
+            "taxa_cambio": params.taxa_cambio,
+        },
+        "resumo_por_motivo": [{"motivo": m, "operacoes": n, "lucro": lucro} for m, n, lucro in por_motivo],
+    }
+
+
+def _format_header(resumo: dict) -> str:
+    c = resumo["configuracoes"]
+    return _HEADER.format(
+        c=c,
+        r=resumo["resultados"],
+        e=resumo["estatisticas"],
+        p=resumo["periodo"],
+        g=resumo["gestao_risco"],
+        meta=c["meta_lucro"] * 100,
+        stop=c["stop_loss"] * 100,
+        taxa=c["taxa_transacao"] * 100,
+        historicos="Sim" if c["dados_historicos"] else "Não",
+        tranches_buy=" ".join(map(str, c["tranches_buy"])),
+        levels_buy=" ".join(map(str, c["levels_buy"])),
+        tranches_sell=" ".join(map(str, c["tranches_sell"])),
+        levels_sell=" ".join(map(str, c["levels_sell"])),
+        inicio=datetime.fromisoformat(resumo["periodo"]["inicio"]).strftime("%Y-%m-%d %H:%M:%S"),
+        fim=datetime.fromisoformat(resumo["periodo"]["fim"]).strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+
+def _format_detail(op_detail: dict) -> str:
+    return _DETAIL.format(
+        inicio=op_detail["start_time"].strftime("%Y-%m-%d %H:%M:%S"),
+        fim=op_detail["end_time"].strftime("%Y-%m-%d %H:%M:%S"),
+        **{k: op_detail[k] for k in DETAIL_FIELDS if not k.endswith("_time")},
+    )
+
+
+def _detail_row(op_detail: dict) -> tuple:
+    return tuple(op_detail[k].isoformat() if k.endswith("_time") else op_detail[k] for k in DETAIL_FIELDS)
+
+
+GRAPH_DPI = 300
+GRAPH_SIZE = (15.0, 10.0)
+MARKER_BINS = 400  # acima disso, compras/vendas são agrupadas por faixa do eixo x
+_SALDO_MARKERS = 200  # marcador em cada ponto do saldo só em séries curtas
+
+
+def create_graph(
+    state: BotState,
+    market: Optional[MarketData],
+    outputs_dir: Path,
+    history: Optional[BoundedHistory] = None,
+    dpi: int = GRAPH_DPI,
+    size: Tuple[float, float] = GRAPH_SIZE,
+) -> Path:
+    """Gráfico de preços com compras/vendas e da evolução do saldo (``simulacao_horaria.png``).
+
+    As séries são reduzidas à resolução da imagem antes de plotar: preços por mín/máx em
+    cada coluna de pixels, saldo por LTTB; marcadores densos viram um marcador por faixa,
+    com tamanho proporcional à quantidade. O custo de desenho depende de ``size`` e ``dpi``,
+    não do tamanho do histórico.
+    """
+    colunas = max(int(size[0] * dpi), 1)
+    # Figure sem pyplot: nenhum estado global, pode desenhar fora da thread principal
+    fig = Figure(figsize=size)
+    ax1, ax2 = fig.subplots(2, 1)
+    saldo_history = np.asarray(_series(state, history, "saldo_history"), dtype=float)
+
+    if market and market.has_data():
+        prices = np.asarray(market.prices, dtype=float)
+        visiveis = min_max(prices, colunas)
+        ax1.plot(visiveis, prices[visiveis], color="blue", linewidth=1, label="Preço BTC Histórico (R$)")
+        _scatter_points(ax1, _series(state, history, "buy_points"), "green", "^", "Compras")
+        _scatter_points(ax1, _series(state, history, "sell_points"), "red", "v", "Vendas")
         ax1.set_ylabel("Preço BTC (R$)", color="blue")
         ax1.set_title("Simulação do Bot com Dados Históricos")
         ax1.legend(loc="upper left")
         ax1.grid(True, alpha=0.3)
     else:
-        ax1.plot(range(1, len(state.lucros) + 1), state.precos_venda, marker="s", linestyle="-", color="g", label="Preço BTC (R$)")
+        precos = np.asarray(_series(state, history, "precos_venda"), dtype=float)
+        x_precos = np.arange(1, len(precos) + 1)
+        visiveis = lttb(x_precos, precos, colunas)
+        marker = "s" if len(visiveis) <= _SALDO_MARKERS else None
+        ax1.plot(x_precos[visiveis], precos[visiveis], marker=marker, linestyle="-", color="g", label="Preço BTC (R$)")
         ax1.set_ylabel("Preço BTC (R$)")
         ax1.set_title("Simulação do Bot (Dados Sintéticos)")
         ax1.legend()
 
-    if state.saldo_history:
-        x_saldo = range(1, len(state.saldo_history) + 1)
-        ax2.plot(x_saldo, state.saldo_history, color="orange", linewidth=2, marker="o", markersize=4, label="Saldo (R$)")
-        ax2.fill_between(x_saldo, state.saldo_history, alpha=0.3, color="orange")
+    if len(saldo_history):
+        x_saldo = np.arange(1, len(saldo_history) + 1)
+        visiveis = lttb(x_saldo, saldo_history, colunas)
+        x_saldo, saldo_history = x_saldo[visiveis], saldo_history[visiveis]
+        marker = "o" if len(visiveis) <= _SALDO_MARKERS else None
+        ax2.plot(x_saldo, saldo_history, color="orange", linewidth=2, marker=marker, markersize=4, label="Saldo (R$)")
+        ax2.fill_between(x_saldo, saldo_history, alpha=0.3, color="orange")
         ax2.set_xlabel("Operações Executadas")
         ax2.set_ylabel("Saldo (R$)", color="orange")
         ax2.set_title("Evolução do Saldo por Operação Executada")
@@ -136,14 +336,48 @@ def create_graph(state: BotState, market: Optional[MarketData], outputs_dir: Pat
     ax2.legend(loc="upper left")
     ax2.grid(True, alpha=0.3)
 
-    plt.tight_layout()
+    fig.tight_layout()
     outputs_dir.mkdir(parents=True, exist_ok=True)
     graph_path = outputs_dir / "simulacao_horaria.png"
-    plt.savefig(graph_path, dpi=300, bbox_inches="tight")
-    plt.close(fig)
+    # Sem bbox_inches="tight": o layout já foi ajustado e o recorte custaria um segundo desenho
+    fig.savefig(graph_path, dpi=dpi)
     return graph_path
 
 
+def _scatter_points(ax, points, color: str, marker: str, label: str) -> None:
+    if not len(points):
+        return
+    x, y, quantidade = bin_markers(*_unzip(points), MARKER_BINS)
+    tamanho = np.maximum(100 * np.sqrt(quantidade / quantidade.max()), 20) if quantidade.max() > 1 else 100
+    ax.scatter(x, y, color=color, s=tamanho, marker=marker, label=label, zorder=5)
+
+
+def _lucro_stats(state: BotState, history: Optional[BoundedHistory]):
+    """(soma, operações, com lucro, com prejuízo) de ``lucros``, bloco a bloco quando há histórico."""
+    blocos = history.chunks("lucros", state) if history is not None else [np.asarray(state.lucros, dtype=float)]
+    soma, total, com_lucro, com_prejuizo = 0.0, 0, 0, 0
+    for bloco in blocos:
+        soma += float(bloco.sum())
+        total += len(bloco)
+        com_lucro += int((bloco > 0).sum())
+        com_prejuizo += int((bloco < 0).sum())
+    return soma, total, com_lucro, com_prejuizo
+
+
+def _series(state: BotState, history: Optional[BoundedHistory], name: str):
+    return history.series(name, state) if history is not None else getattr(state, name)
+
+
+def _count(state: BotState, history: Optional[BoundedHistory], name: str) -> int:
+    return history.count(name, state) if history is not None else len(getattr(state, name))
+
+
+def _unzip(points):
+    if isinstance(points, np.ndarray):  # array estruturado do histórico
+        return points["idx"], points["preco"]
+    return tuple(zip(*points))
+
+
 def graph_due_real(force: bool = False) -> bool:
     now = datetime.now()
     if force:
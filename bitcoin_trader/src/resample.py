@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from . import price_cache
+from .models import ArrayMarketData
+from .utils import load_price_arrays
+
+
+@dataclass
+class OHLCBars:
+    """Barras OHLC (preços em USD); ``timestamps_ns`` marca o início de cada barra."""
+
+    timestamps_ns: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.timestamps_ns)
+
+    def to_market(self, taxa_cambio: float) -> ArrayMarketData:
+        """Série de fechamentos em BRL para o motor."""
+        return ArrayMarketData(self.close * taxa_cambio, self.timestamps_ns)
+
+
+def parse_timeframe(timeframe: str) -> int:
+    """Converte ``1min``, ``15min``, ``4h``, ``1d``... para nanossegundos."""
+    if not any(ch.isalpha() for ch in timeframe):
+        raise ValueError(f"Timeframe sem unidade: {timeframe} (use ex.: 15min, 1h, 1d)")
+    try:
+        ns = pd.Timedelta(timeframe).value
+    except ValueError as exc:
+        raise ValueError(f"Timeframe inválido: {timeframe}") from exc
+    if ns <= 0:
+        raise ValueError(f"Timeframe deve ser positivo: {timeframe}")
+    return ns
+
+
+def resample_ohlc(timestamps_ns: np.ndarray, prices: np.ndarray, timeframe_ns: int) -> OHLCBars:
+    """Agrega ticks em barras de ``timeframe_ns`` alinhadas à época; intervalos vazios não geram barra."""
+    timestamps_ns = np.asarray(timestamps_ns, dtype=np.int64)
+    prices = np.asarray(prices, dtype=np.float64)
+    if len(timestamps_ns) and np.any(np.diff(timestamps_ns) < 0):
+        ordem = np.argsort(timestamps_ns, kind="stable")
+        timestamps_ns, prices = timestamps_ns[ordem], prices[ordem]
+    if not len(timestamps_ns):
+        vazio = np.empty(0, dtype=np.float64)
+        return OHLCBars(np.empty(0, dtype=np.int64), vazio, vazio, vazio, vazio)
+
+    bins = np.floor_divide(timestamps_ns, timeframe_ns)
+    starts = np.flatnonzero(np.r_[True, bins[1:] != bins[:-1]])
+    ends = np.r_[starts[1:], len(prices)]
+    return OHLCBars(
+        timestamps_ns=bins[starts] * timeframe_ns,
+        open=prices[starts],
+        high=np.maximum.reduceat(prices, starts),
+        low=np.minimum.reduceat(prices, starts),
+        close=prices[ends - 1],
+    )
+
+
+def load_ohlc(csv_file: Path, timeframe: str, use_cache: bool = True) -> OHLCBars:
+    """Barras do CSV no timeframe pedido, com cache próprio por dataset + timeframe."""
+    timeframe_ns = parse_timeframe(timeframe)
+    suffix = f".ohlc-{timeframe_ns}ns"
+    cached = price_cache.load_cached(csv_file, suffix) if use_cache else None
+    if cached is not None:
+        ohlc, timestamps_ns = cached
+        return OHLCBars(timestamps_ns, ohlc[:, 0], ohlc[:, 1], ohlc[:, 2], ohlc[:, 3])
+
+    prices_usd, timestamps_ns = load_price_arrays(csv_file, use_cache)
+    bars = resample_ohlc(timestamps_ns, prices_usd, timeframe_ns)
+    if use_cache:
+        ohlc = np.column_stack([bars.open, bars.high, bars.low, bars.close])
+        price_cache.store(csv_file, ohlc, bars.timestamps_ns, suffix)
+    return bars
+
+
+def load_resampled_market(
+    csv_file: Path, taxa_cambio: float, timeframe: str, use_cache: bool = True
+) -> ArrayMarketData:
+    """Atalho do CLI: fechamentos das barras em BRL."""
+    return load_ohlc(csv_file, timeframe, use_cache).to_market(taxa_cambio)
@@ -1,40 +1,186 @@
 from __future__ import annotations
 
+import asyncio
+import copy
 from dataclasses import replace
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Tuple
+from typing import AsyncContextManager, Callable, Optional, Tuple
 
 import logging
 
+from .async_exchange import AsyncExchangeInterface, run_engine_async
+from .daemon import BarClock, DaemonStopped, ScheduledExchange
+from .history import BoundedHistory
+from .market_stream import StreamingMarketData
 from .models import BotState, MarketData, Paths, TradingParams
+from .resample import load_resampled_market
 from .trading_engine import TradingEngine
-from .utils import load_csv_prices, load_state, reset_state_if_new_run, save_state
+from .state_journal import StateJournal
+from .utils import load_csv_prices, load_market_arrays, reset_state_if_new_run
 
 
 class Simulator:
-    """Orquestra a simulação nos modos teste e real."""
+    """Orquestra a simulação nos modos teste e real.
 
-    def __init__(self, engine: TradingEngine, paths: Paths, logger: logging.Logger):
+    Com ``history``, o modo real mantém no estado só os itens recentes das listas;
+    o restante fica no histórico em disco, gravado a cada checkpoint.
+    """
+
+    def __init__(
+        self,
+        engine: TradingEngine,
+        paths: Paths,
+        logger: logging.Logger,
+        history: Optional[BoundedHistory] = None,
+    ):
         self.engine = engine
         self.paths = paths
         self.logger = logger
+        self.journal = StateJournal(paths.state_file)
+        self.history = history
+
+    def run_test(
+        self,
+        csv_file: Path,
+        trading: TradingParams,
+        use_cache: bool = True,
+        arrays: bool = False,
+        chunk_rows: Optional[int] = None,
+        timeframe: Optional[str] = None,
+        resume: bool = False,
+        checkpoint_ops: int = 0,
+    ) -> Tuple[BotState, MarketData, datetime]:
+        """Backtest sobre o CSV, continuando do estado da última execução concluída.
 
-    def run_test(self, csv_file: Path, trading: TradingParams) -> Tuple[BotState, MarketData, datetime]:
-        market = load_csv_prices(csv_file, trading.taxa_cambio)
-        state = load_state(self.paths.state_file) or BotState()
+        Com ``checkpoint_ops`` > 0 o estado é gravado a cada tantas operações concluídas;
+        ``resume`` continua do último desses checkpoints (execução interrompida), mantendo
+        o início e os detalhes das operações da execução original.
+        """
+        if checkpoint_ops < 0:
+            raise ValueError("checkpoint_ops não pode ser negativo")
+        if timeframe:
+            market = load_resampled_market(csv_file, trading.taxa_cambio, timeframe, use_cache)
+        elif chunk_rows:
+            market = StreamingMarketData.from_csv(csv_file, trading.taxa_cambio, chunk_rows, use_cache)
+        else:
+            loader = load_market_arrays if arrays else load_csv_prices
+            market = loader(csv_file, trading.taxa_cambio, use_cache=use_cache)
+        state = (self.journal.load() if resume else self.journal.load_last_run()) or BotState()
         state = reset_state_if_new_run(state, trading)
-        start_time = state.current_operation_time
+        self._reconcile_ledger(state)
+        if not resume or state.run_start_time is None:
+            state.run_start_time = state.current_operation_time
+        start_time = state.run_start_time
 
-        state = self.engine.run_operations(market, state)
-        save_state(state, self.paths.state_file)
+        def _checkpoint(op: int, atual: BotState) -> None:
+            if op % checkpoint_ops == 0:
+                self.journal.checkpoint(atual)
+
+        state = self.engine.run_operations(market, state, on_operation=_checkpoint if checkpoint_ops else None)
+        self._persist(state)
         return state, market, start_time
 
-    def run_real(self, trading: TradingParams) -> Tuple[BotState, Optional[MarketData], datetime]:
-        state = load_state(self.paths.state_file) or BotState()
-        state = reset_state_if_new_run(state, trading)
+    def run_real(
+        self, trading: TradingParams, async_session: Optional[AsyncContextManager[AsyncExchangeInterface]] = None
+    ) -> Tuple[BotState, Optional[MarketData], datetime]:
+        """Modo real; com ``async_session`` a exchange é assíncrona (ver ``run_real_async``)."""
+        if async_session is not None:
+            return asyncio.run(self.run_real_async(trading, async_session))
+        state = self._load_real(trading)
         start_time = state.current_operation_time
 
         state = self.engine.run_operations(None, state)
-        save_state(state, self.paths.state_file)
+        self._persist(state, real=True)
         return state, None, start_time
+
+    async def run_real_async(
+        self, trading: TradingParams, async_session: AsyncContextManager[AsyncExchangeInterface]
+    ) -> Tuple[BotState, Optional[MarketData], datetime]:
+        """Modo real sobre uma exchange assíncrona: cotações e ordens trafegam em paralelo."""
+        state = self._load_real(trading)
+        start_time = state.current_operation_time
+
+        async with async_session as exchange:
+            state = await run_engine_async(self.engine, exchange, None, state)
+        self._persist(state, real=True)
+        return state, None, start_time
+
+    def run_daemon(
+        self,
+        trading: TradingParams,
+        clock: BarClock,
+        checkpoint_ops: int = 1,
+        on_checkpoint: Optional[Callable[[BotState, datetime], None]] = None,
+    ) -> Tuple[BotState, Optional[MarketData], datetime]:
+        """Modo real num processo só: uma cotação por barra do ``clock`` até concluir as operações.
+
+        Motor, exchange e estado ficam em memória; o estado vai para disco a cada
+        ``checkpoint_ops`` operações concluídas. Se ``clock.stop`` for acionado, a operação
+        em andamento é descartada e fica salvo o estado da última operação concluída.
+        ``on_checkpoint`` recebe, a cada checkpoint, uma cópia do estado que o daemon não
+        altera mais (ex.: ``ReportWorker.submit``) e o início da execução.
+        """
+        if checkpoint_ops <= 0:
+            raise ValueError("checkpoint_ops deve ser positivo")
+        state = self._load_real(trading)
+        start_time = state.current_operation_time
+        concluido = copy.deepcopy(state)
+
+        def _checkpoint(op: int, atual: BotState) -> None:
+            nonlocal concluido
+            salvar = op % checkpoint_ops == 0
+            if salvar:
+                self._checkpoint_real(atual)
+            concluido = copy.deepcopy(atual)
+            if salvar and on_checkpoint is not None:
+                on_checkpoint(concluido, start_time)
+
+        original = self.engine.exchange
+        scheduled = ScheduledExchange(original, clock)
+        self.engine.exchange = scheduled
+        try:
+            state = self.engine.run_operations(None, state, on_operation=_checkpoint)
+        except DaemonStopped:
+            self.logger.warning(
+                f"Daemon interrompido na operação {concluido.current_operation}: a operação em andamento "
+                "foi descartada e o estado da última operação concluída foi salvo"
+            )
+            # Cópia: ``concluido`` pode estar com o ``on_checkpoint`` e o checkpoint final o altera
+            state = copy.deepcopy(concluido)
+        finally:
+            self.engine.exchange = original
+        self._persist(state, real=True)
+        if scheduled.ticks:
+            self.logger.info(
+                f"Daemon: {scheduled.ticks} cotações, passo médio do motor "
+                f"{scheduled.engine_seconds / scheduled.ticks * 1000:.3f} ms (máx. {scheduled.max_engine_seconds * 1000:.3f} ms), "
+                f"{clock.skipped} barras puladas"
+            )
+        return state, None, start_time
+
+    def _load_real(self, trading: TradingParams) -> BotState:
+        state = self.journal.load() or BotState()
+        if self.history is not None:
+            self.history.reconcile(state)
+        self._reconcile_ledger(state)
+        return reset_state_if_new_run(state, trading)
+
+    def _reconcile_ledger(self, state: BotState) -> None:
+        # O livro acompanha o estado carregado: operações além dele são de execução interrompida ou de outro estado
+        if self.engine.ledger is not None:
+            self.engine.ledger.reconcile(state)
+
+    def _checkpoint_real(self, state: BotState) -> None:
+        # Histórico primeiro: se cair antes do checkpoint, ``reconcile`` corta o excedente do disco
+        if self.history is not None:
+            self.history.absorb(state)
+        self.journal.checkpoint(state)
+
+    def _persist(self, state: BotState, real: bool = False) -> None:
+        """Checkpoint no journal e cópia legível em JSON, ao fim de cada execução."""
+        if real:
+            self._checkpoint_real(state)
+        else:
+            self.journal.checkpoint(state)
+        self.journal.export_json(state)
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .models import BotState
+from .state_snapshot import decode_state, export_json, snapshot_seq, write_snapshot
+from .utils import state_from_dict, state_to_dict
+
+# Listas do BotState que só crescem: o journal grava apenas os itens novos
+APPEND_FIELDS = (
+    "lucros",
+    "precos_venda",
+    "variacoes_compra",
+    "variacoes_venda",
+    "buy_points",
+    "sell_points",
+    "saldo_history",
+    "operation_details",
+)
+
+
+class StateJournal:
+    """Estado persistente como snapshot compactado + journal append-only de deltas.
+
+    Cada ``checkpoint`` acrescenta ao ``.journal`` uma linha JSON com os campos
+    alterados e os itens novos das listas (custo proporcional à mudança, não ao
+    histórico). A cada ``compact_every`` entradas o estado inteiro vira um novo
+    snapshot binário (``.snap``), gravado de forma atômica, e o journal recomeça.
+    ``load`` lê o snapshot e reaplica o journal; uma última linha incompleta (queda no
+    meio da escrita) é ignorada. ``state_file`` (JSON) é só a cópia legível de
+    ``export_json``; sem ``.snap`` ele é lido como snapshot (formato anterior).
+    """
+
+    def __init__(self, state_file: Path, compact_every: int = 100, fsync: bool = True):
+        if compact_every <= 0:
+            raise ValueError("compact_every deve ser positivo")
+        self.state_file = Path(state_file)
+        self.snapshot_file = self.state_file.with_suffix(".snap")
+        self.journal_file = self.state_file.with_suffix(".journal")
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self.seq = 0  # número da última entrada gravada (snapshot ou delta)
+        self.entries = 0  # deltas no journal desde o último snapshot
+        self._base: Optional[Dict[str, object]] = None  # valores escalares do último checkpoint
+        self._tails: Dict[str, Tuple[int, object]] = {}  # (tamanho, último item) de cada lista
+
+    def load(self) -> Optional[BotState]:
+        data = None
+        self.seq = 0
+        if self.snapshot_file.exists():
+            bruto = self.snapshot_file.read_bytes()
+            data = state_to_dict(decode_state(bruto))
+            self.seq = snapshot_seq(bruto)
+        elif self.state_file.exists():
+            data = json.loads(self.state_file.read_text())
+            self.seq = int(data.pop("journal_seq", 0))
+        self.entries = 0
+        if self.journal_file.exists():
+            with open(self.journal_file, "rb") as fh:
+                for line in fh:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:  # linha truncada por queda durante o append
+                        break
+                    if entry["seq"] <= self.seq:  # já incluída no snapshot (queda antes de truncar)
+                        continue
+                    data = _apply(data or {}, entry)
+                    self.seq = entry["seq"]
+                    self.entries += 1
+        if data is None:
+            return None
+        state = state_from_dict(data)
+        self._remember(state_to_dict(state))
+        return state
+
+    def load_last_run(self) -> Optional[BotState]:
+        """Estado ao fim da última execução concluída: a cópia em ``state_file``, que só é gravada no fim.
+
+        Ignora checkpoints de uma execução interrompida depois dela (esses são lidos por ``load``).
+        Sem ``.snap`` (formato anterior) ``state_file`` é o próprio snapshot e vale ``load``.
+        """
+        if not (self.snapshot_file.exists() and self.state_file.exists()):
+            return self.load()
+        data = json.loads(self.state_file.read_text())
+        data.pop("journal_seq", None)
+        return state_from_dict(data)
+
+    def checkpoint(self, state: BotState) -> None:
+        atual = state_to_dict(state)
+        if self._base is None or self.entries + 1 >= self.compact_every:
+            self.compact(state, atual)
+            return
+        entry = self._delta(atual)
+        if not entry:
+            return
+        self.seq += 1
+        entry["seq"] = self.seq
+        linha = json.dumps(entry, separators=(",", ":"), default=str).encode() + b"\n"
+        with open(self.journal_file, "ab") as fh:
+            fh.write(linha)
+            fh.flush()
+            if self.fsync:
+                os.fsync(fh.fileno())
+        self.entries += 1
+        self._remember(atual)
+
+    def compact(self, state: BotState, atual: Optional[dict] = None) -> None:
+        """Grava o estado inteiro como snapshot (atômico) e zera o journal."""
+        atual = atual if atual is not None else state_to_dict(state)
+        if self._base is None and self.journal_file.exists():  # início sem load: journal antigo não vale mais
+            os.truncate(self.journal_file, 0)
+        self.seq += 1
+        write_snapshot(self.snapshot_file, state, self.seq, fsync=self.fsync)
+        # Se cair aqui, o load pula as entradas antigas pelo journal_seq do snapshot
+        if self.journal_file.exists():
+            os.truncate(self.journal_file, 0)
+        self.entries = 0
+        self._remember(atual)
+
+    def export_json(self, state: BotState) -> Path:
+        """Grava a cópia legível do estado em ``state_file``."""
+        return export_json(state, self.state_file)
+
+    def _delta(self, atual: dict) -> dict:
+        novos: Dict[str, object] = {}
+        alterados: Dict[str, object] = {}
+        for campo in APPEND_FIELDS:
+            lista = atual[campo]
+            tamanho, ultimo = self._tails[campo]
+            # Só cresceu se o prefixo gravado continua lá (checagem barata pelo último item)
+            if len(lista) >= tamanho and (tamanho == 0 or lista[tamanho - 1] == ultimo):
+                if len(lista) > tamanho:
+                    novos[campo] = lista[tamanho:]
+            else:
+                alterados[campo] = lista
+        for campo, valor in atual.items():
+            if campo not in APPEND_FIELDS and self._base.get(campo) != valor:
+                alterados[campo] = valor
+        entry = {}
+        if alterados:
+            entry["set"] = alterados
+        if novos:
+            entry["append"] = novos
+        return entry
+
+    def _remember(self, atual: dict) -> None:
+        # Cópia dos dicts: alterados no lugar (ex.: ``archived``), não seriam detectados na comparação
+        self._base = {k: dict(v) if isinstance(v, dict) else v for k, v in atual.items() if k not in APPEND_FIELDS}
+        self._tails = {c: (len(atual[c]), atual[c][-1] if atual[c] else None) for c in APPEND_FIELDS}
+
+
+def _apply(data: dict, entry: dict) -> dict:
+    data.update(entry.get("set", {}))
+    for campo, itens in entry.get("append", {}).items():
+        data.setdefault(campo, []).extend(itens)
+    return data
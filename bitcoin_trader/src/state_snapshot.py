@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+import argparse
+import json
+import struct
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from .models import BotState, Position, Tranche
+from .utils import _parse_dt, atomic_write_bytes, detail_from_dict, state_to_dict
+
+MAGIC = b"BTST"
+VERSION = 2
+# v2: bloco JSON final com campos sem layout fixo (detalhes das operações, início da execução);
+# chaves ausentes ficam no default, então campos novos entram sem mudar a versão. v1 continua legível.
+_HEADER = struct.Struct("<4sHQ")  # magic, versão, sequência do journal
+# btc_total, montante, last_price, total_lucro, total_imposto, total_taxas,
+# current_index, current_operation, consecutive_losses, cooldown_remaining
+_SCALARS = struct.Struct("<6d4q")
+_COUNT = struct.Struct("<Q")
+_FLOAT_LISTS = ("lucros", "precos_venda", "variacoes_compra", "variacoes_venda", "saldo_history")
+
+
+def encode_state(state: BotState, seq: int = 0) -> bytes:
+    """Snapshot binário do BotState: cabeçalho versionado, escalares e listas como arrays float64/int64."""
+    partes = [
+        _HEADER.pack(MAGIC, VERSION, seq),
+        _SCALARS.pack(
+            state.btc_total,
+            state.montante,
+            state.last_price,
+            state.total_lucro,
+            state.total_imposto,
+            state.total_taxas,
+            state.current_index,
+            state.current_operation,
+            state.consecutive_losses,
+            state.cooldown_remaining,
+        ),
+        _pack_text(state.current_operation_time.isoformat()),
+        _pack_text(state.last_operation_time.isoformat()),
+        _pack_text(state.ultimo_motivo_venda),
+    ]
+    for campo in _FLOAT_LISTS:
+        partes.append(_pack_array(np.asarray(getattr(state, campo), dtype=np.float64)))
+    for pontos in (state.buy_points, state.sell_points):
+        indices, precos = _split_points(pontos)
+        partes += [_pack_array(indices), _pack_array(precos)]
+    tranches = list(state.btc_tranches)
+    partes += [
+        _pack_array(np.array([t.btc for t in tranches], dtype=np.float64)),
+        _pack_array(np.array([t.preco_compra for t in tranches], dtype=np.float64)),
+        _pack_array(np.array([t.tranche_idx for t in tranches], dtype=np.int64)),
+        _pack_text(json.dumps(_extras(state), separators=(",", ":"), default=str)),
+    ]
+    return b"".join(partes)
+
+
+def snapshot_seq(data: bytes) -> int:
+    """Sequência do journal gravada no cabeçalho (valida magic e versão)."""
+    if len(data) < _HEADER.size:
+        raise ValueError("Snapshot de estado truncado")
+    magic, version, seq = _HEADER.unpack_from(data, 0)
+    if magic != MAGIC:
+        raise ValueError("Arquivo não é um snapshot de estado")
+    if not 1 <= version <= VERSION:
+        raise ValueError(f"Versão de snapshot não suportada: {version} (suportadas: 1 a {VERSION})")
+    return seq
+
+
+def decode_state(data: bytes) -> BotState:
+    snapshot_seq(data)
+    version = _HEADER.unpack_from(data, 0)[1]
+    leitor = _Reader(data, _HEADER.size)
+    escalares = leitor.unpack(_SCALARS)
+    current_operation_time = _parse_dt(leitor.text())
+    last_operation_time = _parse_dt(leitor.text())
+    motivo = leitor.text()
+    listas = {campo: leitor.array(np.float64).tolist() for campo in _FLOAT_LISTS}
+    pontos = []
+    for _ in range(2):
+        indices, precos = leitor.array(np.int64), leitor.array(np.float64)
+        pontos.append(list(zip(indices.tolist(), precos.tolist())))
+    btc, preco, idx = leitor.array(np.float64), leitor.array(np.float64), leitor.array(np.int64)
+    position = Position()
+    for b, p, i in zip(btc.tolist(), preco.tolist(), idx.tolist()):
+        position.add(Tranche(b, p, i))
+    extras = json.loads(leitor.text()) if version >= 2 else {}
+    return BotState(
+        btc_total=escalares[0],
+        btc_tranches=position,
+        montante=escalares[1],
+        last_price=escalares[2],
+        total_lucro=escalares[3],
+        total_imposto=escalares[4],
+        total_taxas=escalares[5],
+        buy_points=pontos[0],
+        sell_points=pontos[1],
+        current_index=escalares[6],
+        current_operation_time=current_operation_time,
+        last_operation_time=last_operation_time,
+        current_operation=escalares[7],
+        ultimo_motivo_venda=motivo,
+        consecutive_losses=escalares[8],
+        cooldown_remaining=escalares[9],
+        operation_details=[detail_from_dict(d) for d in extras.get("operation_details", [])],
+        run_start_time=_parse_dt(extras["run_start_time"]) if extras.get("run_start_time") else None,
+        archived=extras.get("archived", {}),
+        **listas,
+    )
+
+
+def write_snapshot(path: Path, state: BotState, seq: int = 0, fsync: bool = True) -> None:
+    atomic_write_bytes(path, encode_state(state, seq), fsync=fsync)
+
+
+def read_snapshot(path: Path) -> BotState:
+    return decode_state(Path(path).read_bytes())
+
+
+def export_json(state: BotState, path: Path) -> Path:
+    """Cópia legível (o mesmo JSON do ``bot_state.json`` histórico)."""
+    atomic_write_bytes(path, json.dumps(state_to_dict(state), indent=2, default=str).encode(), fsync=False)
+    return path
+
+
+def _extras(state: BotState) -> dict:
+    return {
+        "operation_details": state.operation_details,
+        "run_start_time": state.run_start_time.isoformat() if state.run_start_time else None,
+        "archived": state.archived,
+    }
+
+
+def _pack_text(texto: Optional[str]) -> bytes:
+    if texto is None:
+        return _COUNT.pack(2**64 - 1)  # marca None
+    dados = texto.encode()
+    return _COUNT.pack(len(dados)) + dados
+
+
+def _pack_array(array: np.ndarray) -> bytes:
+    return _COUNT.pack(len(array)) + np.ascontiguousarray(array).tobytes()
+
+
+def _split_points(pontos: List[Tuple[int, float]]) -> Tuple[np.ndarray, np.ndarray]:
+    if not pontos:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64)
+    indices, precos = zip(*pontos)
+    return np.array(indices, dtype=np.int64), np.array(precos, dtype=np.float64)
+
+
+class _Reader:
+    def __init__(self, data: bytes, pos: int):
+        self.data = data
+        self.pos = pos
+
+    def unpack(self, fmt: struct.Struct) -> tuple:
+        valores = fmt.unpack_from(self.data, self.pos)
+        self.pos += fmt.size
+        return valores
+
+    def text(self) -> Optional[str]:
+        (tamanho,) = self.unpack(_COUNT)
+        if tamanho == 2**64 - 1:
+            return None
+        texto = self.data[self.pos : self.pos + tamanho].decode()
+        self.pos += tamanho
+        return texto
+
+    def array(self, dtype) -> np.ndarray:
+        (tamanho,) = self.unpack(_COUNT)
+        array = np.frombuffer(self.data, dtype=dtype, count=tamanho, offset=self.pos)
+        self.pos += array.nbytes
+        return array
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Exporta um snapshot binário de estado (.snap) para JSON")
+    parser.add_argument("snapshot", type=Path, help="Arquivo .snap (ex.: outputs/bot_state.snap)")
+    parser.add_argument("--out", type=Path, default=None, help="JSON de saída (default: mesmo nome com .json)")
+    args = parser.parse_args()
+    destino = export_json(read_snapshot(args.snapshot), args.out or args.snapshot.with_suffix(".json"))
+    print(f"Estado exportado para {destino}")
+
+
+if __name__ == "__main__":
+    main()
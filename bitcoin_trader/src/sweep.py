@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import csv
+import itertools
+import logging
+import os
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields, replace
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Type
+
+from .exchange_interface import MockExchange
+from .models import ArrayMarketData, BotState, MarketData, TradingParams
+from .trading_engine import TradingEngine
+from .utils import reset_state_if_new_run, validate_tranches
+
+# Tipos das anotações de TradingParams (strings por causa de ``from __future__ import annotations``)
+_FIELD_TYPES = {f.name: f.type for f in fields(TradingParams)}
+
+# Estado de cada worker do pool: dados carregados uma única vez por processo
+_worker_market: Optional[MarketData] = None
+_worker_engine: Type[TradingEngine] = TradingEngine
+
+
+@dataclass
+class SweepResult:
+    """Resultado resumido de uma combinação de parâmetros."""
+
+    params: TradingParams
+    montante_final: float
+    total_lucro: float
+    total_taxas: float
+    operacoes_lucro: int
+    operacoes_prejuizo: int
+    operacoes: int
+    stop_losses: int = 0
+    btc_aberto: float = 0.0  # posição que ficou aberta no fim dos dados
+    preco_final: float = 0.0  # último preço da série, para marcar ``btc_aberto`` a mercado
+    saldo_history: List[float] = field(default_factory=list, repr=False)
+
+    @property
+    def equity(self) -> float:
+        """Montante final com a posição aberta marcada a mercado pelo último preço."""
+        return self.montante_final + self.btc_aberto * self.preco_final
+
+    def equity_history(self) -> List[float]:
+        """``saldo_history`` com o último ponto marcado a mercado quando a posição ficou aberta."""
+        saldos = list(self.saldo_history)
+        if self.btc_aberto and saldos:
+            saldos[-1] = self.equity
+        return saldos
+
+
+def parse_grid_spec(spec: str) -> Tuple[str, List[Any]]:
+    """Interpreta ``campo=v1,v2,...`` ou ``campo=inicio:fim:passo``.
+
+    Campos de tupla (levels/tranches) usam ``/`` entre os elementos de cada valor,
+    ex.: ``levels_sell=0.01/0.03/0.05,0.005/0.01/0.02``.
+    """
+    if "=" not in spec:
+        raise ValueError(f"Grid inválido '{spec}': use campo=valores")
+    name, raw = (part.strip() for part in spec.split("=", 1))
+    if name not in _FIELD_TYPES:
+        raise ValueError(f"Campo desconhecido em TradingParams: {name}")
+    if not raw:
+        raise ValueError(f"Grid sem valores para o campo {name}")
+
+    kind = _FIELD_TYPES[name]
+    if kind.startswith("Sequence"):
+        values: List[Any] = [tuple(float(x) for x in item.split("/")) for item in raw.split(",")]
+    elif ":" in raw and kind in ("float", "int"):
+        values = _expand_range(raw, int if kind == "int" else float)
+    else:
+        values = [_convert(item.strip(), kind) for item in raw.split(",")]
+    return name, values
+
+
+def build_param_grid(base: TradingParams, grid: Dict[str, Sequence[Any]]) -> List[TradingParams]:
+    """Produto cartesiano do grid sobre os parâmetros base, descartando combinações inválidas."""
+    names = list(grid)
+    combos: List[TradingParams] = []
+    for values in itertools.product(*(grid[name] for name in names)):
+        params = replace(base, **dict(zip(names, values)))
+        try:
+            validate_tranches(params)
+        except ValueError:
+            continue
+        combos.append(params)
+    return combos
+
+
+def run_sweep(
+    market: MarketData,
+    params_list: Sequence[TradingParams],
+    engine_cls: Type[TradingEngine] = TradingEngine,
+    workers: Optional[int] = None,
+) -> List[SweepResult]:
+    """Roda cada combinação em paralelo e devolve os resultados do melhor para o pior ``equity``.
+
+    A posição que ficou aberta no fim da série entra pelo valor de mercado (último preço);
+    só o caixa (``montante_final``) tornaria qualquer combinação comprada no fim a pior.
+
+    Com mais de um worker, a série vai para os processos como memmap de um arquivo
+    compartilhado (só o caminho é serializado), em vez de uma cópia por worker.
+    """
+    with evaluation_pool(market, engine_cls, workers, len(params_list)) as evaluate:
+        results = evaluate([(params, None) for params in params_list])
+    return sorted(results, key=lambda r: r.equity, reverse=True)
+
+
+# Uma avaliação: parâmetros + intervalo [inicio, fim) da série (None = série inteira)
+Task = Tuple[TradingParams, Optional[Tuple[int, int]]]
+
+
+@contextmanager
+def evaluation_pool(
+    market: MarketData,
+    engine_cls: Type[TradingEngine] = TradingEngine,
+    workers: Optional[int] = None,
+    max_tasks: Optional[int] = None,
+) -> Iterator[Callable[[Sequence[Task]], List[SweepResult]]]:
+    """Pool reutilizável que avalia listas de ``Task`` na ordem recebida.
+
+    Os workers recebem a série uma vez (memmap compartilhado) e cada intervalo vira
+    uma visão ``window`` dela, sem cópia.
+    """
+    workers = max(1, min(workers or os.cpu_count() or 1, max_tasks or os.cpu_count() or 1))
+    if workers == 1:
+        _init_worker(market, engine_cls)
+        yield lambda tasks: [_run_task(task) for task in tasks]
+        return
+    with _shared_market(market) as shared:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(shared, engine_cls)) as pool:
+            yield lambda tasks: list(pool.map(_run_task, tasks, chunksize=max(1, len(tasks) // (workers * 4))))
+
+
+@contextmanager
+def _shared_market(market: MarketData) -> Iterator[ArrayMarketData]:
+    """``ArrayMarketData`` em memmap; grava num diretório temporário se ainda não vier de arquivo."""
+    arrays = ArrayMarketData.from_market(market)
+    if arrays.source is not None:
+        yield arrays
+        return
+    with tempfile.TemporaryDirectory(prefix="sweep-market-") as tmp:
+        yield ArrayMarketData.open(arrays.save(Path(tmp)))
+
+
+def write_sweep_results(results: Sequence[SweepResult], swept_fields: Sequence[str], target: Path) -> Path:
+    """Salva a tabela ranqueada em CSV."""
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with target.open("w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["rank", *swept_fields, *_RESULT_COLUMNS])
+        for rank, result in enumerate(results, start=1):
+            writer.writerow(
+                [rank, *(format_param_value(getattr(result.params, f)) for f in swept_fields), *_result_values(result)]
+            )
+    return target
+
+
+def format_sweep_table(results: Sequence[SweepResult], swept_fields: Sequence[str], top: int = 10) -> str:
+    """Tabela texto com as ``top`` melhores combinações."""
+    header = ["#", *swept_fields, "equity", "montante_final", "total_lucro", "taxas", "W/L"]
+    rows = [header]
+    for rank, result in enumerate(results[:top], start=1):
+        rows.append(
+            [
+                str(rank),
+                *(format_param_value(getattr(result.params, f)) for f in swept_fields),
+                f"R${result.equity:,.2f}",
+                f"R${result.montante_final:,.2f}",
+                f"R${result.total_lucro:,.2f}",
+                f"R${result.total_taxas:,.2f}",
+                f"{result.operacoes_lucro}/{result.operacoes_prejuizo}",
+            ]
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    return "\n".join("  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows)
+
+
+_RESULT_COLUMNS = (
+    "equity",
+    "montante_final",
+    "btc_aberto",
+    "total_lucro",
+    "total_taxas",
+    "operacoes_lucro",
+    "operacoes_prejuizo",
+    "operacoes",
+)
+
+
+def _result_values(result: SweepResult) -> List[Any]:
+    return [
+        round(result.equity, 2),
+        round(result.montante_final, 2),
+        round(result.btc_aberto, 8),
+        round(result.total_lucro, 2),
+        round(result.total_taxas, 2),
+        result.operacoes_lucro,
+        result.operacoes_prejuizo,
+        result.operacoes,
+    ]
+
+
+def _init_worker(market: MarketData, engine_cls: Type[TradingEngine]) -> None:
+    global _worker_market, _worker_engine
+    _worker_market = market
+    _worker_engine = engine_cls
+
+
+def _run_task(task: Task) -> SweepResult:
+    """Executa uma combinação com estado novo e isolado (sem arquivo de estado)."""
+    params, bounds = task
+    market = _worker_market if bounds is None else _worker_window(*bounds)
+    logger = _silent_logger()
+    state = reset_state_if_new_run(BotState(), params)
+    preco_final = float(market.prices[market.length() - 1])
+    # Fallback após o fim dos dados: passeio semeado a partir do último preço da janela
+    exchange = MockExchange(
+        taxa_transacao=params.taxa_transacao,
+        start_price=preco_final,
+        logger=logger,
+        verbose=False,
+        seed=0,
+    )
+    engine = _worker_engine(params, exchange, logger, log_mode="off")
+    state = engine.run_operations(market, state)
+    return SweepResult(
+        params=params,
+        montante_final=state.montante,
+        total_lucro=state.total_lucro,
+        total_taxas=state.total_taxas,
+        operacoes_lucro=sum(1 for l in state.lucros if l > 0),
+        operacoes_prejuizo=sum(1 for l in state.lucros if l < 0),
+        operacoes=len(state.lucros),
+        btc_aberto=state.btc_tranches.btc_total,
+        preco_final=preco_final,
+        stop_losses=sum(1 for d in state.operation_details if d.get("motivo_venda") == "Stop-loss Total"),
+        saldo_history=list(state.saldo_history),
+    )
+
+
+def _worker_window(start: int, stop: int) -> MarketData:
+    if isinstance(_worker_market, ArrayMarketData):
+        return _worker_market.window(start, stop)
+    return MarketData(prices=_worker_market.prices[start:stop], timestamps=_worker_market.timestamps[start:stop])
+
+
+def _silent_logger() -> logging.Logger:
+    logger = logging.getLogger("bitcoin-bot.sweep")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+        logger.propagate = False
+    return logger
+
+
+def _expand_range(raw: str, cast) -> List[Any]:
+    parts = raw.split(":")
+    if len(parts) != 3:
+        raise ValueError(f"Intervalo inválido '{raw}': use inicio:fim:passo")
+    start, stop, step = (cast(p) for p in parts)
+    if step == 0 or (stop - start) / step < 0:
+        raise ValueError(f"Passo inválido no intervalo '{raw}'")
+    count = int(round((stop - start) / step)) + 1
+    return [cast(round(start + i * step, 10)) for i in range(count)]
+
+
+def _convert(raw: str, kind: str) -> Any:
+    if kind == "int":
+        return int(raw)
+    if kind == "bool":
+        return raw.lower() in ("1", "true", "sim", "yes")
+    return float(raw)
+
+
+def format_param_value(value: Any) -> str:
+    """Valor de parâmetro em texto; tuplas viram ``a/b/c`` como no ``--grid``."""
+    if isinstance(value, (tuple, list)):
+        return "/".join(str(v) for v in value)
+    return str(value)
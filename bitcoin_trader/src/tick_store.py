@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from typing import Tuple
+
+import numpy as np
+
+
+class TickRing:
+    """Buffer circular pré-alocado de ticks (preço + timestamp em ns).
+
+    Cada tick é gravado duas vezes (posição ``i`` e ``i + capacity``), então os últimos
+    ``n`` ticks são sempre um trecho contíguo: ``prices(n)``/``timestamps(n)`` devolvem
+    views somente leitura, sem cópia, e ``push`` não aloca memória. Um único produtor;
+    leitores usam ``count`` (número de sequência) para saber o que já viram.
+    """
+
+    __slots__ = ("capacity", "count", "_prices", "_timestamps")
+
+    def __init__(self, capacity: int = 65536):
+        if capacity < 2:  # com um slot só, todo push sobrescreve o tick que o leitor pode estar lendo
+            raise ValueError("capacity deve ser ao menos 2")
+        self.capacity = capacity
+        self.count = 0  # total de ticks já gravados; o próximo tick recebe este número
+        self._prices = np.zeros(2 * capacity, dtype=np.float64)
+        self._timestamps = np.zeros(2 * capacity, dtype=np.int64)
+
+    def __len__(self) -> int:
+        return min(self.count, self.capacity)
+
+    def push(self, price: float, ts_ns: int) -> None:
+        i = self.count % self.capacity
+        self._prices[i] = self._prices[i + self.capacity] = price
+        self._timestamps[i] = self._timestamps[i + self.capacity] = ts_ns
+        self.count += 1  # publicado só depois dos dados: leitores nunca veem slot pela metade
+
+    @property
+    def oldest(self) -> int:
+        """Número de sequência do tick mais antigo ainda no buffer."""
+        return self.count - len(self)
+
+    @property
+    def last(self) -> float:
+        if not self.count:
+            raise IndexError("Buffer de ticks vazio")
+        return float(self._prices[(self.count - 1) % self.capacity])
+
+    def price_at(self, seq: int) -> float:
+        if not self.oldest <= seq < self.count:
+            raise IndexError(f"Tick {seq} fora do buffer ({self.oldest}..{self.count - 1})")
+        return float(self._prices[seq % self.capacity])
+
+    def read_from(self, seq: int) -> Tuple[int, float]:
+        """(sequência lida, preço) do tick ``seq`` ou, se ele já saiu do buffer, do mais antigo seguro.
+
+        Para leitores em outra thread que o produtor: ``push`` sobrescreve o slot do tick
+        ``count - capacity`` antes de avançar ``count``, então esse nunca é lido; o valor é
+        lido e depois validado, e relido adiante se o produtor passou por cima dele.
+        Requer ``seq < count``.
+        """
+        while True:
+            seq = max(seq, self.count - self.capacity + 1)
+            price = float(self._prices[seq % self.capacity])
+            if seq > self.count - self.capacity:
+                return seq, price
+
+    def timestamp_at(self, seq: int) -> int:
+        if not self.oldest <= seq < self.count:
+            raise IndexError(f"Tick {seq} fora do buffer ({self.oldest}..{self.count - 1})")
+        return int(self._timestamps[seq % self.capacity])
+
+    def prices(self, n: int | None = None) -> np.ndarray:
+        """Últimos ``n`` preços (todos os retidos por padrão), do mais antigo ao mais novo."""
+        return self._window(self._prices, n)
+
+    def timestamps(self, n: int | None = None) -> np.ndarray:
+        return self._window(self._timestamps, n)
+
+    def _window(self, data: np.ndarray, n: int | None) -> np.ndarray:
+        n = len(self) if n is None else min(n, len(self))
+        fim = (self.count - 1) % self.capacity + self.capacity + 1 if self.count else self.capacity
+        view = data[fim - n : fim]
+        view.flags.writeable = False
+        return view
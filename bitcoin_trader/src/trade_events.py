@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+# Textos dos eventos do motor; formatados só quando alguém lê a mensagem
+_TEMPLATES = {
+    "fim_dados": "Fim dos dados históricos alcançado. Finalizando simulação.",
+    "cooldown": "Em cooldown após stop-loss. Pulando operação {0}. Cooldown restante: {1} steps",
+    "dobrando": "Dobrando aposta (perda consecutiva #{0})",
+    "operacao_inicio": "Iniciando operação {0} - Tentando comprar {1} tranches em dips",
+    "operacao_fim": "Operação {0} concluída - Motivo: {1}, Lucro: R${2:,.2f}, Montante atual: R${3:,.2f}",
+    "step": "Step {0}: Preço atual R${1:,.2f}, Variação acumulada {2:.2%}",
+    "tranche_comprada": "Tranche {0}/{1} comprada: {2:.5f} BTC a R${3:,.2f} (dip {4:.2%})",
+    "tranche_alocacao": "Tranche {0}: Alocando R${1:,.2f} do montante base R${2:,.2f}",
+    "sem_compra": "Operação {0} - Nenhuma tranche comprada! Motivo: Não atingiu níveis de dip suficientes em {1} steps",
+    "compra_parcial": "Operação {0} - Apenas {1}/{2} tranches compradas (limite {3} steps atingido)",
+    "compra_concluida": "Operação {0} - Compra concluída: {1}/{2} tranches, total {3:.5f} BTC, custo total R${4:,.2f}",
+    "venda_total": (
+        "{0} - {1:%Y-%m-%d %H:%M:%S} - Lucro: R${2:,.2f} ({3:.2%}) - Compra média: R${4:,.2f} - "
+        "Venda: R${5:,.2f} - BTC: {6:.5f} - Valor venda: R${7:,.2f}"
+    ),
+    "venda_tranche": (
+        "VENDA TRANCHE {0} - {1:%Y-%m-%d %H:%M:%S} - Lucro parcial: R${2:,.2f} ({3:.2%}) - Compra: R${4:,.2f} - "
+        "Venda: R${5:,.2f} - BTC: {6:.5f} - Valor venda: R${7:,.2f}"
+    ),
+    "scaling_out": (
+        "SCALING OUT COMPLETO - {0:%Y-%m-%d %H:%M:%S} - Lucro total: R${1:,.2f} ({2:.2%}) - "
+        "Compra média: R${3:,.2f} - Última venda: R${4:,.2f}"
+    ),
+}
+
+LOG_MODES = ("full", "buffer", "off")
+
+
+class TradeEvent:
+    """Evento compacto (tipo + valores brutos); vira texto apenas em ``str()``.
+
+    Passado direto ao ``logging``, a formatação só acontece se algum handler
+    realmente emitir a mensagem.
+    """
+
+    __slots__ = ("kind", "args")
+
+    def __init__(self, kind: str, args: tuple):
+        self.kind = kind
+        self.args = args
+
+    def __str__(self) -> str:
+        return _TEMPLATES[self.kind].format(*self.args)
+
+    def __repr__(self) -> str:
+        return f"TradeEvent({self.kind!r}, {self.args!r})"
+
+
+class TradeEventBuffer:
+    """Buffer em memória dos eventos do motor, renderizado no fim ou sob demanda."""
+
+    __slots__ = ("events",)
+
+    def __init__(self) -> None:
+        self.events: List[Tuple[int, TradeEvent]] = []
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def append(self, level: int, event: TradeEvent) -> None:
+        self.events.append((level, event))
+
+    def render(self) -> Iterator[str]:
+        for level, event in self.events:
+            yield f"{logging.getLevelName(level)} - {event}"
+
+    def write(self, target: Path) -> Path:
+        """Grava todos os eventos como texto legível (uma linha por evento)."""
+        target.parent.mkdir(parents=True, exist_ok=True)
+        with target.open("w", encoding="utf-8") as fh:
+            for line in self.render():
+                fh.write(line)
+                fh.write("\n")
+        return target
+
+    def flush_to(self, logger: logging.Logger) -> None:
+        """Reemite os eventos no logger e esvazia o buffer."""
+        for level, event in self.events:
+            logger.log(level, event)
+        self.events.clear()
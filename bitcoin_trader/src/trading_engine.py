@@ -2,12 +2,22 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timedelta
-from typing import Optional, Tuple
+from typing import Callable, Optional, Tuple
 
 import logging
 
 from .exchange_interface import ExchangeInterface
-from .models import BotState, MarketData, TradingParams
+from .ledger import TradeLedger
+from .models import BotState, MarketData, Position, Tranche, TradingParams
+from .trade_events import LOG_MODES, TradeEvent, TradeEventBuffer
+
+HOUR_US = 3600 * 10**6
+
+_SELL_LABELS = {
+    "Stop-loss Total": "VENDA STOP-LOSS",
+    "Meta de Lucro Total": "VENDA META LUCRO",
+    "Venda Antecipada Total": "VENDA ANTECIPADA",
+}
 
 
 @dataclass
@@ -26,19 +36,42 @@ class OperationOutcome:
 class TradingEngine:
     """Motor principal com a lógica de compra/venda."""
 
-    def __init__(self, params: TradingParams, exchange: ExchangeInterface, logger: logging.Logger):
+    def __init__(
+        self,
+        params: TradingParams,
+        exchange: ExchangeInterface,
+        logger: logging.Logger,
+        log_mode: str = "full",
+        ledger: Optional[TradeLedger] = None,
+    ):
+        if log_mode not in LOG_MODES:
+            raise ValueError(f"Modo de log desconhecido: {log_mode}")
         self.params = params
         self.exchange = exchange
         self.logger = logger
+        self.log_mode = log_mode
+        # Modo "buffer": eventos ficam em memória e só viram texto no fim (events.write)
+        self.events: Optional[TradeEventBuffer] = TradeEventBuffer() if log_mode == "buffer" else None
+        # Livro SQLite opcional: execuções e resumo de cada operação (ver TradeLedger)
+        self.ledger = ledger
 
-    def run_operations(self, market: Optional[MarketData], state: BotState) -> BotState:
-        """Executa as operações configuradas, atualizando o estado."""
+    def run_operations(
+        self,
+        market: Optional[MarketData],
+        state: BotState,
+        on_operation: Optional[Callable[[int, BotState], None]] = None,
+    ) -> BotState:
+        """Executa as operações configuradas, atualizando o estado.
+
+        ``on_operation(op, state)`` é chamado ao fim de cada operação (ex.: checkpoints).
+        """
         start_op = state.current_operation
         for op in range(start_op, self.params.qtd_operacoes + 1):
             outcome = self._run_single_operation(op, market, state)
-            if len(state.lucros) < op:
+            pos = op - 1 - state.archived.get("lucros", 0)  # com histórico limitado, o início está em disco
+            if len(state.lucros) <= pos:
                 state.lucros.append(0.0)
-            state.lucros[op - 1] = outcome.lucro
+            state.lucros[pos] = outcome.lucro
             state.total_lucro += outcome.lucro
             state.total_imposto += outcome.imposto
             state.total_taxas += outcome.taxa_total
@@ -47,9 +80,11 @@ class TradingEngine:
             state.variacoes_venda.append(outcome.variacao_venda * 100)
             state.ultimo_motivo_venda = outcome.motivo_venda
             state.current_operation += 1
+            if on_operation is not None:
+                on_operation(op, state)
 
-            if market and state.current_index >= market.length():
-                self.logger.info("Fim dos dados históricos alcançado. Finalizando simulação.")
+            if market and not market.has_index(state.current_index):
+                self._log(logging.INFO, "fim_dados")
                 break
 
         return state
@@ -60,11 +95,12 @@ class TradingEngine:
 
         # Cooldown
         if state.cooldown_remaining > 0:
-            self.logger.info(
-                f"Em cooldown após stop-loss. Pulando operação {op}. Cooldown restante: {state.cooldown_remaining} steps"
-            )
+            self._log(logging.INFO, "cooldown", op, state.cooldown_remaining)
             state.cooldown_remaining -= 1
-            state.current_index = min(state.current_index + 1, market.length() if market else state.current_index + 1)
+            if market is None or market.has_index(state.current_index):
+                state.current_index += 1
+            else:
+                state.current_index = market.length()
             return OperationOutcome(0.0, 0.0, 0.0, state.last_price, state.last_price, 0.0, 0.0, "Cooldown", False)
 
         # Modo "dobrar a aposta"
@@ -75,7 +111,7 @@ class TradingEngine:
 
         if dobrar_aposta:
             state.consecutive_losses += 1
-            self.logger.info(f"Dobrando aposta (perda consecutiva #{state.consecutive_losses})")
+            self._log(logging.INFO, "dobrando", state.consecutive_losses)
         else:
             state.consecutive_losses = 0
 
@@ -129,6 +165,10 @@ class TradingEngine:
 
         if motivo_venda == "Stop-loss Total":
             state.cooldown_remaining = params.cooldown_steps
+        elif motivo_venda == "Fim dos Dados (Posição Aberta)":
+            # A posição segue no estado: quem avalia o resultado a marca a mercado
+            state.btc_tranches = btc_tranches
+            state.btc_total = btc_tranches.btc_total
 
         # Armazenar detalhes da operação
         if operacao_realizada:
@@ -145,19 +185,19 @@ class TradingEngine:
             }
             state.operation_details.append(operation_detail)
             state.saldo_history.append(state.montante)
+        if self.ledger is not None:
+            self.ledger.end_operation(op, operation_detail if operacao_realizada else None)
 
         state.last_operation_time = current_time
         state.last_price = preco_btc_venda
 
         # Próximo timestamp para operação seguinte
-        if market and state.current_index < market.length():
+        if market and market.has_index(state.current_index):
             state.current_operation_time = market.timestamps[state.current_index]
         else:
             state.current_operation_time = current_time + timedelta(hours=1)
 
-        self.logger.info(
-            f"Operação {op} concluída - Motivo: {motivo_venda}, Lucro: R${lucro:,.2f}, Montante atual: R${state.montante:,.2f}"
-        )
+        self._log(logging.INFO, "operacao_fim", op, motivo_venda, lucro, state.montante)
 
         return OperationOutcome(
             lucro=lucro,
@@ -181,26 +221,33 @@ class TradingEngine:
         op: int,
     ) -> Tuple[list, float, float, float, float, float, datetime, bool]:
         params = self.params
-        btc_tranches: list = []
+        btc_tranches = Position()
         tranches_compradas = set()
         preco_base_compra: Optional[float] = None
-        total_custo_compra = 0.0
         total_taxa_compra = 0.0
         steps_in = 0
         max_steps_in = params.max_steps_in
+        time_mode = self._time_mode(market)
+        tempo_in = 0  # µs de barras sem compra (modo por tempo)
+        limite_in = max_steps_in * HOUR_US
         simulated_start_time = state.current_operation_time
         comprou_algo = False
 
         # Salva montante inicial da operação para alocação fixa de tranches
         initial_montante = state.montante
 
+        debug = self.log_mode != "off" and self.logger.isEnabledFor(logging.DEBUG)
+
         # Controle para forçar avanço mínimo de steps entre tranches
         steps_since_last_tranche = float('inf')  # Permite primeira tranche imediatamente
         min_steps_between_tranches = 1  # Mínimo 1 step entre tranches
 
-        self.logger.info(f"Iniciando operação {op} - Tentando comprar {len(params.tranches_buy)} tranches em dips")
+        self._log(logging.INFO, "operacao_inicio", op, len(params.tranches_buy))
 
-        while len(tranches_compradas) < len(params.tranches_buy) and steps_in < max_steps_in:
+        while len(tranches_compradas) < len(params.tranches_buy) and (
+            tempo_in < limite_in if time_mode else steps_in < max_steps_in
+        ):
+            duracao = self._bar_duration(market, state.current_index) if time_mode else 0
             preco_atual, current_time = self._next_price(market, state, simulated_start_time, steps_in)
             if preco_base_compra is None:
                 preco_base_compra = preco_atual
@@ -210,60 +257,34 @@ class TradingEngine:
             tranche_comprada_neste_step = False
             steps_since_last_tranche += 1
 
-            for i, (tranche_fraction, level) in enumerate(zip(params.tranches_buy, params.levels_buy)):
+            for i, level in enumerate(params.levels_buy):
                 if i not in tranches_compradas and variacao_acumulada <= level and steps_since_last_tranche >= min_steps_between_tranches:
-                    # Usa montante inicial da operação se fixed_tranche_allocation estiver ativo
-                    montante_base = initial_montante if params.fixed_tranche_allocation else state.montante
-                    montante_tranche = montante_base * tranche_fraction
-                    btc_tranche, taxa_tranche = self.exchange.buy(
-                        montante_tranche, preco_atual, simulated_start_time
+                    total_taxa_compra += self._buy_tranche(
+                        state, btc_tranches, i, preco_atual, variacao_acumulada, simulated_start_time, initial_montante
                     )
-                    btc_tranches.append({"btc": btc_tranche, "preco_compra": preco_atual, "tranche_idx": i})
-                    total_custo_compra += btc_tranche * preco_atual
-                    total_taxa_compra += taxa_tranche
-                    state.montante -= montante_tranche + taxa_tranche
                     tranches_compradas.add(i)
-                    state.buy_points.append((max(state.current_index - 1, 0), preco_atual))
-                    self.logger.info(
-                        f"Tranche {i+1}/{len(params.tranches_buy)} comprada: {btc_tranche:.5f} BTC a R${preco_atual:,.2f} "
-                        f"(dip {variacao_acumulada*100:.2f}%)"
-                    )
-                    self.logger.info(f"Tranche {i+1}: Alocando R${montante_tranche:,.2f} do montante base R${montante_base:,.2f}")
                     tranche_comprada_neste_step = True
                     comprou_algo = True
                     steps_since_last_tranche = 0  # Reseta contador para próxima tranche
                     break
 
             if not tranche_comprada_neste_step:
-                self.logger.debug(
-                    f"Step {steps_in}: Preço atual R${preco_atual:,.2f}, Variação acumulada {variacao_acumulada*100:.2f}%"
-                )
+                if debug:
+                    self._log(logging.DEBUG, "step", steps_in, preco_atual, variacao_acumulada)
                 steps_in += 1
+                tempo_in += duracao
 
-            if market and state.current_index >= market.length():
+            if market and not market.has_index(state.current_index):
                 break
 
-        btc_total = sum(tranche["btc"] for tranche in btc_tranches)
-        preco_btc_compra = btc_tranches[0]["preco_compra"] if btc_tranches else (preco_base_compra or state.last_price)
-        variacao_compra = ((preco_btc_compra - state.last_price) / state.last_price) if state.last_price else 0.0
-
-        if not btc_tranches:
-            self.logger.warning(
-                f"Operação {op} - Nenhuma tranche comprada! Motivo: Não atingiu níveis de dip suficientes em {max_steps_in} steps"
-            )
-        elif len(tranches_compradas) < len(params.tranches_buy):
-            self.logger.warning(
-                f"Operação {op} - Apenas {len(tranches_compradas)}/{len(params.tranches_buy)} tranches compradas (limite {max_steps_in} steps atingido)"
-            )
-        else:
-            self.logger.info(
-                f"Operação {op} - Compra concluída: {len(tranches_compradas)}/{len(params.tranches_buy)} tranches, total {btc_total:.5f} BTC, custo total R${total_custo_compra:,.2f}"
-            )
+        btc_total, preco_btc_compra, variacao_compra = self._summarize_scale_in(
+            op, state, btc_tranches, len(tranches_compradas), preco_base_compra
+        )
 
         return (
             btc_tranches,
             btc_total,
-            total_custo_compra,
+            btc_tranches.custo,
             total_taxa_compra,
             preco_btc_compra,
             variacao_compra,
@@ -275,7 +296,7 @@ class TradingEngine:
         self,
         market: Optional[MarketData],
         state: BotState,
-        btc_tranches: list,
+        btc_tranches: Position,
         btc_total: float,
         custo: float,
         total_taxas: float,
@@ -286,6 +307,9 @@ class TradingEngine:
     ):
         params = self.params
         elapsed_time = 0
+        # Por linha cada tick vale 3600 s; no modo por tempo, a duração real da barra em µs
+        time_mode = self._time_mode(market)
+        unidade = HOUR_US if time_mode else 3600
         sold = False
         motivo_venda = "Sem Compra (Operação Vazia)" if not btc_tranches else "Em aberto"
         preco_btc_venda = preco_btc_compra
@@ -311,133 +335,83 @@ class TradingEngine:
                 current_time,
             )
 
-        while elapsed_time < max_duration_atual * 3600 and not sold:
+        while elapsed_time < max_duration_atual * unidade and not sold:
+            passo = self._bar_duration(market, state.current_index) if time_mode else 3600
             preco_atual, tempo_atual = self._next_price(
-                market, state, state.current_operation_time, elapsed_time // 3600
+                market, state, state.current_operation_time, elapsed_time // unidade
             )
             current_time = tempo_atual
-            elapsed_time += 3600
+            elapsed_time += passo
 
             variacao_atual = (preco_atual * btc_total - custo) / custo if custo > 0 else 0.0
 
-            if variacao_atual <= stop_loss_atual and elapsed_time >= (max_duration_atual - params.min_stop_loss_time_hours) * 3600:
+            if variacao_atual <= stop_loss_atual and elapsed_time >= (max_duration_atual - params.min_stop_loss_time_hours) * unidade:
                 preco_btc_venda = preco_atual
                 variacao_venda = variacao_atual
-                valor_venda, taxa_venda = self.exchange.sell(btc_total, preco_btc_venda, tempo_atual, "Stop-loss Total")
-                total_taxas += taxa_venda
-                lucro = valor_venda - custo
-                imposto = lucro * 0.15 if valor_venda > 35000 and lucro > 0 else 0.0
-                state.montante += valor_venda - taxa_venda
                 motivo_venda = "Stop-loss Total"
+                lucro, imposto, taxa_venda = self._sell_position(
+                    state, btc_total, custo, preco_atual, tempo_atual, motivo_venda, preco_btc_compra, variacao_venda
+                )
+                total_taxas += taxa_venda
                 state.cooldown_remaining = params.cooldown_steps
-                state.sell_points.append((max(state.current_index - 1, 0), preco_btc_venda))
                 sold = True
                 operacao_realizada = True
                 btc_total = 0
-                btc_tranches = []
-
-                # Log detalhado da venda por stop-loss
-                self.logger.info(
-                    f"VENDA STOP-LOSS - {tempo_atual.strftime('%Y-%m-%d %H:%M:%S')} - "
-                    f"Lucro: R${lucro:,.2f} ({variacao_venda*100:.2f}%) - "
-                    f"Compra média: R${preco_btc_compra:,.2f} - Venda: R${preco_btc_venda:,.2f} - "
-                    f"BTC: {btc_total:.5f} - Valor venda: R${valor_venda:,.2f}"
-                )
+                btc_tranches.clear()
 
             elif variacao_atual >= meta_lucro_atual and btc_tranches:
                 preco_btc_venda = preco_atual
                 variacao_venda = variacao_atual
-                valor_venda, taxa_venda = self.exchange.sell(
-                    btc_total, preco_btc_venda, tempo_atual, "Meta de Lucro Total"
+                motivo_venda = "Meta de Lucro Total"
+                lucro, imposto, taxa_venda = self._sell_position(
+                    state, btc_total, custo, preco_atual, tempo_atual, motivo_venda, preco_btc_compra, variacao_venda
                 )
                 total_taxas += taxa_venda
-                lucro = valor_venda - custo
-                imposto = lucro * 0.15 if valor_venda > 35000 and lucro > 0 else 0.0
-                state.montante += valor_venda - taxa_venda
-                motivo_venda = "Meta de Lucro Total"
-                state.sell_points.append((max(state.current_index - 1, 0), preco_btc_venda))
                 sold = True
                 operacao_realizada = True
                 btc_total = 0
-                btc_tranches = []
-
-                # Log detalhado da venda por meta de lucro
-                self.logger.info(
-                    f"VENDA META LUCRO - {tempo_atual.strftime('%Y-%m-%d %H:%M:%S')} - "
-                    f"Lucro: R${lucro:,.2f} ({variacao_venda*100:.2f}%) - "
-                    f"Compra média: R${preco_btc_compra:,.2f} - Venda: R${preco_btc_venda:,.2f} - "
-                    f"BTC: {btc_total:.5f} - Valor venda: R${valor_venda:,.2f}"
-                )
+                btc_tranches.clear()
 
             elif btc_tranches:
                 tranches_vendidas = []
-                for tranche in sorted(btc_tranches[:], key=lambda x: x["tranche_idx"]):
-                    variacao_tranche = (preco_atual - tranche["preco_compra"]) / tranche["preco_compra"]
-                    for i, (tranche_sell_fraction, level_sell) in enumerate(zip(params.tranches_sell, params.levels_sell)):
+                for tranche in btc_tranches:
+                    variacao_tranche = (preco_atual - tranche.preco_compra) / tranche.preco_compra
+                    for level_sell in params.levels_sell:
                         if variacao_tranche >= level_sell:
-                            btc_vendido = tranche["btc"]
-                            valor_vendido = btc_vendido * preco_atual
-                            taxa_venda_tranche = valor_vendido * params.taxa_transacao
-                            state.montante += valor_vendido - taxa_venda_tranche
+                            lucro_parcial, taxa_venda_tranche = self._sell_tranche(
+                                state, tranche, preco_atual, variacao_tranche, tempo_atual
+                            )
                             total_taxas += taxa_venda_tranche
-                            lucro_parcial = (valor_vendido - taxa_venda_tranche) - (btc_vendido * tranche["preco_compra"])
                             lucro += lucro_parcial
-                            state.sell_points.append((max(state.current_index - 1, 0), preco_atual))
                             tranches_vendidas.append(tranche)
                             operacao_realizada = True
-
-                            # Log detalhado da venda parcial por tranche
-                            self.logger.info(
-                                f"VENDA TRANCHE {tranche['tranche_idx']+1} - {tempo_atual.strftime('%Y-%m-%d %H:%M:%S')} - "
-                                f"Lucro parcial: R${lucro_parcial:,.2f} ({variacao_tranche*100:.2f}%) - "
-                                f"Compra: R${tranche['preco_compra']:,.2f} - Venda: R${preco_atual:,.2f} - "
-                                f"BTC: {btc_vendido:.5f} - Valor venda: R${valor_vendido:,.2f}"
-                            )
                             break
 
                 for tranche in tranches_vendidas:
-                    btc_tranches.remove(tranche)
+                    btc_tranches.remove(tranche.tranche_idx)
 
-                btc_total = sum(t["btc"] for t in btc_tranches)
+                btc_total = btc_tranches.btc_total
 
                 if not btc_tranches:
                     variacao_venda = (preco_atual - preco_btc_compra) / preco_btc_compra if preco_btc_compra else 0.0
                     motivo_venda = "Meta de Lucro Total (Scaling Out)"
                     sold = True
-
-                    # Log detalhado do scaling out (todas as tranches vendidas)
-                    self.logger.info(
-                        f"SCALING OUT COMPLETO - {tempo_atual.strftime('%Y-%m-%d %H:%M:%S')} - "
-                        f"Lucro total: R${lucro:,.2f} ({variacao_venda*100:.2f}%) - "
-                        f"Compra média: R${preco_btc_compra:,.2f} - Última venda: R${preco_atual:,.2f}"
-                    )
+                    self._log_scaling_out(tempo_atual, lucro, variacao_venda, preco_btc_compra, preco_atual)
 
             elif elapsed_time >= max_duration_atual * params.time_percentage_to_sell and variacao_atual >= params.lucro_minimo:
                 preco_btc_venda = preco_atual
                 variacao_venda = variacao_atual
-                valor_venda, taxa_venda = self.exchange.sell(
-                    btc_total, preco_btc_venda, tempo_atual, "Venda Antecipada Total"
+                motivo_venda = "Venda Antecipada Total"
+                lucro, imposto, taxa_venda = self._sell_position(
+                    state, btc_total, custo, preco_atual, tempo_atual, motivo_venda, preco_btc_compra, variacao_venda
                 )
                 total_taxas += taxa_venda
-                lucro = valor_venda - custo
-                imposto = lucro * 0.15 if valor_venda > 35000 and lucro > 0 else 0.0
-                state.montante += valor_venda - taxa_venda
-                motivo_venda = "Venda Antecipada Total"
-                state.sell_points.append((max(state.current_index - 1, 0), preco_btc_venda))
                 sold = True
                 operacao_realizada = True
                 btc_total = 0
-                btc_tranches = []
-
-                # Log detalhado da venda antecipada
-                self.logger.info(
-                    f"VENDA ANTECIPADA - {tempo_atual.strftime('%Y-%m-%d %H:%M:%S')} - "
-                    f"Lucro: R${lucro:,.2f} ({variacao_venda*100:.2f}%) - "
-                    f"Compra média: R${preco_btc_compra:,.2f} - Venda: R${preco_btc_venda:,.2f} - "
-                    f"BTC: {btc_total:.5f} - Valor venda: R${valor_venda:,.2f}"
-                )
+                btc_tranches.clear()
 
-            if market and state.current_index >= market.length():
+            if market and not market.has_index(state.current_index):
                 motivo_venda = "Fim dos Dados (Posição Aberta)"
                 variacao_venda = variacao_atual
                 sold = True
@@ -461,6 +435,151 @@ class TradingEngine:
             current_time,
         )
 
+    def _buy_tranche(
+        self,
+        state: BotState,
+        position: Position,
+        i: int,
+        preco_atual: float,
+        variacao_acumulada: float,
+        ts: datetime,
+        initial_montante: float,
+    ) -> float:
+        """Compra a tranche ``i`` ao preço atual, abre o lote na posição e retorna a taxa paga."""
+        params = self.params
+        # Usa montante inicial da operação se fixed_tranche_allocation estiver ativo
+        montante_base = initial_montante if params.fixed_tranche_allocation else state.montante
+        montante_tranche = montante_base * params.tranches_buy[i]
+        btc_tranche, taxa_tranche = self.exchange.buy(montante_tranche, preco_atual, ts)
+        state.montante -= montante_tranche + taxa_tranche
+        state.buy_points.append((max(state.current_index - 1, 0), preco_atual))
+        if self.ledger is not None:
+            self.ledger.fill("compra", ts, preco_atual, btc_tranche, montante_tranche, taxa_tranche, tranche=i)
+        self._log(
+            logging.INFO, "tranche_comprada", i + 1, len(params.tranches_buy), btc_tranche, preco_atual, variacao_acumulada
+        )
+        self._log(logging.INFO, "tranche_alocacao", i + 1, montante_tranche, montante_base)
+        position.add(Tranche(btc_tranche, preco_atual, i))
+        return taxa_tranche
+
+    def _summarize_scale_in(
+        self,
+        op: int,
+        state: BotState,
+        btc_tranches: Position,
+        qtd_compradas: int,
+        preco_base_compra: Optional[float],
+    ) -> Tuple[float, float, float]:
+        """Consolida o scaling in: retorna (btc_total, preco_btc_compra, variacao_compra)."""
+        params = self.params
+        btc_total = btc_tranches.btc_total
+        preco_btc_compra = btc_tranches.preco_entrada if btc_tranches else (preco_base_compra or state.last_price)
+        variacao_compra = ((preco_btc_compra - state.last_price) / state.last_price) if state.last_price else 0.0
+
+        if not btc_tranches:
+            self._log(logging.WARNING, "sem_compra", op, params.max_steps_in)
+        elif qtd_compradas < len(params.tranches_buy):
+            self._log(logging.WARNING, "compra_parcial", op, qtd_compradas, len(params.tranches_buy), params.max_steps_in)
+        else:
+            self._log(
+                logging.INFO, "compra_concluida", op, qtd_compradas, len(params.tranches_buy), btc_total, btc_tranches.custo
+            )
+
+        return btc_total, preco_btc_compra, variacao_compra
+
+    def _sell_position(
+        self,
+        state: BotState,
+        btc_total: float,
+        custo: float,
+        preco_atual: float,
+        tempo_atual: datetime,
+        motivo: str,
+        preco_btc_compra: float,
+        variacao: float,
+    ) -> Tuple[float, float, float]:
+        """Vende a posição inteira; retorna (lucro, imposto, taxa_venda)."""
+        valor_venda, taxa_venda = self.exchange.sell(btc_total, preco_atual, tempo_atual, motivo)
+        lucro = valor_venda - custo
+        imposto = lucro * 0.15 if valor_venda > 35000 and lucro > 0 else 0.0
+        state.montante += valor_venda - taxa_venda
+        state.sell_points.append((max(state.current_index - 1, 0), preco_atual))
+        if self.ledger is not None:
+            self.ledger.fill("venda", tempo_atual, preco_atual, btc_total, valor_venda, taxa_venda, motivo)
+
+        # Log detalhado da venda total
+        self._log(
+            logging.INFO,
+            "venda_total",
+            _SELL_LABELS.get(motivo, motivo.upper()),
+            tempo_atual,
+            lucro,
+            variacao,
+            preco_btc_compra,
+            preco_atual,
+            btc_total,
+            valor_venda,
+        )
+        return lucro, imposto, taxa_venda
+
+    def _sell_tranche(
+        self,
+        state: BotState,
+        tranche: Tranche,
+        preco_atual: float,
+        variacao_tranche: float,
+        tempo_atual: datetime,
+    ) -> Tuple[float, float]:
+        """Vende uma tranche isolada (scaling out); retorna (lucro_parcial, taxa)."""
+        btc_vendido = tranche.btc
+        valor_vendido = btc_vendido * preco_atual
+        taxa_venda_tranche = valor_vendido * self.params.taxa_transacao
+        state.montante += valor_vendido - taxa_venda_tranche
+        lucro_parcial = (valor_vendido - taxa_venda_tranche) - (btc_vendido * tranche.preco_compra)
+        state.sell_points.append((max(state.current_index - 1, 0), preco_atual))
+        if self.ledger is not None:
+            self.ledger.fill(
+                "venda", tempo_atual, preco_atual, btc_vendido, valor_vendido, taxa_venda_tranche, "Venda Tranche", tranche.tranche_idx
+            )
+
+        # Log detalhado da venda parcial por tranche
+        self._log(
+            logging.INFO,
+            "venda_tranche",
+            tranche.tranche_idx + 1,
+            tempo_atual,
+            lucro_parcial,
+            variacao_tranche,
+            tranche.preco_compra,
+            preco_atual,
+            btc_vendido,
+            valor_vendido,
+        )
+        return lucro_parcial, taxa_venda_tranche
+
+    def _log_scaling_out(
+        self, tempo_atual: datetime, lucro: float, variacao_venda: float, preco_btc_compra: float, preco_atual: float
+    ) -> None:
+        # Log detalhado do scaling out (todas as tranches vendidas)
+        self._log(logging.INFO, "scaling_out", tempo_atual, lucro, variacao_venda, preco_btc_compra, preco_atual)
+
+    def _log(self, level: int, kind: str, *args) -> None:
+        """Registra um evento do motor conforme o modo de log (full/buffer/off)."""
+        if self.events is not None:
+            self.events.append(level, TradeEvent(kind, args))
+        elif self.log_mode == "full" and self.logger.isEnabledFor(level):
+            self.logger.log(level, TradeEvent(kind, args))
+
+    def _time_mode(self, market: Optional[MarketData]) -> bool:
+        """Durações pelo relógio das barras (só com histórico; sem ele não há timestamps reais)."""
+        return self.params.time_based_steps and market is not None
+
+    def _bar_duration(self, market: MarketData, index: int) -> int:
+        """Duração da barra ``index`` em µs (desde a barra anterior); a primeira vale 1 hora."""
+        if index == 0 or not market.has_index(index):
+            return HOUR_US
+        return (market.timestamps[index] - market.timestamps[index - 1]) // timedelta(microseconds=1)
+
     def _next_price(
         self,
         market: Optional[MarketData],
@@ -469,8 +588,8 @@ class TradingEngine:
         step_hours: int,
     ) -> Tuple[float, datetime]:
         """Obtém próximo preço/timestamp de histórico ou exchange."""
-        if market and state.current_index < market.length():
-            price = market.prices[state.current_index]
+        if market and market.has_index(state.current_index):
+            price = float(market.prices[state.current_index])
             ts = market.timestamps[state.current_index]
             state.current_index += 1
             return price, ts
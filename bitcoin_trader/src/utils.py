@@ -1,13 +1,16 @@
 from __future__ import annotations
 
 import json
+import os
 from datetime import datetime
 from pathlib import Path
 from typing import Tuple
 
+import numpy as np
 import pandas as pd
 
-from .models import BotState, MarketData, Paths, TradingParams
+from . import price_cache
+from .models import ArrayMarketData, BotState, MarketData, Paths, Position, TradingParams
 
 
 def ensure_dirs(paths: Paths) -> None:
@@ -34,37 +37,101 @@ def validate_tranches(params: TradingParams) -> None:
         raise ValueError("Todas as tranches devem ser positivas")
 
 
-def load_csv_prices(csv_file: Path, taxa_cambio: float) -> MarketData:
-    """Carrega preços históricos em USD e converte para BRL."""
+def load_csv_prices(csv_file: Path, taxa_cambio: float, use_cache: bool = True) -> MarketData:
+    """Carrega preços históricos em USD e converte para BRL.
+
+    Com ``use_cache`` a série já interpretada (USD + epoch ns) fica em ``.npy`` ao lado
+    do CSV e as próximas cargas leem o cache via memmap, sem reprocessar o texto. A série
+    volta como ``ArrayMarketData`` (sem listas de ``float``/``Timestamp``); só datas com
+    fuso, que não cabem em epoch ns, ainda voltam como ``MarketData`` em listas.
+    """
     if not csv_file.exists():
         raise FileNotFoundError(f"Arquivo CSV não encontrado: {csv_file}")
 
-    df = pd.read_csv(csv_file)
-    df.dropna(inplace=True)
+    cached = price_cache.load_cached(csv_file) if use_cache else None
+    if cached is not None:
+        prices_usd, timestamps_ns = cached
+    else:
+        prices, timestamps = _read_price_frame(csv_file)
+        if timestamps.dt.tz is not None:
+            # Datas com fuso não cabem no cache em epoch ns; mantém o caminho original
+            return MarketData(prices=(prices * taxa_cambio).tolist(), timestamps=timestamps.tolist())
+        prices_usd, timestamps_ns = _to_arrays(prices, timestamps)
+        if use_cache:
+            price_cache.store(csv_file, prices_usd, timestamps_ns)
+
+    return ArrayMarketData(prices_usd * taxa_cambio, np.asarray(timestamps_ns))
+
+
+def load_market_arrays(csv_file: Path, taxa_cambio: float, use_cache: bool = True) -> ArrayMarketData:
+    """Como ``load_csv_prices``, mas devolve ``ArrayMarketData`` sem materializar listas."""
+    prices_usd, timestamps_ns = load_price_arrays(csv_file, use_cache)
+    return ArrayMarketData(prices_usd * taxa_cambio, np.asarray(timestamps_ns))
+
+
+def load_price_arrays(csv_file: Path, use_cache: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """Preços em USD (float64) e timestamps em epoch ns (int64), do cache quando possível.
+
+    Datas com fuso são mantidas no horário local (fuso descartado).
+    """
+    if not csv_file.exists():
+        raise FileNotFoundError(f"Arquivo CSV não encontrado: {csv_file}")
+
+    cached = price_cache.load_cached(csv_file) if use_cache else None
+    if cached is not None:
+        return cached
 
-    if "Price_USD" in df.columns:
+    prices, timestamps = _read_price_frame(csv_file)
+    aware = timestamps.dt.tz is not None
+    if aware:
+        timestamps = timestamps.dt.tz_localize(None)
+    prices_usd, timestamps_ns = _to_arrays(prices, timestamps)
+    if use_cache and not aware:
+        price_cache.store(csv_file, prices_usd, timestamps_ns)
+    return prices_usd, timestamps_ns
+
+
+def _to_arrays(prices: pd.Series, timestamps: pd.Series) -> Tuple[np.ndarray, np.ndarray]:
+    return (
+        prices.to_numpy(dtype=np.float64),
+        timestamps.astype("datetime64[ns]").to_numpy().view(np.int64),
+    )
+
+
+def price_columns(columns) -> Tuple[str, str]:
+    """Colunas de preço e de timestamp usadas de um CSV de histórico."""
+    if "Price_USD" in columns:
         price_column = "Price_USD"
-    elif "Close" in df.columns:
+    elif "Close" in columns:
         price_column = "Close"
     else:
         raise ValueError("Coluna 'Price_USD' ou 'Close' não encontrada no CSV")
 
-    if "Datetime" in df.columns:
-        timestamps = pd.to_datetime(df["Datetime"]).tolist()
-    elif "Timestamp_ms" in df.columns:
-        timestamps = pd.to_datetime(df["Timestamp_ms"], unit="ms").tolist()
-    else:
-        raise ValueError("Coluna 'Datetime' ou 'Timestamp_ms' não encontrada no CSV")
+    if "Datetime" in columns:
+        return price_column, "Datetime"
+    if "Timestamp_ms" in columns:
+        return price_column, "Timestamp_ms"
+    raise ValueError("Coluna 'Datetime' ou 'Timestamp_ms' não encontrada no CSV")
+
 
-    prices_brl = (df[price_column] * taxa_cambio).tolist()
-    return MarketData(prices=prices_brl, timestamps=timestamps)
+def parse_timestamps(df: pd.DataFrame, ts_column: str) -> pd.Series:
+    if ts_column == "Datetime":
+        return pd.to_datetime(df["Datetime"])
+    return pd.to_datetime(df["Timestamp_ms"], unit="ms")
+
+
+def _read_price_frame(csv_file: Path) -> Tuple[pd.Series, pd.Series]:
+    df = pd.read_csv(csv_file)
+    df.dropna(inplace=True)
+    price_column, ts_column = price_columns(df.columns)
+    return df[price_column], parse_timestamps(df, ts_column)
 
 
 def state_to_dict(state: BotState) -> dict:
     """Serializa BotState para JSON."""
     return {
         "btc_total": state.btc_total,
-        "btc_tranches": state.btc_tranches,
+        "btc_tranches": state.btc_tranches.to_list(),
         "montante": state.montante,
         "last_price": state.last_price,
         "total_lucro": state.total_lucro,
@@ -84,6 +151,9 @@ def state_to_dict(state: BotState) -> dict:
         "ultimo_motivo_venda": state.ultimo_motivo_venda,
         "consecutive_losses": state.consecutive_losses,
         "cooldown_remaining": state.cooldown_remaining,
+        "operation_details": state.operation_details,
+        "run_start_time": state.run_start_time.isoformat() if state.run_start_time else None,
+        "archived": state.archived,
     }
 
 
@@ -91,7 +161,7 @@ def state_from_dict(data: dict) -> BotState:
     """Desserializa dict em BotState."""
     return BotState(
         btc_total=data.get("btc_total", 0.0),
-        btc_tranches=data.get("btc_tranches", []),
+        btc_tranches=Position.from_list(data.get("btc_tranches", [])),
         montante=data.get("montante", 0.0),
         last_price=data.get("last_price", 0.0),
         total_lucro=data.get("total_lucro", 0.0),
@@ -101,8 +171,8 @@ def state_from_dict(data: dict) -> BotState:
         precos_venda=data.get("precos_venda", []),
         variacoes_compra=data.get("variacoes_compra", []),
         variacoes_venda=data.get("variacoes_venda", []),
-        buy_points=data.get("buy_points", []),
-        sell_points=data.get("sell_points", []),
+        buy_points=[tuple(p) for p in data.get("buy_points", [])],
+        sell_points=[tuple(p) for p in data.get("sell_points", [])],
         saldo_history=data.get("saldo_history", []),
         current_index=data.get("current_index", 0),
         current_operation_time=_parse_dt(data.get("current_operation_time")),
@@ -111,9 +181,21 @@ def state_from_dict(data: dict) -> BotState:
         ultimo_motivo_venda=data.get("ultimo_motivo_venda"),
         consecutive_losses=data.get("consecutive_losses", 0),
         cooldown_remaining=data.get("cooldown_remaining", 0),
+        operation_details=[detail_from_dict(d) for d in data.get("operation_details", [])],
+        run_start_time=_parse_dt(data["run_start_time"]) if data.get("run_start_time") else None,
+        archived=dict(data.get("archived", {})),
     )
 
 
+def detail_from_dict(data: dict) -> dict:
+    """Detalhe de operação lido de JSON: horários voltam a ser datetime."""
+    detail = dict(data)
+    for key in ("start_time", "end_time"):
+        if isinstance(detail.get(key), str):
+            detail[key] = _parse_dt(detail[key])
+    return detail
+
+
 def _parse_dt(raw: str | None) -> datetime:
     if not raw:
         return datetime.now()
@@ -134,7 +216,18 @@ def load_state(state_file: Path) -> BotState | None:
 def save_state(state: BotState, state_file: Path) -> None:
     """Salva estado em JSON (ISO para datas)."""
     payload = state_to_dict(state)
-    state_file.write_text(json.dumps(payload, indent=2, default=str))
+    atomic_write_bytes(state_file, json.dumps(payload, indent=2, default=str).encode())
+
+
+def atomic_write_bytes(path: Path, data: bytes, fsync: bool = True) -> None:
+    """Grava num temporário ao lado e troca com ``os.replace``: o arquivo nunca fica pela metade."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as fh:
+        fh.write(data)
+        fh.flush()
+        if fsync:
+            os.fsync(fh.fileno())
+    os.replace(tmp, path)
 
 
 def reset_state_if_new_run(state: BotState, trading: TradingParams) -> BotState:
@@ -0,0 +1,153 @@
+from __future__ import annotations
+
+import csv
+from dataclasses import dataclass
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple, Type
+
+from .models import MarketData, TradingParams
+from .sweep import SweepResult, evaluation_pool, format_param_value
+from .trading_engine import TradingEngine
+
+Bounds = Tuple[int, int]
+
+
+@dataclass
+class WalkForwardWindow:
+    """Uma janela: treino (otimização) seguido do período fora da amostra."""
+
+    index: int
+    train: Bounds
+    test: Bounds
+    best_train: SweepResult
+    oos: SweepResult
+
+    @property
+    def oos_return(self) -> float:
+        inicial = self.oos.params.montante
+        return self.oos.equity / inicial - 1 if inicial else 0.0
+
+
+@dataclass
+class WalkForwardReport:
+    windows: List[WalkForwardWindow]
+    montante_inicial: float
+    montante_final: float
+    equity: List[Tuple[int, int, float]]  # (janela, operação, montante encadeado)
+
+
+def plan_windows(length: int, train_rows: int, test_rows: int, step_rows: Optional[int] = None) -> List[Tuple[Bounds, Bounds]]:
+    """Janelas rolantes ``(treino, teste)``; cada teste começa onde o treino termina."""
+    if train_rows <= 0 or test_rows <= 0:
+        raise ValueError("train_rows e test_rows devem ser positivos")
+    step = step_rows or test_rows
+    if step <= 0:
+        raise ValueError("step_rows deve ser positivo")
+    windows = []
+    start = 0
+    while start + train_rows < length:
+        train = (start, start + train_rows)
+        test = (train[1], min(train[1] + test_rows, length))
+        windows.append((train, test))
+        start += step
+    return windows
+
+
+def run_walkforward(
+    market: MarketData,
+    params_list: Sequence[TradingParams],
+    windows: Sequence[Tuple[Bounds, Bounds]],
+    engine_cls: Type[TradingEngine] = TradingEngine,
+    workers: Optional[int] = None,
+) -> WalkForwardReport:
+    """Otimiza cada janela de treino e aplica o melhor conjunto na janela seguinte.
+
+    Todas as janelas × combinações rodam juntas no mesmo pool; cada tarefa usa uma
+    visão da série carregada uma única vez.
+    """
+    if not params_list or not windows:
+        raise ValueError("Walk-forward requer ao menos uma combinação e uma janela")
+    with evaluation_pool(market, engine_cls, workers, len(windows) * len(params_list)) as evaluate:
+        treino = evaluate([(params, train) for train, _ in windows for params in params_list])
+        melhores = []
+        for w in range(len(windows)):
+            bloco = treino[w * len(params_list):(w + 1) * len(params_list)]
+            # Posição aberta no fim do treino conta pelo valor de mercado; empate: primeira do grid
+            melhores.append(max(bloco, key=lambda r: r.equity))
+        oos = evaluate([(melhor.params, test) for melhor, (_, test) in zip(melhores, windows)])
+
+    resultado = [
+        WalkForwardWindow(index=w + 1, train=train, test=test, best_train=melhor, oos=fora)
+        for w, ((train, test), melhor, fora) in enumerate(zip(windows, melhores, oos))
+    ]
+    montante_inicial = params_list[0].montante
+    montante_final, equity = _stitch_equity(resultado, montante_inicial)
+    return WalkForwardReport(resultado, montante_inicial, montante_final, equity)
+
+
+def _stitch_equity(
+    windows: Sequence[WalkForwardWindow], montante_inicial: float
+) -> Tuple[float, List[Tuple[int, int, float]]]:
+    """Encadeia os retornos fora da amostra: cada janela parte do montante final da anterior.
+
+    Posição aberta no fim de uma janela é marcada a mercado pelo último preço dela.
+    """
+    equity = []
+    capital = montante_inicial
+    for window in windows:
+        base = window.oos.params.montante
+        for op, saldo in enumerate(window.oos.equity_history(), start=1):
+            equity.append((window.index, op, capital * saldo / base))
+        capital *= window.oos.equity / base
+    return capital, equity
+
+
+def write_walkforward_results(report: WalkForwardReport, swept_fields: Sequence[str], outputs_dir: Path) -> Tuple[Path, Path]:
+    """Grava ``walkforward_windows.csv`` (parâmetros por janela) e ``walkforward_equity.csv``."""
+    outputs_dir.mkdir(parents=True, exist_ok=True)
+    windows_path = outputs_dir / "walkforward_windows.csv"
+    with windows_path.open("w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(
+            ["janela", "treino_inicio", "treino_fim", "teste_inicio", "teste_fim", *swept_fields,
+             "montante_treino", "montante_teste", "retorno_teste", "operacoes_teste"]
+        )
+        for window in report.windows:
+            writer.writerow(
+                [window.index, *window.train, *window.test,
+                 *(format_param_value(getattr(window.oos.params, f)) for f in swept_fields),
+                 round(window.best_train.equity, 2), round(window.oos.equity, 2),
+                 round(window.oos_return, 6), window.oos.operacoes]
+            )
+
+    equity_path = outputs_dir / "walkforward_equity.csv"
+    with equity_path.open("w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(["janela", "operacao", "montante"])
+        for janela, op, montante in report.equity:
+            writer.writerow([janela, op, round(montante, 2)])
+    return windows_path, equity_path
+
+
+def format_walkforward_table(report: WalkForwardReport, swept_fields: Sequence[str]) -> str:
+    """Resumo texto: parâmetros escolhidos e retorno fora da amostra por janela."""
+    header = ["janela", "teste", *swept_fields, "treino", "fora da amostra", "retorno"]
+    rows = [header]
+    for window in report.windows:
+        rows.append(
+            [
+                str(window.index),
+                f"{window.test[0]}-{window.test[1]}",
+                *(format_param_value(getattr(window.oos.params, f)) for f in swept_fields),
+                f"R${window.best_train.equity:,.2f}",
+                f"R${window.oos.equity:,.2f}",
+                f"{window.oos_return:.2%}",
+            ]
+        )
+    widths = [max(len(row[i]) for row in rows) for i in range(len(header))]
+    linhas = ["  ".join(cell.rjust(width) for cell, width in zip(row, widths)) for row in rows]
+    total = report.montante_final / report.montante_inicial - 1 if report.montante_inicial else 0.0
+    linhas.append(
+        f"Equity encadeada fora da amostra: R${report.montante_inicial:,.2f} -> R${report.montante_final:,.2f} ({total:.2%})"
+    )
+    return "\n".join(linhas)
@@ -0,0 +1,97 @@
+import logging
+import random
+
+import pytest
+
+import numpy as np
+
+from src.array_engine import ArrayTradingEngine, CrossingIndex
+from src.exchange_interface import MockExchange
+from src.models import BotState, TradingParams
+from src.trading_engine import TradingEngine
+from src.utils import load_csv_prices, state_to_dict
+
+PARAM_SETS = [
+    TradingParams(qtd_operacoes=30),
+    TradingParams(
+        qtd_operacoes=50,
+        meta_lucro=0.03,
+        stop_loss=-0.02,
+        levels_sell=(0.005, 0.01, 0.02),
+        max_duration_hours=48,
+    ),
+    TradingParams(
+        qtd_operacoes=40,
+        tranches_buy=(0.25, 0.25, 0.25, 0.25),
+        levels_buy=(-0.005, -0.01, -0.015, -0.02),
+        tranches_sell=(0.25, 0.25, 0.25, 0.25),
+        levels_sell=(0.005, 0.01, 0.02, 0.03),
+        max_steps_in=24,
+        fixed_tranche_allocation=True,
+    ),
+    TradingParams(
+        qtd_operacoes=60,
+        meta_lucro=0.01,
+        stop_loss=-0.01,
+        levels_sell=(0.05, 0.06, 0.07),
+        max_duration_hours=12,
+        min_stop_loss_time_hours=12,
+        cooldown_steps=2,
+        max_dobrar=1,
+    ),
+    # Janelas de scaling in longas: exercita os saltos pelo índice de blocos
+    TradingParams(qtd_operacoes=40, levels_buy=(-0.03, -0.05, -0.08), max_steps_in=500),
+]
+
+
+@pytest.fixture(scope="module", params=[0.004, 0.02])
+def csv_file(request, tmp_path_factory):
+    rng = random.Random(42)
+    path = tmp_path_factory.mktemp("data") / f"btc_{request.param}.csv"
+    price = 60000.0
+    lines = ["Timestamp_ms,Datetime,Price_USD"]
+    for i in range(2000):
+        ts_ms = 1704067200000 + i * 3600 * 1000
+        hour = i % 24
+        day = 1 + (i // 24) % 28
+        month = 1 + i // (24 * 28)
+        lines.append(f"{ts_ms},2024-{month:02d}-{day:02d} {hour:02d}:00:00,{price:.2f}")
+        price *= 1 + rng.gauss(0, request.param)
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.mark.parametrize("params", PARAM_SETS)
+def test_array_engine_matches_reference(csv_file, params):
+    reference = _run(TradingEngine, csv_file, params)
+    vectorized = _run(ArrayTradingEngine, csv_file, params)
+
+    assert state_to_dict(vectorized) == state_to_dict(reference)
+    assert vectorized.operation_details == reference.operation_details
+
+
+def test_crossing_index_matches_linear_scan():
+    rng = np.random.default_rng(3)
+    prices = 100000 * np.cumprod(1 + rng.normal(0, 0.003, 1000))
+    index = CrossingIndex(prices)
+    for lo, hi, limite in [(0, 1000, -0.05), (5, 700, -0.01), (130, 131, 0.0), (64, 640, -0.2), (999, 1000, -0.02)]:
+        base = prices[lo]
+        hits = np.flatnonzero((prices[lo:hi] - base) / base <= limite)
+        expected = lo + int(hits[0]) if hits.size else -1
+        assert index.first_at_or_below(limite, base, lo, hi) == expected
+
+
+def _run(engine_cls, csv_file, params):
+    market = load_csv_prices(csv_file, params.taxa_cambio)
+    state = BotState(montante=params.montante, last_price=market.prices[0])
+    random.seed(7)  # fallback da MockExchange quando os dados acabam
+    exchange = MockExchange(taxa_transacao=params.taxa_transacao, logger=_silent_logger())
+    engine = engine_cls(params, exchange, _silent_logger())
+    return engine.run_operations(market, state)
+
+
+def _silent_logger():
+    logger = logging.getLogger("test-array-engine")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
@@ -0,0 +1,74 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from src.exchange_interface import MockExchange
+from src.fake_exchange import FakeExchangeClient, FakeExchangeServer, fake_exchange_session
+from src.models import BotState, Paths, TradingParams
+from src.simulator import Simulator
+from src.trading_engine import TradingEngine
+from src.utils import ensure_dirs, reset_state_if_new_run, state_to_dict
+
+PARAMS = TradingParams(
+    qtd_operacoes=4,
+    meta_lucro=0.003,
+    stop_loss=-0.003,
+    levels_buy=(-0.001, -0.002, -0.003),
+    levels_sell=(0.001, 0.002, 0.003),
+    max_steps_in=48,
+    max_duration_hours=24,
+)
+
+
+def test_requests_overlap_on_one_connection():
+    async def scenario():
+        server = FakeExchangeServer(seed=1, latency=0.05, fill_delay=0.05)
+        client = await FakeExchangeClient.connect(*await server.start())
+        try:
+            inicio = time.perf_counter()
+            precos, compra, venda = await asyncio.gather(
+                asyncio.gather(*(client.get_current_price() for _ in range(10))),
+                client.buy(1000.0, 100000.0, datetime(2024, 1, 1)),
+                client.sell(0.01, 100000.0, datetime(2024, 1, 1), "teste"),
+            )
+            decorrido = time.perf_counter() - inicio
+        finally:
+            await client.close()
+            await server.close()
+        return precos, compra, venda, decorrido
+
+    precos, compra, venda, decorrido = asyncio.run(scenario())
+    assert len(set(precos)) == 10
+    assert compra == MockExchange().buy(1000.0, 100000.0, datetime(2024, 1, 1))
+    assert venda == MockExchange().sell(0.01, 100000.0, datetime(2024, 1, 1), "teste")
+    # 12 requisições + 2 confirmações com 50ms cada: em série passariam de 0.6s
+    assert decorrido < 0.4
+
+
+def test_run_real_over_fake_exchange_matches_seeded_mock(tmp_path):
+    sync_engine = TradingEngine(PARAMS, MockExchange(seed=9, verbose=False), _silent_logger())
+    esperado = sync_engine.run_operations(None, reset_state_if_new_run(BotState(), PARAMS))
+
+    paths = Paths(tmp_path, tmp_path / "data", tmp_path / "out", tmp_path / "out" / "state.json", tmp_path / "out" / "log.txt")
+    ensure_dirs(paths)
+    engine = TradingEngine(PARAMS, MockExchange(verbose=False), _silent_logger())
+    simulator = Simulator(engine, paths, _silent_logger())
+    state, _, _ = simulator.run_real(PARAMS, fake_exchange_session(PARAMS.taxa_transacao, seed=9, latency=0.001))
+
+    assert paths.state_file.exists()
+    resultado, referencia = state_to_dict(state), state_to_dict(esperado)
+    for volatil in ("current_operation_time", "last_operation_time"):
+        resultado.pop(volatil), referencia.pop(volatil)
+    for dados in (resultado, referencia):  # horários de relógio em cada operação
+        dados["operation_details"] = [{k: v for k, v in d.items() if not k.endswith("_time")} for d in dados["operation_details"]]
+    assert resultado == referencia
+    assert any(resultado["lucros"])
+    assert isinstance(engine.exchange, MockExchange)  # exchange original restaurada
+
+
+def _silent_logger():
+    logger = logging.getLogger("test-async-exchange")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
@@ -0,0 +1,79 @@
+import threading
+
+from src.daemon import BarClock
+from src.exchange_interface import MockExchange
+from src.models import Paths, TradingParams
+from src.simulator import Simulator
+from src.state_journal import StateJournal
+from src.trading_engine import TradingEngine
+from src.utils import ensure_dirs
+
+
+class _FakeTime:
+    """Relógio simulado: dormir só avança o tempo; pede parada após ``stop_after`` esperas."""
+
+    def __init__(self, start: float, stop_after: int = 10**9):
+        self.now = start
+        self.sleeps = 0
+        self.stop_after = stop_after
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> bool:
+        self.now += seconds
+        self.sleeps += 1
+        return self.sleeps > self.stop_after
+
+
+def test_bar_clock_aligns_to_boundaries_and_counts_skipped_bars():
+    tempo = _FakeTime(1000.3)
+    clock = BarClock(60, clock=tempo.clock, sleep=tempo.sleep)
+
+    assert clock.wait() == 1020
+    tempo.now += 130  # passo do motor mais longo que duas barras
+    assert clock.wait() == 1200
+    assert clock.skipped == 2
+
+
+def test_run_daemon_checkpoints_completed_operations_and_stops(tmp_path):
+    outputs_dir = tmp_path / "outputs"
+    paths = Paths(
+        root=tmp_path,
+        data_dir=tmp_path / "data",
+        outputs_dir=outputs_dir,
+        state_file=outputs_dir / "state.json",
+        log_file=outputs_dir / "log.txt",
+    )
+    ensure_dirs(paths)
+    params = TradingParams(
+        montante=5000,
+        qtd_operacoes=50,
+        tranches_buy=(1.0,),
+        levels_buy=(0.0,),
+        tranches_sell=(1.0,),
+        levels_sell=(0.01,),
+        taxa_transacao=0.0,
+        max_duration_hours=2,
+    )
+    exchange = MockExchange(taxa_transacao=0.0, start_price=100000, verbose=False, seed=3)
+    engine = TradingEngine(params, exchange, _silent_logger())
+    tempo = _FakeTime(7.5, stop_after=12)
+    clock = BarClock(15, threading.Event(), clock=tempo.clock, sleep=tempo.sleep)
+
+    state, market, _ = Simulator(engine, paths, _silent_logger()).run_daemon(params, clock, checkpoint_ops=1)
+
+    assert market is None and engine.exchange is exchange
+    assert 2 <= state.current_operation < params.qtd_operacoes
+    assert StateJournal(paths.state_file).load().current_operation == state.current_operation
+    assert len(state.lucros) == state.current_operation - 1  # só operações concluídas
+    assert clock.last_boundary % 15 == 0 and clock.skipped == 0
+
+
+def _silent_logger():
+    import logging
+
+    logger = logging.getLogger("daemon-test")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
@@ -0,0 +1,37 @@
+import matplotlib.image as mpimg
+import numpy as np
+
+from src.downsample import bin_markers, lttb, min_max
+from src.models import BotState, MarketData
+from src.reporter import create_graph
+
+
+def test_min_max_and_lttb_keep_extremes_and_endpoints():
+    rng = np.random.default_rng(1)
+    y = np.cumsum(rng.normal(size=100_003))
+    indices = min_max(y, 500)
+
+    assert len(indices) <= 1002 and np.all(np.diff(indices) > 0)
+    assert indices[0] == 0 and indices[-1] == len(y) - 1
+    assert y.argmin() in indices and y.argmax() in indices
+    assert min_max(y[:50], 500).tolist() == list(range(50))  # já cabe: série inteira
+
+    escolhidos = lttb(np.arange(len(y)), y, 300)
+    assert len(escolhidos) == 300 and np.all(np.diff(escolhidos) > 0)
+    assert escolhidos[0] == 0 and escolhidos[-1] == len(y) - 1
+    pico = np.zeros(1000)
+    pico[637] = 50.0
+    assert 637 in lttb(np.arange(1000), pico, 20)
+
+
+def test_bin_markers_and_create_graph_with_custom_size(tmp_path):
+    x, y, quantidade = bin_markers(np.arange(1000), np.full(1000, 5.0), 10)
+    assert len(x) == 10 and quantidade.sum() == 1000 and np.allclose(y, 5.0)
+    assert bin_markers([3, 1], [1.0, 2.0], 10)[2].tolist() == [1, 1]
+
+    precos = list(100 + np.sin(np.arange(200_000) / 500.0))
+    pontos = [(i, precos[i]) for i in range(0, 200_000, 50)]
+    state = BotState(buy_points=pontos, sell_points=pontos[1:], saldo_history=[1000.0 + i for i in range(5000)])
+    path = create_graph(state, MarketData(prices=precos, timestamps=[]), tmp_path, dpi=50, size=(8, 4))
+
+    assert mpimg.imread(path).shape[:2] == (200, 400)
@@ -1,5 +1,7 @@
 from datetime import datetime
 
+import pytest
+
 from src.exchange_interface import MockExchange
 
 
@@ -13,3 +15,17 @@ def test_mock_exchange_buy_sell_roundtrip():
     valor, taxa_sell = exchange.sell(btc, price * 1.02, datetime.now(), "teste")
     assert valor > 0
     assert taxa_sell > 0
+
+
+def test_seeded_mock_exchange_is_reproducible_across_refills():
+    a = MockExchange(start_price=100000, seed=42, buffer_size=7)
+    b = MockExchange(start_price=100000, seed=42, buffer_size=7)
+    grande = MockExchange(start_price=100000, seed=42, buffer_size=1000)
+    precos = [a.get_current_price() for _ in range(30)]
+
+    assert precos == [b.get_current_price() for _ in range(30)]
+    assert precos != [MockExchange(start_price=100000, seed=43).get_current_price() for _ in range(30)]
+    # Lotes menores só mudam o arredondamento do produto acumulado, não a sequência
+    assert [grande.get_current_price() for _ in range(30)] == pytest.approx(precos, rel=1e-12)
+    anterior = [100000.0, *precos[:-1]]
+    assert all(-0.001 <= p / q - 1 <= 0.0010002 + 1e-12 for p, q in zip(precos, anterior))
@@ -0,0 +1,93 @@
+import threading
+
+from src.daemon import BarClock
+from src.exchange_interface import MockExchange
+from src.history import BoundedHistory, HistoryArchive
+from src.models import BotState, Paths, TradingParams
+from src.reporter import create_graph, generate_report
+from src.simulator import Simulator
+from src.state_journal import StateJournal
+from src.trading_engine import TradingEngine
+from src.utils import ensure_dirs
+
+
+class _FakeTime:
+    """Relógio simulado: dormir só avança o tempo."""
+
+    def __init__(self, start: float):
+        self.now = start
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> bool:
+        self.now += seconds
+        return False
+
+
+def test_absorb_keeps_recent_items_and_reconcile_drops_uncheckpointed_ones(tmp_path):
+    history = BoundedHistory(HistoryArchive(tmp_path, fsync=False), keep=2)
+    state = BotState(saldo_history=[1.0, 2.0, 3.0, 4.0, 5.0], buy_points=[(0, 10.0), (4, 11.0)])
+    history.reconcile(state)
+    history.absorb(state)
+
+    assert state.saldo_history == [4.0, 5.0] and state.archived == {"saldo_history": 3}
+    assert state.buy_points == [(0, 10.0), (4, 11.0)]  # até 2 * keep itens ficam no estado
+    state.saldo_history.append(6.0)
+    assert history.series("saldo_history", state).tolist() == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0]
+    assert [len(b) for b in history.chunks("saldo_history", state, size=2)] == [2, 1, 3]
+
+    # Queda entre a gravação no histórico e o checkpoint: o estado em disco não tem o 6.0
+    salvo = BotState(saldo_history=[4.0, 5.0], buy_points=list(state.buy_points), archived=dict(state.archived))
+    history.absorb(state)
+    reaberto = BoundedHistory(HistoryArchive(tmp_path, fsync=False), keep=2)
+    reaberto.reconcile(salvo)
+    assert reaberto.archive.count("saldo_history") == 5
+
+
+def test_daemon_with_history_keeps_state_bounded_and_reports_full_series(tmp_path):
+    outputs_dir = tmp_path / "outputs"
+    paths = Paths(
+        root=tmp_path,
+        data_dir=tmp_path / "data",
+        outputs_dir=outputs_dir,
+        state_file=outputs_dir / "state.json",
+        log_file=outputs_dir / "log.txt",
+    )
+    ensure_dirs(paths)
+    params = TradingParams(
+        montante=5000,
+        qtd_operacoes=30,
+        tranches_buy=(1.0,),
+        levels_buy=(0.0,),
+        tranches_sell=(1.0,),
+        levels_sell=(0.01,),
+        taxa_transacao=0.0,
+        max_duration_hours=2,
+    )
+    exchange = MockExchange(taxa_transacao=0.0, start_price=100000, verbose=False, seed=3)
+    engine = TradingEngine(params, exchange, _silent_logger())
+    history = BoundedHistory(HistoryArchive(outputs_dir / "history", fsync=False), keep=3)
+    tempo = _FakeTime(0.5)
+    clock = BarClock(1, threading.Event(), clock=tempo.clock, sleep=tempo.sleep)
+
+    state, _, start = Simulator(engine, paths, _silent_logger(), history=history).run_daemon(params, clock)
+
+    assert len(state.lucros) <= 6 and state.archived["lucros"] > 0
+    assert history.count("lucros", state) == params.qtd_operacoes
+    assert abs(sum(history.series("lucros", state)) - state.total_lucro) < 1e-6
+    carregado = StateJournal(paths.state_file).load()
+    assert carregado.archived == state.archived and carregado.lucros == state.lucros
+    report = generate_report(state, params, 5000, start, state.last_operation_time, outputs_dir, False, history=history)
+    assert f"Total de operações realizadas: {params.qtd_operacoes}" in report
+    assert report.count("Operação #") == history.count("operation_details", state)
+    assert create_graph(state, None, outputs_dir, history=history).exists()
+
+
+def _silent_logger():
+    import logging
+
+    logger = logging.getLogger("history-test")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
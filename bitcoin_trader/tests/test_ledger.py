@@ -0,0 +1,82 @@
+import random
+from dataclasses import replace
+from datetime import datetime
+
+from src.exchange_interface import MockExchange
+from src.ledger import TradeLedger
+from src.models import Paths, TradingParams
+from src.reporter import generate_report
+from src.simulator import Simulator
+from src.trading_engine import TradingEngine
+from src.utils import ensure_dirs
+
+
+def test_backtest_ledger_matches_state_and_survives_resume(tmp_path):
+    csv_file = tmp_path / "btc.csv"
+    rng = random.Random(11)
+    price = 60000.0
+    lines = ["Timestamp_ms,Datetime,Price_USD"]
+    for i in range(1500):
+        lines.append(f"{1704067200000 + i * 3600 * 1000},2024-01-01 00:00:00,{price:.2f}")
+        price *= 1 + rng.gauss(0, 0.01)
+    csv_file.write_text("\n".join(lines) + "\n")
+    params = TradingParams(qtd_operacoes=20, taxa_cambio=1.0)
+    outputs_dir = tmp_path / "outputs"
+    paths = Paths(tmp_path, tmp_path, outputs_dir, outputs_dir / "bot_state.json", outputs_dir / "log.txt")
+    ensure_dirs(paths)
+
+    def _run(trading: TradingParams, ledger: TradeLedger, **kwargs):
+        engine = TradingEngine(trading, MockExchange(verbose=False, seed=0), _silent_logger(), log_mode="off", ledger=ledger)
+        return Simulator(engine, paths, _silent_logger()).run_test(csv_file, trading, use_cache=False, **kwargs)
+
+    with TradeLedger(outputs_dir / "trades.db") as ledger:
+        # Interrompido: as operações 10-12 ficam no livro, mas o último checkpoint é a 9
+        _run(replace(params, qtd_operacoes=12), ledger, checkpoint_ops=9)
+        (outputs_dir / "bot_state.json").unlink()
+        paths.state_file.with_suffix(".journal").write_text("")
+        state, _, start = _run(params, ledger, resume=True)
+
+        assert ledger.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert list(ledger.operations()) == state.operation_details  # sem duplicar as operações refeitas
+        lados = [f[1] for f in ledger.fills()]
+        assert lados.count("compra") == len(state.buy_points) and lados.count("venda") == len(state.sell_points)
+        por_motivo = {m: n for m, n, _ in ledger.summary_by_reason()}
+        assert sum(por_motivo.values()) == len(state.operation_details)
+        report = generate_report(state, params, params.montante, start, state.last_operation_time, outputs_dir, True, ledger=ledger)
+        assert "RESUMO POR MOTIVO DE VENDA" in report and report.count("Operação #") == len(state.operation_details)
+
+
+def test_ledger_range_and_reason_queries_use_indexes(tmp_path):
+    with TradeLedger(tmp_path / "trades.db") as ledger:
+        for op in range(1, 5):
+            ledger.fill("compra", datetime(2024, 1, op), 100.0 + op, 0.1, 10.0, 0.0, tranche=0)
+            detail = {
+                "operation_id": op,
+                "lucro": float(op),
+                "preco_compra": 100.0,
+                "preco_venda": 101.0,
+                "motivo_venda": "Stop-loss Total" if op % 2 else "Meta de Lucro Total",
+                "btc_comprado": 0.1,
+                "custo_total": 10.0,
+                "start_time": datetime(2024, 1, op),
+                "end_time": datetime(2024, 1, op, 12),
+            }
+            ledger.end_operation(op, detail)
+
+        periodo = list(ledger.operations(start=datetime(2024, 1, 2), end=datetime(2024, 1, 3, 23)))
+        assert [d["operation_id"] for d in periodo] == [2, 3]
+        assert [d["operation_id"] for d in ledger.operations(motivo="Stop-loss Total")] == [1, 3]
+        assert len(list(ledger.fills(start=datetime(2024, 1, 3)))) == 2
+        plano = ledger.conn.execute(
+            "EXPLAIN QUERY PLAN SELECT * FROM operations WHERE motivo_venda = ? AND end_time >= ?", ("x", "2024")
+        ).fetchall()
+        assert "operations_motivo" in str(plano)
+
+
+def _silent_logger():
+    import logging
+
+    logger = logging.getLogger("ledger-test")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
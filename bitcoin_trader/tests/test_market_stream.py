@@ -0,0 +1,52 @@
+import logging
+import random
+
+import pytest
+
+from src.array_engine import ArrayTradingEngine
+from src.exchange_interface import MockExchange
+from src.market_stream import StreamingMarketData
+from src.models import BotState, TradingParams
+from src.trading_engine import TradingEngine
+from src.utils import load_csv_prices, state_to_dict
+
+PARAMS = TradingParams(qtd_operacoes=60, meta_lucro=0.02, stop_loss=-0.02, max_duration_hours=72)
+
+
+@pytest.fixture(scope="module")
+def csv_file(tmp_path_factory):
+    rng = random.Random(5)
+    path = tmp_path_factory.mktemp("data") / "btc.csv"
+    price = 60000.0
+    lines = ["Timestamp_ms,Price_USD"]
+    for i in range(1500):
+        lines.append(f"{1704067200000 + i * 3600 * 1000},{price:.2f}")
+        price *= 1 + rng.gauss(0, 0.01)
+    path.write_text("\n".join(lines) + "\n")
+    return path
+
+
+@pytest.mark.parametrize("engine_cls", [TradingEngine, ArrayTradingEngine])
+def test_streamed_chunks_match_in_memory_run(csv_file, engine_cls):
+    expected = _run(TradingEngine, load_csv_prices(csv_file, PARAMS.taxa_cambio, use_cache=False))
+
+    stream = StreamingMarketData.from_csv(csv_file, PARAMS.taxa_cambio, chunk_rows=97, use_cache=False)
+    streamed = _run(engine_cls, stream)
+
+    assert state_to_dict(streamed) == state_to_dict(expected)
+    assert streamed.operation_details == expected.operation_details
+    assert stream.resident_rows <= 3 * 97  # só os blocos ainda alcançáveis ficam em memória
+
+
+def _run(engine_cls, market):
+    state = BotState(montante=PARAMS.montante, last_price=market.prices[0])
+    random.seed(7)
+    exchange = MockExchange(taxa_transacao=PARAMS.taxa_transacao, logger=_silent_logger(), verbose=False)
+    return engine_cls(PARAMS, exchange, _silent_logger()).run_operations(market, state)
+
+
+def _silent_logger():
+    logger = logging.getLogger("test-market-stream")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
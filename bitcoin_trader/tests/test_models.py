@@ -0,0 +1,57 @@
+import pickle
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from src.models import ArrayMarketData, BotState, MarketData, Position, Tranche
+from src.utils import state_from_dict, state_to_dict
+
+
+def test_position_keeps_order_and_totals_incrementally():
+    position = Position()
+    position.add(Tranche(0.3, 100.0, 2))
+    position.add(Tranche(0.1, 110.0, 0))
+    position.add(Tranche(0.2, 105.0, 1))
+
+    assert [t.tranche_idx for t in position] == [0, 1, 2]
+    assert position.preco_entrada == 100.0
+    assert abs(position.btc_total - 0.6) < 1e-12
+
+    removed = position.remove(1)
+    assert removed.preco_compra == 105.0
+    assert len(position) == 2
+    assert abs(position.btc_total - 0.4) < 1e-12
+    assert abs(position.custo - (0.3 * 100.0 + 0.1 * 110.0)) < 1e-9
+
+
+def test_state_json_keeps_tranche_list_shape():
+    state = BotState()
+    state.btc_tranches.add(Tranche(0.5, 200000.0, 1))
+    state.btc_tranches.add(Tranche(0.25, 210000.0, 0))
+
+    payload = state_to_dict(state)
+    assert payload["btc_tranches"] == [
+        {"btc": 0.25, "preco_compra": 210000.0, "tranche_idx": 0},
+        {"btc": 0.5, "preco_compra": 200000.0, "tranche_idx": 1},
+    ]
+    restored = state_from_dict(payload)
+    assert restored.btc_tranches.to_list() == payload["btc_tranches"]
+
+
+def test_array_market_data_matches_list_contract_and_shares_memmap(tmp_path):
+    inicio = datetime(2024, 1, 1)
+    market = MarketData(prices=[100.0, 101.0, 99.5, 102.0], timestamps=[inicio + timedelta(hours=h) for h in range(4)])
+    arrays = ArrayMarketData.from_market(market)
+
+    assert arrays.length() == market.length()
+    assert [arrays.prices[i] for i in range(4)] == market.prices
+    assert list(arrays.timestamps) == market.timestamps
+
+    shared = ArrayMarketData.open(arrays.save(tmp_path))
+    window = shared.window(1, 3)
+    assert isinstance(window.prices, np.memmap)
+    payload = pickle.dumps(window)
+    assert len(payload) < 300  # só caminho + intervalo, sem os dados
+    restored = pickle.loads(payload)
+    assert restored.prices.tolist() == [101.0, 99.5]
+    assert restored.timestamps[0] == inicio + timedelta(hours=1)
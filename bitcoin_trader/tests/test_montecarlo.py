@@ -0,0 +1,76 @@
+import numpy as np
+
+from src.array_engine import ArrayTradingEngine
+from src.models import TradingParams
+from src.trading_engine import TradingEngine
+from src.montecarlo import (
+    bootstrap_paths,
+    gbm_estimate,
+    gbm_paths,
+    max_drawdown,
+    random_walk_paths,
+    run_montecarlo,
+    simple_returns,
+)
+
+
+def test_generators_are_seeded_and_shaped():
+    historico = 300000 * np.cumprod(1 + np.random.default_rng(5).normal(0, 0.01, 400))
+    retornos = simple_returns(historico)
+
+    walk = random_walk_paths(np.random.default_rng(1), 8, 50, 300000.0)
+    assert walk.shape == (8, 50)
+    assert np.all(walk[:, 0] == 300000.0)
+    assert np.array_equal(walk, random_walk_paths(np.random.default_rng(1), 8, 50, 300000.0))
+    passos = walk[:, 1:] / walk[:, :-1] - 1
+    assert passos.min() >= -0.001 and passos.max() <= 0.0010002 + 1e-12
+
+    boot = bootstrap_paths(np.random.default_rng(2), retornos, 4, 60, 1000.0, block_rows=10)
+    assert boot.shape == (4, 60)
+    assert np.isin(np.round(boot[:, 1:] / boot[:, :-1] - 1, 12), np.round(retornos, 12)).all()
+
+    drift, volatility = gbm_estimate(historico)
+    assert abs(volatility - 0.01) < 0.002
+    assert gbm_paths(np.random.default_rng(3), 3, 20, 1000.0, drift, volatility).shape == (3, 20)
+
+
+def test_max_drawdown_from_balance_history():
+    assert max_drawdown([], 100.0) == 0.0
+    assert max_drawdown([110.0, 88.0, 120.0, 90.0], 100.0) == 0.25
+
+
+def test_run_montecarlo_summaries_match_across_workers():
+    paths = bootstrap_paths(
+        np.random.default_rng(4), np.random.default_rng(6).normal(0, 0.01, 500), 6, 300, 300000.0
+    )
+    combos = [TradingParams(qtd_operacoes=5, meta_lucro=m) for m in (0.01, 0.05)]
+
+    summaries = run_montecarlo(paths, combos, ArrayTradingEngine, workers=2)
+
+    assert [s.params for s in summaries] == combos
+    assert all(len(s.runs) == 6 for s in summaries)
+    sequential = run_montecarlo(paths, combos, ArrayTradingEngine, workers=1)
+    assert [r.montante_final for s in sequential for r in s.runs] == [r.montante_final for s in summaries for r in s.runs]
+    assert all(0.0 <= r.max_drawdown <= 1.0 for s in summaries for r in s.runs)
+
+
+def test_position_open_at_end_of_path_is_marked_to_market():
+    paths = np.full((2, 30), 1000.0)
+    params = TradingParams(
+        montante=5000.0,
+        qtd_operacoes=3,
+        tranches_buy=(1.0,),
+        levels_buy=(0.0,),
+        tranches_sell=(1.0,),
+        levels_sell=(0.5,),
+        meta_lucro=0.5,
+        stop_loss=-0.9,
+        taxa_transacao=0.0,
+        max_duration_hours=1000,
+    )
+
+    for engine_cls in (TradingEngine, ArrayTradingEngine):
+        (summary,) = run_montecarlo(paths, [params], engine_cls, workers=1)
+        # Preço parado e sem taxa: o BTC comprado vale o que custou
+        assert [round(r.montante_final, 6) for r in summary.runs] == [5000.0, 5000.0]
+        assert summary.prob_prejuizo == 0.0
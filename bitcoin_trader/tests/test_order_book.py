@@ -0,0 +1,50 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from src.exchange_interface import MockExchange
+from src.order_book import BookModel, OrderBook, OrderBookExchange
+
+
+def test_order_book_walks_levels_and_leaves_limit_remainder():
+    book = OrderBook([99, 98], [1.0, 2.0], [101, 102, 103], [1.0, 1.0, 1.0])
+
+    fill = book.buy(1.5)
+    assert list(fill.prices) == [101, 102]
+    assert list(fill.sizes) == [1.0, 0.5]
+    assert fill.avg_price == pytest.approx((101 + 0.5 * 102) / 1.5)
+    assert book.best_ask == 102 and book.ask_sizes[0] == pytest.approx(0.5)
+
+    # Com limite a varredura para em 99: sobra o que não cabe (execução parcial)
+    parcial = book.sell(5.0, limit=99)
+    assert parcial.size == pytest.approx(1.0) and parcial.remaining == pytest.approx(4.0)
+    assert book.best_bid == 98
+
+    book.add_limit("buy", 98.5, 0.25)
+    assert list(book.bid_prices) == [98.5, 98]
+    valor = book.buy_value(102 * 0.5 + 103 * 0.25)
+    assert valor.size == pytest.approx(0.75) and valor.remaining == 0.0
+
+
+def test_order_book_exchange_charges_slippage_on_large_orders():
+    model = BookModel(levels=1000, spread=0.0, tick=0.0001, depth=0.01, depth_growth=0.0)
+    exchange = OrderBookExchange(taxa_transacao=0.001, start_price=100000, verbose=False, book=model)
+    mock = MockExchange(taxa_transacao=0.001, start_price=100000, verbose=False)
+    ts = datetime(2024, 1, 1)
+
+    pequeno, _ = exchange.buy(100, 100000, ts)
+    assert pequeno == pytest.approx(mock.buy(100, 100000, ts)[0], rel=1e-9)
+
+    btc, taxa = exchange.buy(1_000_000, 100000, ts)
+    assert taxa == pytest.approx(1000)
+    assert btc < mock.buy(1_000_000, 100000, ts)[0]
+    assert exchange.last_fill.levels > 900
+    assert exchange.slippage_total > 0
+
+    # Mais do que o livro inteiro: o resto sai no pior nível, nada fica sem executar
+    valor, _ = exchange.sell(20.0, 100000, ts, "teste")
+    assert exchange.last_fill.size == pytest.approx(20.0)
+    assert valor == pytest.approx(float(exchange.last_fill.prices @ exchange.last_fill.sizes))
+    assert exchange.last_fill.prices[-1] == pytest.approx(100000 * (1 - 0.0001 * 999))
+    assert np.all(np.diff(exchange.last_fill.prices) <= 0)
@@ -0,0 +1,44 @@
+import os
+
+import numpy as np
+
+from src import price_cache
+from src.models import ArrayMarketData
+from src.utils import load_csv_prices
+
+
+def _write_csv(path, prices):
+    lines = ["Datetime,Price_USD"]
+    lines += [f"2024-01-01 {h:02d}:00:00,{p}" for h, p in enumerate(prices)]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_cache_is_reused_and_applies_exchange_rate_at_load(tmp_path):
+    csv_file = tmp_path / "btc.csv"
+    _write_csv(csv_file, [100.0, 101.5, 99.25])
+
+    first = load_csv_prices(csv_file, 5.0)
+    cached = price_cache.load_cached(csv_file)
+    assert cached is not None
+    prices_usd, timestamps_ns = cached
+    assert isinstance(prices_usd, np.memmap)
+    assert prices_usd.tolist() == [100.0, 101.5, 99.25]
+
+    second = load_csv_prices(csv_file, 5.5)
+    assert second.prices.tolist() == [550.0, 558.25, 545.875]
+    assert list(second.timestamps) == list(first.timestamps)
+    assert load_csv_prices(csv_file, 5.5, use_cache=False).prices.tolist() == second.prices.tolist()
+    # Carga pelo cache fica em arrays: timestamps direto do memmap, sem listas de Timestamp
+    assert isinstance(second, ArrayMarketData) and not second.timestamps_ns.flags.owndata
+
+
+def test_cache_is_invalidated_when_csv_changes(tmp_path):
+    csv_file = tmp_path / "btc.csv"
+    _write_csv(csv_file, [100.0, 101.0])
+    load_csv_prices(csv_file, 1.0)
+
+    _write_csv(csv_file, [200.0, 201.0, 202.0])
+    stat = csv_file.stat()
+    os.utime(csv_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert price_cache.load_cached(csv_file) is None
+    assert load_csv_prices(csv_file, 1.0).prices.tolist() == [200.0, 201.0, 202.0]
@@ -0,0 +1,71 @@
+import sys
+import threading
+
+import numpy as np
+import pytest
+
+from src.exchange_interface import MockExchange
+from src.feed_standin import ReplayFeedServer
+from src.price_feed import FeedExchange, StreamingPriceFeed
+from src.tick_store import TickRing
+
+
+def test_tick_ring_windows_are_contiguous_views_across_wraparound():
+    ring = TickRing(capacity=4)
+    for i in range(10):
+        ring.push(100.0 + i, i)
+
+    assert len(ring) == 4 and ring.oldest == 6 and ring.last == 109.0
+    janela = ring.prices(3)
+    assert list(janela) == [107.0, 108.0, 109.0]
+    assert list(ring.timestamps()) == [6, 7, 8, 9]
+    # Sem cópia: a view acompanha o buffer e não aceita escrita
+    assert np.shares_memory(janela, ring._prices) and not janela.flags.writeable
+    with pytest.raises(IndexError):
+        ring.price_at(5)
+
+
+def test_replayed_feed_delivers_every_tick_to_the_exchange():
+    precos = np.linspace(100.0, 200.0, 3000)
+    with ReplayFeedServer(precos) as server:
+        url = server.start()
+        with StreamingPriceFeed(url, TickRing(8192), taxa_cambio=2.0) as feed:
+            exchange = FeedExchange(MockExchange(verbose=False), feed, conflate=False, timeout=10)
+            recebidos = [exchange.get_current_price() for _ in range(len(precos))]
+            with pytest.raises(ConnectionError):
+                exchange.get_current_price()
+
+    assert recebidos == pytest.approx(np.round(precos, 2) * 2.0)
+    assert exchange.dropped == 0 and feed.error is None
+    assert list(feed.ring.prices(2)) == pytest.approx(recebidos[-2:])
+
+
+def test_lagging_reader_never_hits_a_tick_being_overwritten():
+    ring = TickRing(capacity=4)
+    ring.push(0.0, 0)
+    parar = threading.Event()
+
+    def _produtor():
+        n = 1
+        while not parar.is_set():
+            ring.push(float(n), n)
+            n += 1
+
+    intervalo = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    produtor = threading.Thread(target=_produtor, daemon=True)
+    produtor.start()
+    try:
+        lidos, proximo = [], 0
+        for _ in range(20_000):
+            seq, preco = ring.read_from(proximo)
+            lidos.append((seq, preco))
+            proximo = min(seq + 1, ring.count - 1)
+    finally:
+        parar.set()
+        produtor.join()
+        sys.setswitchinterval(intervalo)
+
+    assert all(preco == float(seq) for seq, preco in lidos)
+    with pytest.raises(ValueError):
+        TickRing(capacity=1)
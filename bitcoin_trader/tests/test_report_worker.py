@@ -0,0 +1,97 @@
+import threading
+from datetime import datetime
+
+from src.daemon import BarClock
+from src.exchange_interface import MockExchange
+from src.history import BoundedHistory, HistoryArchive
+from src.ledger import TradeLedger
+from src.models import BotState, Paths, TradingParams
+from src.report_worker import ReportWorker
+from src.simulator import Simulator
+from src.trading_engine import TradingEngine
+from src.utils import ensure_dirs
+
+
+class _FakeTime:
+    """Relógio simulado: dormir só avança o tempo."""
+
+    def __init__(self, start: float):
+        self.now = start
+
+    def clock(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> bool:
+        self.now += seconds
+        return False
+
+
+def test_daemon_hands_snapshots_to_worker_and_final_report_matches_state(tmp_path):
+    outputs_dir = tmp_path / "outputs"
+    paths = Paths(tmp_path, tmp_path / "data", outputs_dir, outputs_dir / "state.json", outputs_dir / "log.txt")
+    ensure_dirs(paths)
+    params = TradingParams(
+        montante=5000,
+        qtd_operacoes=25,
+        tranches_buy=(1.0,),
+        levels_buy=(0.0,),
+        tranches_sell=(1.0,),
+        levels_sell=(0.01,),
+        taxa_transacao=0.0,
+        max_duration_hours=2,
+    )
+    history = BoundedHistory(HistoryArchive(outputs_dir / "history", fsync=False), keep=4)
+    tempo = _FakeTime(0.5)
+    clock = BarClock(1, threading.Event(), clock=tempo.clock, sleep=tempo.sleep)
+    entregues = []
+
+    with TradeLedger(outputs_dir / "trades.db") as ledger:
+        engine = TradingEngine(params, MockExchange(taxa_transacao=0.0, start_price=100000, verbose=False, seed=3), _silent_logger(), ledger=ledger)
+        with ReportWorker(params, outputs_dir, _silent_logger(), history=history, ledger_path=ledger.path, graph_size=(4, 3), graph_dpi=40) as worker:
+
+            def _report(snapshot, start_time):
+                entregues.append(snapshot)
+                worker.submit(snapshot, start_time, graph=True)
+
+            state, _, start = Simulator(engine, paths, _silent_logger(), history=history).run_daemon(
+                params, clock, checkpoint_ops=5, on_checkpoint=_report
+            )
+            worker.submit(state, start)
+
+    assert len(entregues) == params.qtd_operacoes // 5 and len({id(s) for s in entregues}) == len(entregues)
+    assert all(s is not state for s in entregues)
+    assert 1 <= worker.completed <= len(entregues) + 1
+    texto = (outputs_dir / "relatorio_final.txt").read_text(encoding="utf-8")
+    assert f"Total de operações realizadas: {params.qtd_operacoes}" in texto
+    assert texto.count("Operação #") == params.qtd_operacoes
+    assert (outputs_dir / "simulacao_horaria.png").exists()
+
+
+def test_pending_request_is_replaced_by_latest_and_keeps_graph(tmp_path):
+    worker = ReportWorker(TradingParams(), tmp_path, _silent_logger())
+    liberar, comecou, feitos = threading.Event(), threading.Event(), []
+
+    def _render(ledger, state, start_time, market, graph, echo):
+        comecou.set()
+        liberar.wait(5)
+        feitos.append((state.current_operation, graph))
+
+    worker._render = _render
+    inicio = datetime(2024, 1, 1)
+    worker.submit(BotState(current_operation=1), inicio)
+    assert comecou.wait(5)
+    worker.submit(BotState(current_operation=2), inicio, graph=True)
+    worker.submit(BotState(current_operation=3), inicio)
+    liberar.set()
+    worker.close()
+
+    assert feitos == [(1, False), (3, True)]
+
+
+def _silent_logger():
+    import logging
+
+    logger = logging.getLogger("report-worker-test")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
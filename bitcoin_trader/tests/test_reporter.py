@@ -0,0 +1,62 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from src.models import BotState, TradingParams
+from src.reporter import REPORT_CSV, REPORT_JSON, generate_report, write_report
+
+
+def _state(operacoes: int) -> BotState:
+    inicio = datetime(2024, 1, 1)
+    details = [
+        {
+            "operation_id": op,
+            "lucro": 10.0 if op % 2 else -5.0,
+            "preco_compra": 100.0,
+            "preco_venda": 101.0,
+            "motivo_venda": "Meta de Lucro Total" if op % 2 else "Stop-loss Total",
+            "btc_comprado": 0.5,
+            "custo_total": 50.0,
+            "start_time": inicio + timedelta(hours=op),
+            "end_time": inicio + timedelta(hours=op, minutes=30),
+        }
+        for op in range(1, operacoes + 1)
+    ]
+    return BotState(
+        montante=1000.0 + sum(d["lucro"] for d in details),
+        lucros=[d["lucro"] for d in details],
+        operation_details=details,
+        buy_points=[(op, 100.0) for op in range(operacoes)],
+        sell_points=[(op, 101.0) for op in range(operacoes)],
+    )
+
+
+def test_write_report_streams_text_json_and_csv_in_one_pass(tmp_path):
+    state = _state(5)
+    params = TradingParams(montante=1000.0)
+    eco = io.StringIO()
+    text_path = write_report(state, params, 1000.0, datetime(2024, 1, 1), datetime(2024, 1, 2), tmp_path, True, echo=eco)
+
+    texto = text_path.read_text(encoding="utf-8")
+    assert texto == eco.getvalue()
+    assert texto.count("Operação #") == 5 and "Operações com prejuízo: 2" in texto
+    assert "Duração total: 24.0 horas" in texto and "Usando dados históricos: Sim" in texto
+
+    dados = json.loads((tmp_path / REPORT_JSON).read_text(encoding="utf-8"))
+    assert dados["resultados"]["lucro_total"] == 20.0 and dados["estatisticas"]["operacoes"] == 5
+    assert [op["operation_id"] for op in dados["operacoes"]] == [1, 2, 3, 4, 5]
+    assert dados["operacoes"][0]["start_time"] == "2024-01-01T01:00:00"
+
+    with open(tmp_path / REPORT_CSV, newline="", encoding="utf-8") as fh:
+        linhas = list(csv.DictReader(fh))
+    assert len(linhas) == 5 and linhas[1]["motivo_venda"] == "Stop-loss Total"
+    assert float(linhas[1]["lucro"]) == -5.0
+
+
+def test_report_without_operations_is_still_valid(tmp_path):
+    texto = generate_report(BotState(), TradingParams(), 1000.0, datetime(2024, 1, 1), datetime(2024, 1, 1), tmp_path, False)
+
+    assert "DETALHES DAS OPERAÇÕES" not in texto and "Total de operações realizadas: 0" in texto
+    assert json.loads((tmp_path / REPORT_JSON).read_text(encoding="utf-8"))["operacoes"] == []
+    assert (tmp_path / REPORT_CSV).read_text(encoding="utf-8").strip().startswith("operation_id,")
@@ -0,0 +1,81 @@
+import logging
+import random
+from dataclasses import replace
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from src.array_engine import ArrayTradingEngine
+from src.exchange_interface import MockExchange
+from src.models import ArrayMarketData, BotState, MarketData, TradingParams
+from src.resample import load_ohlc, parse_timeframe, resample_ohlc
+from src.trading_engine import TradingEngine
+from src.utils import state_to_dict
+
+PARAMS = TradingParams(qtd_operacoes=40, meta_lucro=0.02, stop_loss=-0.02, max_steps_in=48, max_duration_hours=36)
+
+
+def test_resample_matches_pandas_ohlc(tmp_path):
+    rng = np.random.default_rng(1)
+    passos = rng.choice([1, 2, 7, 45], size=500) * 60 * 10**9
+    timestamps_ns = 1704067200 * 10**9 + np.cumsum(passos)
+    prices = 60000 * np.cumprod(1 + rng.normal(0, 0.001, 500))
+
+    bars = resample_ohlc(timestamps_ns, prices, parse_timeframe("15min"))
+    esperado = pd.Series(prices, index=pd.to_datetime(timestamps_ns)).resample("15min").ohlc().dropna()
+    assert bars.timestamps_ns.tolist() == esperado.index.as_unit("ns").asi8.tolist()
+    for coluna in ("open", "high", "low", "close"):
+        assert getattr(bars, coluna).tolist() == esperado[coluna].tolist()
+
+    csv_file = tmp_path / "btc.csv"
+    pd.DataFrame({"Timestamp_ms": timestamps_ns // 10**6, "Price_USD": prices}).to_csv(csv_file, index=False)
+    primeira = load_ohlc(csv_file, "15min")
+    cached = load_ohlc(csv_file, "15min")  # segunda carga vem do cache
+    assert len(primeira) == len(bars)
+    assert cached.timestamps_ns.tolist() == primeira.timestamps_ns.tolist()
+    assert cached.close.tolist() == primeira.close.tolist()
+
+
+def test_time_based_steps_on_hourly_bars_match_row_counting():
+    market = _market([timedelta(hours=1)] * 1200)
+    por_linha = _run(TradingEngine, market, PARAMS)
+    por_tempo = _run(TradingEngine, market, replace(PARAMS, time_based_steps=True))
+    assert state_to_dict(por_tempo) == state_to_dict(por_linha)
+
+
+def test_time_based_steps_match_between_engines_on_irregular_bars():
+    rng = random.Random(3)
+    market = _market([timedelta(minutes=rng.choice([5, 15, 60, 240])) for _ in range(1200)])
+    params = replace(PARAMS, time_based_steps=True)
+
+    reference = _run(TradingEngine, market, params)
+    vectorized = _run(ArrayTradingEngine, ArrayMarketData.from_market(market), params)
+    assert state_to_dict(vectorized) == state_to_dict(reference)
+    assert vectorized.operation_details == reference.operation_details
+
+
+def _market(passos):
+    rng = random.Random(11)
+    price, ts = 300000.0, datetime(2024, 1, 1)
+    prices, timestamps = [], []
+    for passo in passos:
+        prices.append(price)
+        timestamps.append(ts)
+        price *= 1 + rng.gauss(0, 0.01)
+        ts += passo
+    return MarketData(prices=prices, timestamps=timestamps)
+
+
+def _run(engine_cls, market, params):
+    state = BotState(montante=params.montante, last_price=market.prices[0])
+    random.seed(7)
+    exchange = MockExchange(taxa_transacao=params.taxa_transacao, logger=_silent_logger(), verbose=False)
+    return engine_cls(params, exchange, _silent_logger()).run_operations(market, state)
+
+
+def _silent_logger():
+    logger = logging.getLogger("test-resample")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
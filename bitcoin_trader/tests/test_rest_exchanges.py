@@ -0,0 +1,91 @@
+import base64
+from datetime import datetime
+
+import pytest
+
+from src.exchange_interface import BinanceExchange, CoinbaseExchange
+from src.exchange_standin import ExchangeStandIn
+from src.http_pool import ConnectionPool, ExchangeHTTPError, RateLimiter
+
+AGORA = datetime(2024, 1, 1)
+
+
+def test_binance_orders_quotes_and_retries_on_keep_alive_pool():
+    with ExchangeStandIn(taxa_transacao=0.001, seed=1) as standin:
+        base_url = standin.start()
+        pool = ConnectionPool(
+            base_url, backoff=0.001, rate_limiter=RateLimiter(100, 60.0), used_weight_header="X-MBX-USED-WEIGHT-1M"
+        )
+        exchange = BinanceExchange("chave", "segredo", pool=pool)
+
+        precos = exchange.get_prices(["BTCBRL"] * 5)  # pipeline numa conexão
+        preco = exchange.get_current_price()
+        btc, taxa = exchange.buy(1000.0, preco, AGORA)
+        assert btc == pytest.approx(1000.0 / preco * 0.999)
+        assert taxa == pytest.approx(1.0)
+        valor, taxa_venda = exchange.sell(btc, preco, AGORA, "teste")
+        assert valor == pytest.approx(round(btc, 5) * preco, rel=1e-6)
+        assert taxa_venda == pytest.approx(valor * 0.001)
+
+        standin.fail_next, standin.drop_next = 2, 1
+        exchange.get_current_price()
+        assert pool.stats["retries"] == 3
+        assert len(set(precos)) == 5
+        # Conta local nunca fica abaixo da do servidor (tentativas falhas também contam)
+        assert pool.rate_limiter.used >= standin.account_weight(0)[0] > 0
+        exchange.close()
+    # Só a conexão derrubada precisou ser reaberta
+    assert standin.connections == 2
+
+
+def test_binance_order_is_never_resent_blindly():
+    with ExchangeStandIn(taxa_transacao=0.0, seed=3) as standin:
+        pool = ConnectionPool(standin.start(), backoff=0.001)
+        exchange = BinanceExchange("chave", "segredo", pool=pool)
+        preco = exchange.get_current_price()
+
+        # Executada, resposta perdida: a consulta pelo id do cliente devolve a ordem, sem reenviar
+        standin.lose_next = 1
+        assert exchange.buy(1000.0, preco, AGORA)[0] == pytest.approx(1000.0 / preco)
+        # Conexão caiu antes / 503: a Binance não conhece a ordem (-2013) e ela é reenviada
+        standin.drop_next = 1
+        exchange.buy(1000.0, preco, AGORA)
+        standin.fail_next = 1
+        exchange.buy(1000.0, preco, AGORA)
+        assert len(standin._orders) == 3 and pool.stats["retries"] == 0
+
+        ordem = exchange._signed("POST", "/api/v3/order", {"symbol": "BTCBRL", "side": "BUY", "type": "MARKET",
+                                                           "newClientOrderId": "repetida", "quoteOrderQty": "10"})
+        pool.request(ordem)
+        with pytest.raises(ExchangeHTTPError) as erro:
+            pool.request(ordem)
+        assert erro.value.status == 400 and b"-2010" in erro.value.body
+        exchange.close()
+
+
+def test_coinbase_orders_settle_through_stand_in():
+    with ExchangeStandIn(taxa_transacao=0.005, seed=2) as standin:
+        segredo = base64.b64encode(b"segredo").decode()
+        exchange = CoinbaseExchange("chave", segredo, "frase", taxa_cambio=5.0, base_url=standin.start())
+        preco_brl = exchange.get_current_price()
+        btc, taxa = exchange.buy(1000.0, preco_brl, AGORA)
+        assert taxa == pytest.approx(1000.0 * 0.005)
+        assert btc == pytest.approx((200.0 * 0.995) / (preco_brl / 5.0))
+        valor, _ = exchange.sell(btc, preco_brl, AGORA, "teste")
+        assert valor == pytest.approx(btc * preco_brl, abs=1e-8 * preco_brl)  # tamanho truncado em 1e-8 BTC
+        exchange.close()
+        with pytest.raises(ValueError):
+            CoinbaseExchange(base_url=standin.start()).buy(10.0, 1.0, AGORA)
+
+
+def test_rate_limiter_waits_for_window_and_syncs_with_server():
+    relogio = [0.0]
+    limiter = RateLimiter(10, 60.0, clock=lambda: relogio[0], sleep=lambda s: relogio.__setitem__(0, relogio[0] + s))
+    limiter.acquire(6)
+    relogio[0] = 30.0
+    limiter.acquire(4)
+    limiter.acquire(3)  # precisa esperar os 6 primeiros expirarem (t=60)
+    assert relogio[0] == 60.0
+    assert limiter.used == 7
+    limiter.sync(9)
+    assert limiter.used == 9
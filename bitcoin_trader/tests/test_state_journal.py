@@ -0,0 +1,66 @@
+import json
+
+from src.models import BotState
+from src.state_journal import StateJournal
+from src.utils import state_from_dict, state_to_dict
+
+
+def _operar(state: BotState, op: int) -> None:
+    state.lucros.append(float(op))
+    state.saldo_history.append(1000.0 + op)
+    state.buy_points.append((op, 100.0 + op))
+    state.montante += op
+    state.current_operation += 1
+
+
+def test_journal_appends_deltas_and_replays_after_compaction(tmp_path):
+    arquivo = tmp_path / "bot_state.json"
+    journal = StateJournal(arquivo, compact_every=4, fsync=False)
+    state = BotState(montante=1000.0, saldo_history=[float(i) for i in range(5000)])
+    journal.checkpoint(state)  # primeiro checkpoint: snapshot completo
+    tamanho_snapshot = journal.snapshot_file.stat().st_size
+
+    for op in range(1, 3):
+        _operar(state, op)
+        journal.checkpoint(state)
+    linhas = journal.journal_file.read_text().splitlines()
+    assert len(linhas) == 2 and journal.snapshot_file.stat().st_size == tamanho_snapshot
+    # O delta carrega só o que mudou, não o histórico inteiro
+    assert all(len(linha) < 300 for linha in linhas)
+
+    state.lucros[-1] = -5.0  # alteração fora do padrão append: vai inteira como "set"
+    journal.checkpoint(state)
+    assert StateJournal(arquivo).load().lucros == [1.0, -5.0]
+
+    for op in range(3, 6):
+        _operar(state, op)
+        journal.checkpoint(state)
+    assert journal.entries < 4  # compactou no caminho
+    assert state_to_dict(StateJournal(arquivo).load()) == state_to_dict(_roundtrip(state))
+
+
+def test_journal_recovery_ignores_torn_tail_and_entries_already_compacted(tmp_path):
+    arquivo = tmp_path / "bot_state.json"
+    journal = StateJournal(arquivo, fsync=False)
+    state = BotState(montante=500.0)
+    journal.checkpoint(state)
+    _operar(state, 1)
+    journal.checkpoint(state)
+    antigo = journal.journal_file.read_bytes()
+
+    _operar(state, 2)
+    journal.checkpoint(state)
+    with open(journal.journal_file, "ab") as fh:
+        fh.write(b'{"seq": 99, "set": {"montante"')  # queda no meio do append
+
+    recuperado = StateJournal(arquivo).load()
+    assert recuperado.current_operation == 3 and recuperado.lucros == [1.0, 2.0]
+
+    # Queda entre gravar o snapshot e truncar o journal: entradas antigas não são reaplicadas
+    journal.compact(state)
+    journal.journal_file.write_bytes(antigo)
+    assert StateJournal(arquivo).load().lucros == [1.0, 2.0]
+
+
+def _roundtrip(state: BotState) -> BotState:
+    return state_from_dict(json.loads(json.dumps(state_to_dict(state), default=str)))
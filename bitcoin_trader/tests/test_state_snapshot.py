@@ -0,0 +1,79 @@
+import random
+from dataclasses import replace
+
+import pytest
+
+from src.exchange_interface import MockExchange
+from src.reporter import generate_report
+from src.models import BotState, Paths, Position, TradingParams, Tranche
+from src.simulator import Simulator
+from src.state_snapshot import VERSION, decode_state, encode_state
+from src.trading_engine import TradingEngine
+from src.utils import ensure_dirs, state_to_dict
+
+
+def test_binary_snapshot_roundtrip_and_version_check():
+    position = Position()
+    position.add(Tranche(0.01, 350000.0, 0))
+    position.add(Tranche(0.02, 340000.0, 1))
+    state = BotState(
+        btc_total=0.03,
+        btc_tranches=position,
+        montante=1234.5,
+        lucros=[1.5, -2.0],
+        saldo_history=[1000.0, 1001.5],
+        buy_points=[(3, 350000.0), (7, 340000.0)],
+        current_index=42,
+        current_operation=3,
+    )
+
+    dados = encode_state(state, seq=9)
+    assert state_to_dict(decode_state(dados)) == state_to_dict(state)
+    assert decode_state(dados).ultimo_motivo_venda is None
+
+    outra_versao = dados[:4] + (VERSION + 1).to_bytes(2, "little") + dados[6:]
+    with pytest.raises(ValueError):
+        decode_state(outra_versao)
+
+
+def test_resumed_backtest_matches_uninterrupted_run(tmp_path):
+    csv_file = tmp_path / "btc.csv"
+    rng = random.Random(7)
+    price = 60000.0
+    lines = ["Timestamp_ms,Datetime,Price_USD"]
+    for i in range(1500):
+        lines.append(f"{1704067200000 + i * 3600 * 1000},2024-01-01 00:00:00,{price:.2f}")
+        price *= 1 + rng.gauss(0, 0.01)
+    csv_file.write_text("\n".join(lines) + "\n")
+    params = TradingParams(qtd_operacoes=20, taxa_cambio=1.0)
+
+    def _simulator(nome: str, trading: TradingParams) -> Simulator:
+        outputs_dir = tmp_path / nome
+        paths = Paths(tmp_path, tmp_path, outputs_dir, outputs_dir / "bot_state.json", outputs_dir / "log.txt")
+        ensure_dirs(paths)
+        engine = TradingEngine(trading, MockExchange(verbose=False, seed=0), _silent_logger(), log_mode="off")
+        return Simulator(engine, paths, _silent_logger())
+
+    completo, _, _ = _simulator("completo", params).run_test(csv_file, params, use_cache=False, checkpoint_ops=3)
+
+    parcial = replace(params, qtd_operacoes=8)  # "interrompido" depois da operação 8
+    _, _, inicio = _simulator("retomado", parcial).run_test(csv_file, parcial, use_cache=False, checkpoint_ops=3)
+    retomado, _, inicio_retomado = _simulator("retomado", params).run_test(csv_file, params, use_cache=False, resume=True)
+
+    esperado, obtido = state_to_dict(completo), state_to_dict(retomado)
+    esperado.pop("run_start_time"), obtido.pop("run_start_time")  # horário de criação de cada BotState
+    assert obtido == esperado
+    assert inicio_retomado == inicio == retomado.run_start_time
+    relatorio = generate_report(retomado, params, params.montante, inicio_retomado, retomado.last_operation_time, tmp_path, True)
+    assert relatorio.count("Operação #") == len(completo.operation_details)
+    assert any(d["operation_id"] <= 8 for d in retomado.operation_details)  # anteriores à retomada
+    assert (tmp_path / "retomado" / "bot_state.snap").exists()
+
+
+def _silent_logger():
+    import logging
+
+    logger = logging.getLogger("snapshot-test")
+    if not logger.handlers:
+        logger.addHandler(logging.NullHandler())
+    return logger
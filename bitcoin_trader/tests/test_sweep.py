@@ -0,0 +1,64 @@
+import csv
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.array_engine import ArrayTradingEngine
+from src.models import MarketData, TradingParams
+from src.sweep import build_param_grid, parse_grid_spec, run_sweep, write_sweep_results
+
+
+def test_parse_grid_spec_values_ranges_and_tuples():
+    assert parse_grid_spec("meta_lucro=0.05,0.1") == ("meta_lucro", [0.05, 0.1])
+    assert parse_grid_spec("cooldown_steps=1:5:2") == ("cooldown_steps", [1, 3, 5])
+    assert parse_grid_spec("stop_loss=-0.1:-0.05:0.025") == ("stop_loss", [-0.1, -0.075, -0.05])
+    assert parse_grid_spec("levels_sell=0.01/0.03/0.05,0.005/0.01/0.02") == (
+        "levels_sell",
+        [(0.01, 0.03, 0.05), (0.005, 0.01, 0.02)],
+    )
+
+
+def test_run_sweep_ranks_isolated_runs():
+    prices = [100000 * (1 + 0.02 * ((i % 12) - 6) / 6) for i in range(600)]
+    timestamps = [datetime(2024, 1, 1) + timedelta(hours=i) for i in range(len(prices))]
+    market = MarketData(prices=prices, timestamps=timestamps)
+    grid = dict([parse_grid_spec("meta_lucro=0.01,0.02,0.2"), parse_grid_spec("max_dobrar=0,2")])
+    combos = build_param_grid(TradingParams(qtd_operacoes=10), grid)
+
+    results = run_sweep(market, combos, ArrayTradingEngine, workers=2)
+
+    assert len(results) == 6
+    montantes = [r.equity for r in results]
+    assert montantes == sorted(montantes, reverse=True)
+    assert all(r.operacoes > 0 for r in results)
+    # Cada execução parte de estado novo: o resultado não depende do processo que a rodou
+    sequential = run_sweep(market, combos, ArrayTradingEngine, workers=1)
+    assert [r.equity for r in sequential] == montantes
+
+
+def test_run_sweep_ranks_open_position_at_market_value(tmp_path):
+    prices = [1000.0 if i % 2 == 0 else 998.0 for i in range(401)]
+    timestamps = [datetime(2024, 1, 1) + timedelta(hours=i) for i in range(len(prices))]
+    market = MarketData(prices=prices, timestamps=timestamps)
+    base = TradingParams(
+        montante=5000.0,
+        qtd_operacoes=3,
+        tranches_buy=(1.0,),
+        tranches_sell=(1.0,),
+        levels_sell=(0.5,),
+        meta_lucro=0.5,
+        stop_loss=-0.9,
+        taxa_transacao=0.0,
+        max_duration_hours=1000,
+    )
+    # -0.001: compra a 998 e segue comprado até o fim (1000); -0.5: nunca compra
+    combos = build_param_grid(base, dict([parse_grid_spec("levels_buy=-0.5,-0.001")]))
+
+    results = run_sweep(market, combos, ArrayTradingEngine, workers=1)
+
+    assert [r.params.levels_buy for r in results] == [(-0.001,), (-0.5,)]
+    comprado = results[0]
+    assert comprado.montante_final < 1.0 and comprado.equity == pytest.approx(5000.0 / 998.0 * 1000.0)
+    with open(write_sweep_results(results, ["levels_buy"], tmp_path / "sweep.csv"), encoding="utf-8") as fh:
+        linhas = list(csv.DictReader(fh))
+    assert linhas[0]["levels_buy"] == "-0.001" and float(linhas[0]["btc_aberto"]) > 0
@@ -56,6 +56,35 @@ def test_trading_engine_runs_with_market():
     assert final_state.current_operation == 2  # completou 1 operação
 
 
+def test_trading_engine_buffer_log_mode_renders_on_demand(tmp_path):
+    params = TradingParams(
+        montante=10000,
+        qtd_operacoes=1,
+        meta_lucro=0.02,
+        tranches_buy=(1.0,),
+        levels_buy=(0.0,),
+        tranches_sell=(1.0,),
+        levels_sell=(0.01,),
+        taxa_transacao=0.0,
+        max_duration_hours=4,
+    )
+    prices = [100000, 99000, 102000, 103000, 104000]
+    timestamps = [datetime(2024, 1, 1) + timedelta(hours=i) for i in range(len(prices))]
+    market = MarketData(prices=prices, timestamps=timestamps)
+
+    buffered = TradingEngine(params, DummyExchange(prices), _silent_logger(), log_mode="buffer")
+    buffered.run_operations(market, BotState(montante=params.montante, last_price=prices[0]))
+    quiet = TradingEngine(params, DummyExchange(prices), _silent_logger(), log_mode="off")
+    quiet.run_operations(market, BotState(montante=params.montante, last_price=prices[0]))
+
+    assert quiet.events is None
+    kinds = [event.kind for _, event in buffered.events.events]
+    assert kinds[0] == "operacao_inicio" and "venda_total" in kinds
+    lines = buffered.events.write(tmp_path / "events.log").read_text(encoding="utf-8").splitlines()
+    assert lines[0] == "INFO - Iniciando operação 1 - Tentando comprar 1 tranches em dips"
+    assert any(line.startswith("INFO - VENDA META LUCRO - 2024-01-01 02:00:00") for line in lines)
+
+
 def _silent_logger():
     import logging
 
@@ -0,0 +1,65 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.array_engine import ArrayTradingEngine
+from src.models import ArrayMarketData, MarketData, TradingParams
+from src.sweep import build_param_grid, parse_grid_spec
+from src.walkforward import plan_windows, run_walkforward
+
+
+def test_plan_windows_rolls_test_after_train():
+    assert plan_windows(10, 4, 3) == [((0, 4), (4, 7)), ((3, 7), (7, 10))]
+    assert plan_windows(10, 4, 3, step_rows=5) == [((0, 4), (4, 7)), ((5, 9), (9, 10))]
+    assert plan_windows(4, 4, 3) == []
+    with pytest.raises(ValueError):
+        plan_windows(10, 0, 3)
+
+
+def test_walkforward_picks_best_train_params_and_stitches_oos_equity():
+    prices = [100000 * (1 + 0.02 * ((i % 12) - 6) / 6) for i in range(900)]
+    timestamps = [datetime(2024, 1, 1) + timedelta(hours=i) for i in range(len(prices))]
+    market = ArrayMarketData.from_market(MarketData(prices=prices, timestamps=timestamps))
+    combos = build_param_grid(TradingParams(qtd_operacoes=5), dict([parse_grid_spec("meta_lucro=0.01,0.02,0.2")]))
+    windows = plan_windows(market.length(), 300, 200)
+
+    report = run_walkforward(market, combos, windows, ArrayTradingEngine, workers=2)
+
+    assert [w.test for w in report.windows] == [(300, 500), (500, 700), (700, 900)]
+    for window in report.windows:
+        assert window.best_train.params in combos
+        assert window.oos.params == window.best_train.params
+    capital = report.montante_inicial
+    for window in report.windows:
+        capital *= 1 + window.oos_return
+    assert report.montante_final == pytest.approx(capital)
+    assert report.equity[-1][2] == pytest.approx(capital)
+    # Mesmo resultado sem processos: as janelas são visões da mesma série
+    sequential = run_walkforward(market, combos, windows, ArrayTradingEngine, workers=1)
+    assert [w.oos.montante_final for w in sequential.windows] == [w.oos.montante_final for w in report.windows]
+
+
+def test_walkforward_marks_open_positions_to_market():
+    prices = [1000.0 if i % 2 == 0 else 998.0 for i in range(400)]
+    timestamps = [datetime(2024, 1, 1) + timedelta(hours=i) for i in range(len(prices))]
+    market = ArrayMarketData.from_market(MarketData(prices=prices, timestamps=timestamps))
+    base = TradingParams(
+        montante=5000.0,
+        qtd_operacoes=3,
+        tranches_buy=(1.0,),
+        levels_buy=(-0.001,),
+        tranches_sell=(1.0,),
+        levels_sell=(0.5,),
+        meta_lucro=0.5,
+        stop_loss=-0.9,
+        taxa_transacao=0.0,
+        max_duration_hours=1000,
+    )
+    combos = build_param_grid(base, dict([parse_grid_spec("cooldown_steps=1,2")]))
+
+    report = run_walkforward(market, combos, plan_windows(market.length(), 200, 100), ArrayTradingEngine, workers=1)
+
+    # Cada janela compra a 998 e termina comprada, com o último preço também a 998
+    assert all(w.oos.btc_aberto > 0 and w.oos.montante_final < 1.0 for w in report.windows)
+    assert all(w.oos_return == pytest.approx(0.0) and w.best_train.equity == pytest.approx(5000.0) for w in report.windows)
+    assert report.montante_final == pytest.approx(5000.0) and report.equity[-1][2] == pytest.approx(5000.0)